@@ -0,0 +1,129 @@
+"""Local stand-in for the transcript-processing agent endpoint.
+
+Accepts POSTs of any JSON body over keep-alive HTTP/1.1 and answers after a
+simulated processing delay, optionally failing a fraction of requests and
+capping how many it works on at once, so load_replay.py has something with
+a realistic saturation point to push against.
+
+Usage:
+    python agent_stub.py --port 8080 --latency-ms 20 --jitter-ms 10
+    python agent_stub.py --capacity 32 --error-rate 0.01
+"""
+import argparse
+import asyncio
+import json
+import random
+
+DEFAULT_PORT = 8080
+REASONS = {200: "OK", 400: "Bad Request", 405: "Method Not Allowed", 500: "Internal Server Error"}
+
+
+class AgentStub:
+    """Simulated agent: delay, error rate and a concurrency cap"""
+
+    def __init__(self, latency_ms=20.0, jitter_ms=0.0, error_rate=0.0, capacity=None, rng=random):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.rng = rng
+        # Requests beyond capacity wait their turn, like a saturated worker pool
+        self._slots = asyncio.Semaphore(capacity) if capacity else None
+        self.requests = 0
+        self.errors = 0
+        self.bytes = 0
+
+    async def process(self, body):
+        """Return (status, response dict) for one request body"""
+        delay = max(0.0, self.rng.gauss(self.latency_ms, self.jitter_ms)) / 1000
+        if self._slots is not None:
+            async with self._slots:
+                await asyncio.sleep(delay)
+        else:
+            await asyncio.sleep(delay)
+        self.requests += 1
+        self.bytes += len(body)
+        if self.rng.random() < self.error_rate:
+            self.errors += 1
+            return 500, {"error": "simulated failure"}
+        return 200, {"received": len(body)}
+
+    async def respond(self, writer, status, response):
+        """Write one JSON response"""
+        payload = json.dumps(response).encode("utf-8")
+        writer.write(f"HTTP/1.1 {status} {REASONS[status]}\r\nContent-Type: application/json\r\n"
+                     f"Content-Length: {len(payload)}\r\n\r\n".encode("ascii") + payload)
+        await writer.drain()
+
+    async def handle(self, reader, writer):
+        """Serve requests on one keep-alive connection until the client closes it"""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method = request_line.split()[:1]
+                if not method:
+                    # A blank request line; the rest of the stream can't be trusted either
+                    await self.respond(writer, 400, {"error": "malformed request line"})
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length", 0)))
+                if method[0] != b"POST":
+                    status, response = 405, {"error": "POST only"}
+                else:
+                    status, response = await self.process(body)
+                await self.respond(writer, status, response)
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+
+async def serve(stub, host, port):
+    listener = await asyncio.start_server(stub.handle, host, port, backlog=4096)
+    async with listener:
+        await listener.serve_forever()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Stub agent endpoint for load_replay.py")
+    parser.add_argument("--host", default="127.0.0.1", help="Interface to listen on (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"Port to listen on (default: {DEFAULT_PORT})")
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="Mean processing time per request (default: 20)")
+    parser.add_argument("--jitter-ms", type=float, default=5.0, help="Std deviation of processing time (default: 5)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 500 (default: 0)")
+    parser.add_argument("--capacity", type=int, default=None,
+                        help="Max requests processed at once; the rest queue (default: unlimited)")
+    parser.add_argument("--seed", type=int, default=None, help="Seed for latency and error draws")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    rng = random.Random(args.seed)
+
+    async def run():
+        stub = AgentStub(args.latency_ms, args.jitter_ms, args.error_rate, args.capacity, rng=rng)
+        try:
+            await serve(stub, args.host, args.port)
+        finally:
+            print(f"✓ Served {stub.requests} requests ({stub.errors} errors, {stub.bytes / 1e6:.1f} MB)")
+
+    print(f"Agent stub listening on http://{args.host}:{args.port} "
+          f"(latency {args.latency_ms:g}±{args.jitter_ms:g} ms, capacity {args.capacity or 'unlimited'})")
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,524 @@
+"""Vectorized batch generation engine (requires NumPy).
+
+The per-call path in generate_fake_calls.py makes thousands of tiny
+random.choice / random.sample / random.randint calls per transcript. This
+engine instead draws a block's randomness as NumPy arrays: every call uses
+a fixed number of uniform draws (participant count, role and name indices,
+phrase indices per segment slot, speakers and pause lengths), one row of
+them per call, with timestamps from a cumulative sum. Rendering then only
+indexes into the pre-drawn arrays.
+
+Every call in a block with the same vertical and archetype shares one line
+plan: a fixed sequence of slots mirroring the segment generators, where
+slots that a given call doesn't use (extra architecture items, a 4th action
+item, a 5th participant's intro) are masked out. Speaker rotation follows
+pick_speaker(): 70% of the time a speaker different from the reference
+speaker is chosen, when there are more than two candidates.
+
+The lines of all the plans are then merged back into call_id order, so
+slot filling and rendering are a handful of array operations per block,
+and the text transcripts are one join per block that each call is sliced
+out of.
+
+The output follows the same distribution as the per-call path but is not
+byte-identical to it for a given seed.
+
+Usage:
+    from batch_engine import generate_batch
+    for call in generate_batch(1, 10000, seed=42):
+        ...
+"""
+import math
+from datetime import datetime
+from string import Formatter
+
+import numpy as np
+
+from call_record import BANNER, CallRecord
+from generate_fake_calls import (
+    ACTIVE_VERTICALS, CALL_ARCHETYPES, COMPANIES, FIRST_NAMES, LAST_NAMES, PARTICIPANT_ROLES, PHRASES,
+    VERTICALS, call_plan,
+)
+
+# Calls seeded and assembled together; larger blocks amortize more per-array overhead
+DEFAULT_BLOCK_SIZE = 8192
+MAX_PARTICIPANTS = 5
+
+
+class _LinePlan:
+    """Accumulates the slot arrays for a run of same-shaped calls from their uniform draws
+
+    draws is a (draws per call, calls) array that the draw methods take
+    rows from in order. With draws=None the plan only counts how many
+    draws a call of its shape takes.
+    """
+
+    def __init__(self, draws, n):
+        self.draws = draws
+        self.n = n
+        self.used = 0
+        self.num_participants = None
+        # Per slot: the row of the pause's draw, its lowest value and the number of values
+        self.pause_rows = []
+        self.pause_lows = []
+        self.pause_spans = []
+        self.speakers = []
+        self.active = []
+        # Per slot: (pool of phrase ids, index array or None)
+        self.phrases = []
+        # pick() start -> (participants after start, one fewer, whether more than two)
+        self._candidates = {}
+
+    def uniform(self, k=None):
+        """The next row of draws, one per call, or the next k rows as a (k, calls) array"""
+        start = self.used
+        self.used += 1 if k is None else k
+        if self.draws is None:
+            return np.zeros(self.n if k is None else (k, self.n))
+        return self.draws[start] if k is None else self.draws[start:self.used]
+
+    def integers(self, low, high, k=None):
+        """Integers in [low, high) per call, like rng.integers(low, high); (k, calls) of them with k"""
+        return low + (self.uniform(k) * (high - low)).astype(np.int64)
+
+    def line(self, speaker, pool, index=None, pause_range=(12, 25), active=None):
+        lo, hi = pause_range
+        # Pauses are scaled from their draws all at once, in lines()
+        self.pause_rows.append(self.used)
+        self.pause_lows.append(lo)
+        self.pause_spans.append(hi - lo + 1)
+        self.used += 1
+        # A scalar speaker and active=None (every call) are only broadcast in lines()
+        self.speakers.append(speaker)
+        self.active.append(active)
+        self.phrases.append((pool, index))
+
+    def lines(self):
+        """(line counts, start times, speakers, phrase ids, durations) of the calls' active lines, call after call"""
+        shape = (len(self.speakers), self.n)
+        speakers, phrase_ids, active = np.empty(shape, dtype=np.uint8), np.empty(shape, dtype=np.uint16), np.ones(shape, dtype=bool)
+        pool_ids = {}
+        for slot, (speaker, on, (pool, index)) in enumerate(zip(self.speakers, self.active, self.phrases)):
+            speakers[slot] = speaker
+            if on is not None:
+                active[slot] = on
+            if index is None:
+                phrase_ids[slot] = pool[0]
+            else:
+                if id(pool) not in pool_ids:
+                    pool_ids[id(pool)] = np.asarray(pool, dtype=np.uint16)
+                phrase_ids[slot] = pool_ids[id(pool)][index]
+        pauses = (np.array(self.pause_lows)[:, None]
+                  + (self.draws[self.pause_rows] * np.array(self.pause_spans)[:, None]).astype(np.int64))
+        pauses *= active
+        # (calls, slots); each line starts when the previous active line's pause ends
+        pauses, speakers, phrase_ids, active = pauses.T, speakers.T, phrase_ids.T, active.T
+        ends = np.cumsum(pauses, axis=1)
+        starts = ends - pauses
+        return active.sum(axis=1), starts[active].astype(np.uint32), speakers[active], phrase_ids[active], ends[:, -1]
+
+    def choice(self, pool):
+        """Index into pool per call, like rng.choice(pool)"""
+        return self.integers(0, len(pool))
+
+    def sample(self, pool_size, k):
+        """(k, calls) indices sampled without replacement, like rng.sample(range(pool_size), k)"""
+        return np.argsort(self.uniform(pool_size), axis=0)[:k]
+
+    def pick(self, start, last=None):
+        """Vectorized pick_speaker() over participants[start:], avoiding last"""
+        if start not in self._candidates:
+            m = self.num_participants - start
+            self._candidates[start] = (m, m - 1, m > 2)
+        m, fewer, many = self._candidates[start]
+        u = self.uniform()
+        plain = start + (u * m).astype(np.int64)
+        if last is None:
+            return plain
+        avoid = many & (self.uniform() < 0.7)
+        if start:
+            avoid &= last >= start
+        shifted = start + (u * fewer).astype(np.int64)
+        shifted += shifted >= last
+        return np.where(avoid, shifted, plain)
+
+
+def _scripted(key):
+    return PHRASES.pool(f"scripted.{key}")
+
+
+def _plan_opening(plan):
+    intros = PHRASES.pool("opening_intros")
+    plan.line(0, _scripted("welcome"), pause_range=(8, 12))
+    plan.line(0, _scripted("introductions"), pause_range=(6, 10))
+    for j in range(1, MAX_PARTICIPANTS):
+        plan.line(j, intros, plan.choice(intros), (5, 8), active=plan.num_participants > j)
+    plan.line(0, _scripted("agenda"), pause_range=(8, 12))
+    plan.line(plan.pick(1), _scripted("agenda_ack"), pause_range=(6, 10))
+    plan.line(0, _scripted("kickoff"), pause_range=(5, 8))
+
+
+def _plan_problems(plan, vertical):
+    problems = PHRASES.pool(f"{vertical}.problems")
+    followups = PHRASES.pool("problem_followups")
+    impacts = PHRASES.pool("impact_responses")
+    bridges = PHRASES.pool("foundry_bridges")
+    plan.line(0, _scripted("problem_intro"), pause_range=(10, 15))
+
+    count = min(2, len(problems))
+    picked = plan.sample(len(problems), count)
+    last = None
+    for i in range(count):
+        speaker = plan.pick(1, last)
+        last = speaker
+        plan.line(speaker, problems, picked[i], (15, 22))
+        questioner = plan.pick(0, speaker)
+        plan.line(questioner, followups, plan.choice(followups), (12, 18))
+        responder = plan.pick(0, questioner)
+        plan.line(responder, impacts, plan.choice(impacts), (15, 22))
+        connector = plan.pick(0, responder)
+        plan.line(connector, bridges, plan.choice(bridges), (12, 18))
+        if i < count - 1:
+            plan.line(plan.pick(0, connector), _scripted("problem_transition"), pause_range=(8, 12))
+
+
+def _plan_requirements(plan, vertical):
+    plan.line(0, _scripted("requirements_intro"), pause_range=(12, 16))
+    plan.line(0, _scripted("functional_intro"), pause_range=(8, 12))
+
+    last = None
+    for key, discussions, transition in (("functional_reqs", "requirement_discussions", True),
+                                         ("nonfunctional_reqs", "nfr_discussions", False)):
+        reqs = PHRASES.pool(f"{vertical}.{key}")
+        discussions = PHRASES.pool(discussions)
+        count = min(4, len(reqs))
+        picked = plan.sample(len(reqs), count)
+        for i in range(count):
+            speaker = plan.pick(1, last)
+            last = speaker
+            plan.line(speaker, reqs, picked[i], (15, 22))
+            plan.line(plan.pick(0, speaker), discussions, plan.choice(discussions), (12, 18))
+        if transition:
+            plan.line(plan.pick(0), _scripted("nonfunctional_intro"), pause_range=(10, 14))
+
+
+def _plan_architecture(plan):
+    discussions = PHRASES.pool("architecture_discussions")
+    clarifications = PHRASES.pool("architecture_clarifications")
+    order = plan.sample(len(discussions), 16)
+    count = plan.integers(12, 17)
+    last = None
+    for j in range(16):
+        active = count > j
+        speaker = plan.pick(0, last)
+        last = speaker
+        plan.line(speaker, discussions, order[j], (14, 22), active=active)
+        followup = active & (plan.uniform() < 0.4)
+        plan.line(plan.pick(0, speaker), clarifications, plan.choice(clarifications), (12, 18), active=followup)
+
+
+def _plan_closing(plan):
+    action_items = PHRASES.pool("action_items")
+    remarks = PHRASES.pool("closing_remarks")
+    plan.line(0, _scripted("closing_summary"), pause_range=(8, 12))
+    actions = plan.sample(len(action_items), 4)
+    count = plan.integers(3, 5)
+    for j in range(4):
+        plan.line(plan.pick(0), action_items, actions[j], (10, 15), active=count > j)
+    plan.line(0, _scripted("closing_questions"), pause_range=(8, 12))
+    plan.line(plan.pick(1), remarks, plan.choice(remarks), (6, 10))
+    plan.line(0, _scripted("goodbye"), pause_range=(5, 8))
+
+
+SEGMENTS = {
+    "problem_discovery": ("problems", "architecture"),
+    "requirements_gathering": ("problems", "requirements"),
+    "architecture_review": ("architecture", "requirements"),
+    "mixed": ("problems", "requirements", "architecture"),
+}
+
+
+def _plan_calls(plan, vertical, archetype):
+    """Draw the header fields and line plan of calls with one vertical and archetype
+
+    Returns the header draws: role, first and last name indices as
+    (MAX_PARTICIPANTS, calls) arrays, and company, concern and use case
+    indices.
+    """
+    vertical_data = VERTICALS[vertical]
+    plan.num_participants = plan.integers(3, MAX_PARTICIPANTS + 1)
+    header = {
+        "roles": plan.sample(len(PARTICIPANT_ROLES), MAX_PARTICIPANTS),
+        "first": plan.integers(0, len(FIRST_NAMES), MAX_PARTICIPANTS),
+        "last": plan.integers(0, len(LAST_NAMES), MAX_PARTICIPANTS),
+        "company": plan.choice(COMPANIES),
+        "concern": plan.choice(vertical_data["concerns"]),
+        "use_case": plan.choice(vertical_data["use_cases"]),
+    }
+    _plan_opening(plan)
+    for segment in SEGMENTS[archetype]:
+        if segment == "problems":
+            _plan_problems(plan, vertical)
+        elif segment == "requirements":
+            _plan_requirements(plan, vertical)
+        else:
+            _plan_architecture(plan)
+    _plan_closing(plan)
+    return header
+
+
+class _Tables:
+    """The phrase bank and name lists as object arrays for fancy indexing
+
+    Built per batch rather than at import, since content packs can change
+    them after this module is loaded.
+    """
+
+    def __init__(self):
+        self.templates = np.asarray(PHRASES.templates, dtype=object)
+        # Rendered lines end with a blank line
+        self.line_texts = self.templates + "\n\n"
+        self.has_slots = np.array([bool(phrase.slots) for phrase in PHRASES.phrases])
+        # (literal text, slot name or None) runs of each template with slots,
+        # bare for CallRecord texts and with the blank line for transcripts
+        self.slot_parts = {}
+        for line_end in ("", "\n\n"):
+            self.slot_parts[line_end] = {
+                phrase.id: [(literal, field) for literal, field, _, _ in Formatter().parse(phrase.template + line_end)]
+                for phrase in PHRASES.phrases if phrase.slots}
+        self.first_names = np.array(FIRST_NAMES, dtype=object)
+        self.last_names = np.array(LAST_NAMES, dtype=object)
+        self.roles = np.array(PARTICIPANT_ROLES, dtype=object)
+        self.companies = np.array(COMPANIES, dtype=object)
+        self.concerns = {vertical: np.array(data["concerns"], dtype=object) for vertical, data in VERTICALS.items()}
+        self.use_cases = {vertical: np.array(data["use_cases"], dtype=object) for vertical, data in VERTICALS.items()}
+        self.numbers = np.array([str(i) for i in range(MAX_PARTICIPANTS + 1)], dtype=object)
+        self.timestamps = np.empty(0, dtype=object)
+        self.minutes = []
+        self._draws_per_call = {}
+
+    def draws_per_call(self, vertical, archetype):
+        """How many uniform draws _plan_calls() takes per call of this vertical and archetype"""
+        key = (vertical, archetype)
+        if key not in self._draws_per_call:
+            plan = _LinePlan(None, 0)
+            _plan_calls(plan, vertical, archetype)
+            self._draws_per_call[key] = plan.used
+        return self._draws_per_call[key]
+
+    def up_to(self, max_sec):
+        """Grow the per-second lookups (line timestamps, call minutes) to cover max_sec"""
+        if len(self.minutes) <= max_sec:
+            size = max(max_sec + 1, 2 * len(self.minutes))
+            self.timestamps = np.array([f"[{sec // 60:02d}:{sec % 60:02d}] " for sec in range(size)], dtype=object)
+            # CallRecord.metadata()'s duration_minutes, rounded exactly as it rounds them
+            self.minutes = [round(sec / 60, 1) for sec in range(size)]
+
+
+def _fill_slots(tables, texts, flat_ids, values, line_end=""):
+    """Fill the slots of every template in texts in place, one vectorized concatenation per template
+
+    values maps a slot name to a function of the line indices that
+    returns the value for each of those lines, and line_end is appended to
+    each filled line. Returns the indices of the lines that were filled.
+    """
+    lines = np.nonzero(tables.has_slots[flat_ids])[0]
+    # Group the lines by template
+    lines = lines[np.argsort(flat_ids[lines], kind="stable")]
+    line_ids = flat_ids[lines]
+    firsts = np.nonzero(np.concatenate(([True], line_ids[1:] != line_ids[:-1])))[0].tolist()
+    for first, end in zip(firsts, firsts[1:] + [len(lines)]):
+        selected = lines[first:end]
+        filled = ""
+        for literal, field in tables.slot_parts[line_end][int(line_ids[first])]:
+            filled = filled + literal
+            if field is not None:
+                filled = filled + values[field](selected)
+        texts[selected] = filled
+    return lines
+
+
+def _generate_block(rng, block_start, block_end, wanted, period, call_date, tables, render, records):
+    """Generate the calls of one block whose id is in the wanted range, in call_id order
+
+    The block's random stream holds each plan's calls one after another,
+    in order of the plan's first call, and each call's draws as one row of
+    a fixed length, so a call's content depends only on the seed and its
+    place in the block. Rows of calls outside the wanted range are skipped
+    over without being drawn. Yields (text transcript or None, metadata,
+    CallRecord or None) per call: the transcript with render=True, the
+    record with records=True.
+    """
+    lo, hi = wanted
+    num_rows = hi - lo
+    num_participants = np.empty(num_rows, dtype=np.int64)
+    roles, first, last = (np.empty((num_rows, MAX_PARTICIPANTS), dtype=np.int64) for _ in range(3))
+    company = np.empty(num_rows, dtype=np.int64)
+    concerns, use_cases, verticals, call_types = (np.empty(num_rows, dtype=object) for _ in range(4))
+    line_counts = np.empty(num_rows, dtype=np.int64)
+    durations = np.empty(num_rows, dtype=np.int64)
+
+    # call_plan() repeats every `period` call_ids, so each plan's calls are a strided run
+    plans = []
+    position = offset = 0
+    for first_id in range(block_start, min(block_start + period, block_end)):
+        vertical, archetype = call_plan(first_id)
+        per_call = tables.draws_per_call(vertical, archetype)
+        first_row = max(0, -((first_id - lo) // period))
+        end_row = max(first_row, -((first_id - hi) // period))
+        if end_row > first_row:
+            rng.bit_generator.advance(offset + first_row * per_call - position)
+            draws = rng.random((end_row - first_row, per_call)).T.copy()
+            position = offset + end_row * per_call
+            plan = _LinePlan(draws, end_row - first_row)
+            header = _plan_calls(plan, vertical, archetype)
+
+            # Scatter the plan's calls into their places in call_id order
+            rows = first_id - lo + period * np.arange(first_row, end_row)
+            num_participants[rows] = plan.num_participants
+            roles[rows] = header["roles"].T
+            first[rows] = header["first"].T
+            last[rows] = header["last"].T
+            company[rows] = header["company"]
+            concerns[rows] = tables.concerns[vertical][header["concern"]]
+            use_cases[rows] = tables.use_cases[vertical][header["use_case"]]
+            verticals[rows] = vertical
+            call_types[rows] = archetype
+            counts, times, speakers, phrase_ids, plan_durations = plan.lines()
+            line_counts[rows] = counts
+            durations[rows] = plan_durations
+            plans.append((rows, counts, times, speakers, phrase_ids))
+        offset += len(range(first_id, block_end, period)) * per_call
+
+    # Lay every call's lines out contiguously, in call_id order
+    bounds = np.concatenate(([0], np.cumsum(line_counts)))
+    num_lines = int(bounds[-1])
+    flat_times = np.empty(num_lines, dtype=np.uint32)
+    flat_speakers = np.empty(num_lines, dtype=np.uint8)
+    flat_ids = np.empty(num_lines, dtype=np.uint16)
+    for rows, counts, times, speakers, phrase_ids in plans:
+        plan_bounds = np.concatenate(([0], np.cumsum(counts)))
+        lines = np.repeat(bounds[rows] - plan_bounds[:-1], counts) + np.arange(len(times))
+        flat_times[lines] = times
+        flat_speakers[lines] = speakers
+        flat_ids[lines] = phrase_ids
+    line_rows = np.repeat(np.arange(num_rows), line_counts)
+    tables.up_to(int(durations.max()))
+
+    # Look the template text up by fancy-indexing the phrase bank, then fill
+    # the slots; transcripts alone can take the text with its blank line
+    line_end = "" if records else "\n\n"
+    texts = (tables.templates if records else tables.line_texts)[flat_ids]
+    # (calls, MAX_PARTICIPANTS) names; columns past a call's participant count are never used
+    names = tables.first_names[first] + " " + tables.last_names[last]
+    role_names = tables.roles[roles]
+    participants = names + " (" + role_names + ")"
+    companies = tables.companies[company]
+    slotted = _fill_slots(tables, texts, flat_ids, {
+        "name": lambda lines: names[line_rows[lines], flat_speakers[lines]],
+        "role": lambda lines: role_names[line_rows[lines], flat_speakers[lines]],
+        "company": lambda lines: companies[line_rows[lines]],
+        "host_name": lambda lines: names[line_rows[lines], 0],
+        "concern": lambda lines: concerns[line_rows[lines]],
+        "use_case": lambda lines: use_cases[line_rows[lines]],
+    }, line_end)
+
+    if render:
+        # Three pieces per line, "[MM:SS] ", "Name (Role):\n" and the text
+        # with its blank line, with each call's header ahead of its first
+        # timestamp; a call's transcript is the join of its lines' pieces
+        titles = {archetype: archetype.replace("_", " ").title() for archetype in CALL_ARCHETYPES}
+        headers = (f"{BANNER}\nCALL #" + np.array([f"{call_id:03d}" for call_id in range(lo, hi)], dtype=object)
+                   + " - " + companies + " (" + verticals + f")\nDate: {call_date}\nDuration: ~"
+                   + np.array([str(minutes) for minutes in (durations // 60).tolist()], dtype=object)
+                   + " minutes\nParticipants: " + tables.numbers[num_participants]
+                   + "\nCall Type: " + np.array([titles[call_type] for call_type in call_types], dtype=object)
+                   + f"\n{BANNER}\n\n")
+        pieces = np.empty((num_lines, 3), dtype=object)
+        pieces[:, 0] = tables.timestamps[flat_times]
+        pieces[bounds[:-1], 0] = headers + pieces[bounds[:-1], 0]
+        pieces[:, 1] = (participants + ":\n")[line_rows, flat_speakers]
+        if records:
+            pieces[:, 2] = tables.line_texts[flat_ids]
+            pieces[slotted, 2] = texts[slotted] + "\n\n"
+        else:
+            pieces[:, 2] = texts
+        pieces = pieces.ravel().tolist()
+        piece_bounds = (3 * bounds).tolist()
+
+    if records:
+        texts = texts.tolist()
+        bounds = bounds.tolist()
+    durations = durations.tolist()
+    minutes = tables.minutes
+    # Each call's participants as a run of one flat list
+    participants = participants[np.arange(MAX_PARTICIPANTS) < num_participants[:, None]].tolist()
+    participant_bounds = np.concatenate(([0], np.cumsum(num_participants))).tolist()
+    companies = companies.tolist()
+    verticals = verticals.tolist()
+    call_types = call_types.tolist()
+    for i, call_id in enumerate(range(lo, hi)):
+        call_participants = participants[participant_bounds[i]:participant_bounds[i + 1]]
+        duration = durations[i]
+        # Same keys and order as CallRecord.metadata()
+        metadata = {
+            "call_id": call_id,
+            "company": companies[i],
+            "vertical": verticals[i],
+            "call_type": call_types[i],
+            "participants": call_participants,
+            "duration_seconds": duration,
+            "duration_minutes": minutes[duration]
+        }
+        call = None
+        if records:
+            start, end = bounds[i], bounds[i + 1]
+            call = CallRecord(call_id, companies[i], verticals[i], call_types[i], call_date, call_participants)
+            call.duration_seconds = duration
+            call.times.frombytes(flat_times[start:end].tobytes())
+            call.speakers.frombytes(flat_speakers[start:end].tobytes())
+            call.texts = texts[start:end]
+            call.phrase_ids.frombytes(flat_ids[start:end].tobytes())
+        yield ("".join(pieces[piece_bounds[i]:piece_bounds[i + 1]]) if render else None), metadata, call
+
+
+def _generate_blocks(start_id, num_calls, seed, call_date, block_size, render, records):
+    if call_date is None:
+        call_date = datetime.now().strftime('%Y-%m-%d')
+    end_id = start_id + num_calls
+    first_block = (start_id - 1) // block_size * block_size + 1
+    tables = _Tables()
+    period = math.lcm(len(ACTIVE_VERTICALS), len(CALL_ARCHETYPES))
+
+    for block_start in range(first_block, end_id, block_size):
+        rng = np.random.default_rng(None if seed is None else [seed, block_start])
+        block_end = block_start + block_size
+        wanted = (max(block_start, start_id), min(block_end, end_id))
+        yield from _generate_block(rng, block_start, block_end, wanted, period, call_date, tables, render, records)
+
+
+def generate_batch(start_id, num_calls, seed=None, call_date=None, block_size=DEFAULT_BLOCK_SIZE):
+    """Yield CallRecords for calls start_id..start_id+num_calls-1 in call_id order
+
+    Verticals and archetypes rotate by call_id exactly as in the per-call
+    path. Blocks are aligned to call_id 1 and each is seeded from (seed,
+    block start), so a call's content depends only on the seed and block
+    size; only the calls in start_id..end are drawn and assembled, so a
+    short run or the tail of a long one costs no more than its own calls.
+    """
+    for _, _, call in _generate_blocks(start_id, num_calls, seed, call_date, block_size,
+                                       render=False, records=True):
+        yield call
+
+
+def generate_rendered_batch(start_id, num_calls, seed=None, call_date=None, records=False,
+                            block_size=DEFAULT_BLOCK_SIZE):
+    """Like generate_batch(), but yields (text transcript, metadata) per call, plus the CallRecord with records=True
+
+    The transcripts are byte-identical to render_text(call) and the
+    metadata to call.metadata(), but both are built for a whole block of
+    calls at once; without records=True no CallRecord is built at all.
+    """
+    for text, metadata, call in _generate_blocks(start_id, num_calls, seed, call_date, block_size,
+                                                 render=True, records=records):
+        yield (text, metadata, call) if records else (text, metadata)
@@ -0,0 +1,254 @@
+"""Benchmark and regression suite for the call generator.
+
+Measures:
+  - generate_call() for each archetype
+  - each generate_* segment function in isolation
+  - end-to-end generate_fake_calls.py runs at several corpus sizes, each in a
+    fresh process so its peak RSS can be measured
+
+and reports calls/sec, output MB/sec, per-call latency percentiles and peak
+RSS. Results are written as JSON; pass --baseline to compare against a saved
+run and exit non-zero when any throughput drops by more than --threshold.
+
+Usage:
+    python benchmark.py --save baseline.json
+    python benchmark.py --baseline baseline.json --threshold 0.10
+    python benchmark.py --sizes 1000,100000 --iterations 500
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+from generate_fake_calls import (
+    CALL_ARCHETYPES, PARTICIPANT_ROLES, VERTICALS, call_rng,
+    generate_architecture_segment, generate_call, generate_closing,
+    generate_opening, generate_participant_name, generate_problem_segment,
+    generate_requirements_segment,
+)
+from stats_util import percentile
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+GENERATOR = os.path.join(HERE, "generate_fake_calls.py")
+
+DEFAULT_SIZES = "1000,100000,1000000"
+DEFAULT_ITERATIONS = 2000
+DEFAULT_THRESHOLD = 0.10
+# How often a child's memory is sampled where os.wait4 isn't available
+RSS_POLL_SECONDS = 0.05
+SEED = 1234
+
+
+def summarize(latencies_ns, output_bytes=0):
+    """Throughput and latency stats for a list of per-call timings"""
+    total_s = sum(latencies_ns) / 1e9
+    latencies_us = sorted(ns / 1000 for ns in latencies_ns)
+    return {
+        "calls": len(latencies_ns),
+        "calls_per_sec": round(len(latencies_ns) / total_s, 1) if total_s else 0.0,
+        "mb_per_sec": round(output_bytes / 1e6 / total_s, 2) if total_s else 0.0,
+        "latency_us": {
+            "p50": round(percentile(latencies_us, 50), 1),
+            "p90": round(percentile(latencies_us, 90), 1),
+            "p99": round(percentile(latencies_us, 99), 1),
+            "max": round(latencies_us[-1], 1) if latencies_us else 0.0,
+        },
+    }
+
+
+def bench_archetypes(iterations):
+    """generate_call() per archetype, rotating through the verticals"""
+    verticals = list(VERTICALS)
+    results = {}
+    for archetype in CALL_ARCHETYPES:
+        latencies = []
+        output_bytes = 0
+        for i in range(iterations):
+            rng = call_rng(SEED, i)
+            vertical = verticals[i % len(verticals)]
+            start = time.perf_counter_ns()
+            transcript, _ = generate_call(i + 1, vertical, archetype, rng=rng, call_date="2026-01-01")
+            latencies.append(time.perf_counter_ns() - start)
+            output_bytes += len(transcript.encode("utf-8"))
+        results[archetype] = summarize(latencies, output_bytes)
+    return results
+
+
+def bench_segments(iterations):
+    """Each segment generator in isolation, with fixed participants per iteration"""
+    verticals = list(VERTICALS)
+    segments = {
+        "generate_opening": lambda p, v, rng: generate_opening(p, "Acme Corp", v, rng=rng),
+        "generate_problem_segment": lambda p, v, rng: generate_problem_segment(p, v, 0, rng=rng),
+        "generate_requirements_segment": lambda p, v, rng: generate_requirements_segment(p, v, 0, rng=rng),
+        "generate_architecture_segment": lambda p, v, rng: generate_architecture_segment(p, v, 0, rng=rng),
+        "generate_closing": lambda p, v, rng: generate_closing(p, 0, rng=rng),
+    }
+    results = {}
+    for name, segment in segments.items():
+        latencies = []
+        for i in range(iterations):
+            rng = call_rng(SEED, i)
+            participants = [generate_participant_name(role, rng=rng)
+                            for role in rng.sample(PARTICIPANT_ROLES, rng.randint(3, 5))]
+            vertical = verticals[i % len(verticals)]
+            start = time.perf_counter_ns()
+            segment(participants, vertical, rng)
+            latencies.append(time.perf_counter_ns() - start)
+        results[name] = summarize(latencies)
+    return results
+
+
+def wait_peak_rss(proc):
+    """Wait for a child process; returns (exit code, peak RSS in MB)
+
+    Uses os.wait4's rusage on POSIX. Elsewhere (Windows) the child's memory
+    is sampled with psutil while it runs, which needs psutil installed.
+    """
+    if hasattr(os, "wait4"):
+        _, status, usage = os.wait4(proc.pid, 0)
+        proc.returncode = os.waitstatus_to_exitcode(status)
+        # ru_maxrss is KiB on Linux, bytes on macOS
+        peak_kb = usage.ru_maxrss // 1024 if sys.platform == "darwin" else usage.ru_maxrss
+        return proc.returncode, peak_kb / 1024
+    try:
+        import psutil
+    except ImportError:
+        proc.kill()
+        proc.wait()
+        raise SystemExit("Error: measuring peak RSS needs os.wait4 (POSIX only) or psutil; pip install psutil")
+    child = psutil.Process(proc.pid)
+    peak = 0
+    while proc.poll() is None:
+        try:
+            info = child.memory_info()
+        except psutil.Error:
+            break
+        # peak_wset is the Windows peak working set; other platforms only report current rss
+        peak = max(peak, getattr(info, "peak_wset", info.rss))
+        time.sleep(RSS_POLL_SECONDS)
+    return proc.wait(), peak / 1024 / 1024
+
+
+def bench_end_to_end(num_calls, extra_args=()):
+    """Run generate_fake_calls.py in a child process; returns throughput and peak RSS"""
+    with tempfile.TemporaryDirectory() as tmp:
+        output = os.path.join(tmp, "calls.txt")
+        cmd = [sys.executable, GENERATOR, "--calls", str(num_calls), "--stream", "--quiet",
+               "--seed", str(SEED), "--output", output,
+               "--metadata", os.path.join(tmp, "calls.jsonl"), *extra_args]
+        start = time.perf_counter()
+        proc = subprocess.Popen(cmd, cwd=tmp, stdout=subprocess.DEVNULL)
+        exit_code, peak_rss_mb = wait_peak_rss(proc)
+        elapsed = time.perf_counter() - start
+        if exit_code != 0:
+            raise RuntimeError(f"{' '.join(cmd)} exited with {exit_code}")
+        output_bytes = os.path.getsize(output)
+
+    return {
+        "calls": num_calls,
+        "seconds": round(elapsed, 3),
+        "calls_per_sec": round(num_calls / elapsed, 1),
+        "mb_per_sec": round(output_bytes / 1e6 / elapsed, 2),
+        "output_mb": round(output_bytes / 1e6, 2),
+        "peak_rss_mb": round(peak_rss_mb, 1),
+    }
+
+
+def run(sizes, iterations, extra_args=()):
+    return {
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "generate_call": bench_archetypes(iterations),
+        "segments": bench_segments(iterations),
+        "end_to_end": {str(size): bench_end_to_end(size, extra_args) for size in sizes},
+    }
+
+
+def throughputs(results):
+    """Flatten a results dict into {benchmark name: calls/sec}"""
+    flat = {}
+    for group in ("generate_call", "segments", "end_to_end"):
+        for name, stats in results.get(group, {}).items():
+            flat[f"{group}.{name}"] = stats["calls_per_sec"]
+    return flat
+
+
+def compare(results, baseline, threshold):
+    """List of (name, baseline, current, change) for every benchmark slower than threshold"""
+    current = throughputs(results)
+    regressions = []
+    for name, before in throughputs(baseline).items():
+        after = current.get(name)
+        if after is None or not before:
+            continue
+        change = (after - before) / before
+        if change < -threshold:
+            regressions.append((name, before, after, change))
+    return regressions
+
+
+def print_report(results):
+    print("generate_call() per archetype:")
+    for name, stats in results["generate_call"].items():
+        lat = stats["latency_us"]
+        print(f"  {name:<24} {stats['calls_per_sec']:>10.1f} calls/s {stats['mb_per_sec']:>7.2f} MB/s  "
+              f"p50 {lat['p50']:.0f}us  p99 {lat['p99']:.0f}us")
+
+    print("\nSegments:")
+    for name, stats in results["segments"].items():
+        lat = stats["latency_us"]
+        print(f"  {name:<32} {stats['calls_per_sec']:>10.1f} /s  p50 {lat['p50']:.0f}us  p99 {lat['p99']:.0f}us")
+
+    print("\nEnd to end:")
+    for size, stats in results["end_to_end"].items():
+        print(f"  {int(size):>9,} calls  {stats['seconds']:>8.2f}s  {stats['calls_per_sec']:>10.1f} calls/s  "
+              f"{stats['mb_per_sec']:>7.2f} MB/s  peak RSS {stats['peak_rss_mb']:.1f} MB")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the fake call generator")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES,
+                        help=f"comma-separated end-to-end corpus sizes (default: {DEFAULT_SIZES})")
+    parser.add_argument("--iterations", type=int, default=DEFAULT_ITERATIONS,
+                        help=f"calls per micro-benchmark (default: {DEFAULT_ITERATIONS})")
+    parser.add_argument("--save", default=None, help="write results JSON to this file")
+    parser.add_argument("--baseline", default=None, help="compare against a saved results JSON")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help=f"allowed fractional throughput drop before failing (default: {DEFAULT_THRESHOLD})")
+    parser.add_argument("--generator-args", default="",
+                        help="extra arguments for the end-to-end runs, e.g. \"--engine numpy\"")
+    args = parser.parse_args(argv)
+
+    sizes = [int(size) for size in args.sizes.split(",") if size]
+    results = run(sizes, args.iterations, args.generator_args.split())
+    print_report(results)
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"\n✓ Results saved to: {args.save}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n✗ {len(regressions)} regression(s) beyond {args.threshold:.0%}:")
+            for name, before, after, change in regressions:
+                print(f"  {name}: {before:.1f} -> {after:.1f} calls/s ({change:+.1%})")
+            return 1
+        print(f"\n✓ No regressions beyond {args.threshold:.0%} against {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,212 @@
+"""Content-addressed cache of generated calls.
+
+A call is a pure function of its seed, call_id, vertical, archetype, date,
+output format, engine and size target, and of the content it is drawn
+from. The cache key is a SHA-256 over all of them, with the content reduced
+to a per-vertical fingerprint (generate_fake_calls.content_fingerprint):
+the shared phrase pools and name lists plus that vertical's own pools, or
+the dialogue model file. Editing one vertical's pools therefore only misses
+for that vertical's calls; everything else is streamed back already
+rendered.
+
+Entries live in one SQLite file:
+
+    entries(key, size, checksum, last_used, data)
+
+data is the rendered call, its metadata and CallRecord.state(), marshalled
+(the record separately, so it is only decoded for callers that need it),
+and checksum its SHA-256, checked on every read; an entry that fails the
+check is deleted and regenerated. Entries aren't compressed: zlib costs
+about a third of generating the call to undo, and a hit should cost as
+little as possible. When the cache grows
+past its size limit the least recently used entries are evicted down to
+EVICT_TO of the limit.
+
+Usage:
+    python generate_fake_calls.py --calls 100000 --seed 42 --stream --quiet --cache calls.cache
+    python call_cache.py calls.cache                 # entries and size
+    python call_cache.py calls.cache --verify        # check every checksum
+    python call_cache.py calls.cache --max-size 200  # evict down to 200 MB
+"""
+import argparse
+import hashlib
+import json
+import marshal
+import sqlite3
+import time
+
+from call_record import CallRecord
+
+# Stored in PRAGMA user_version; a cache written in another layout is cleared on open
+CACHE_VERSION = 1
+DEFAULT_MAX_MB = 1024
+# Fraction of the size limit eviction frees the cache down to, so it doesn't evict on every put
+EVICT_TO = 0.9
+# Puts per transaction
+COMMIT_EVERY = 500
+
+SCHEMA = """
+-- A rowid table with the blob last: entries are large, and lookups of
+-- size or last_used then don't have to read through it
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT NOT NULL UNIQUE,
+    size INTEGER NOT NULL,
+    checksum TEXT NOT NULL,
+    last_used REAL NOT NULL,
+    data BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_entries_last_used ON entries (last_used);
+"""
+
+
+def entry_key(*parts):
+    """Hex SHA-256 of the JSON-serializable parts a cached call is generated from"""
+    return hashlib.sha256(json.dumps(parts, separators=(",", ":")).encode("utf-8")).hexdigest()
+
+
+class CallCache:
+    """Rendered calls keyed by entry_key(), with LRU eviction past max_bytes"""
+
+    def __init__(self, path, max_bytes=DEFAULT_MAX_MB * 1_000_000):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.db = sqlite3.connect(path)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        if self.db.execute("PRAGMA user_version").fetchone()[0] != CACHE_VERSION:
+            self.db.execute("DROP TABLE IF EXISTS entries")
+            self.db.execute(f"PRAGMA user_version={CACHE_VERSION}")
+        self.db.executescript(SCHEMA)
+        self.total_bytes = self.db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        self.hits = 0
+        self.misses = 0
+        self.corrupt = 0
+        self.evicted = 0
+        # key -> time of last hit, written in batches with the puts
+        self._touched = {}
+        self._puts = 0
+
+    def get(self, key, records=False):
+        """(rendered, metadata) for a cached call, plus its CallRecord with records=True; None on a miss"""
+        row = self.db.execute("SELECT CAST(data AS BLOB), checksum FROM entries WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        data, checksum = row
+        try:
+            if hashlib.sha256(data).hexdigest() != checksum:
+                raise ValueError("checksum mismatch")
+            rendered, metadata, state = marshal.loads(data)
+            result = (rendered, metadata, CallRecord.from_state(marshal.loads(state))) if records else (rendered, metadata)
+        except (ValueError, EOFError, TypeError):
+            self._drop(key)
+            self.corrupt += 1
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._touched[key] = time.time()
+        return result
+
+    def put(self, key, rendered, call):
+        """Store a generated call (its rendering and CallRecord) under key"""
+        data = marshal.dumps((rendered, call.metadata(), marshal.dumps(call.state())))
+        old = self.db.execute("SELECT size FROM entries WHERE key = ?", (key,)).fetchone()
+        self.db.execute("INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?)",
+                        (key, len(data), hashlib.sha256(data).hexdigest(), time.time(), data))
+        self.total_bytes += len(data) - (old[0] if old else 0)
+        self._puts += 1
+        if self.total_bytes > self.max_bytes:
+            self.evict()
+        elif self._puts % COMMIT_EVERY == 0:
+            self.flush()
+
+    def _drop(self, key):
+        row = self.db.execute("SELECT size FROM entries WHERE key = ?", (key,)).fetchone()
+        if row is not None:
+            self.db.execute("DELETE FROM entries WHERE key = ?", (key,))
+            self.total_bytes -= row[0]
+
+    def flush(self):
+        """Record pending hit times and commit"""
+        if self._touched:
+            self.db.executemany("UPDATE entries SET last_used = ? WHERE key = ?",
+                                [(when, key) for key, when in self._touched.items()])
+            self._touched.clear()
+        self.db.commit()
+
+    def evict(self, goal=None):
+        """Delete least recently used entries down to goal bytes; returns how many were deleted
+
+        goal defaults to EVICT_TO of max_bytes.
+        """
+        self.flush()
+        if goal is None:
+            goal = self.max_bytes * EVICT_TO
+        rows = self.db.execute("SELECT key, size FROM entries ORDER BY last_used")
+        doomed = []
+        total = self.total_bytes
+        for key, size in rows:
+            if total <= goal:
+                break
+            doomed.append((key,))
+            total -= size
+        rows.close()
+        self.db.executemany("DELETE FROM entries WHERE key = ?", doomed)
+        self.db.commit()
+        self.total_bytes = total
+        self.evicted += len(doomed)
+        return len(doomed)
+
+    def verify(self):
+        """Check every entry's checksum, deleting the ones that fail; returns (entries checked, deleted)"""
+        checked = 0
+        bad = []
+        for key, data, checksum in self.db.execute("SELECT key, CAST(data AS BLOB), checksum FROM entries"):
+            checked += 1
+            if hashlib.sha256(data).hexdigest() != checksum:
+                bad.append(key)
+        for key in bad:
+            self._drop(key)
+        self.db.commit()
+        return checked, len(bad)
+
+    def __len__(self):
+        return self.db.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def close(self):
+        self.flush()
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inspect, verify or shrink a generated-call cache")
+    parser.add_argument("cache", help="cache file written by generate_fake_calls.py --cache")
+    parser.add_argument("--verify", action="store_true", help="check every entry's checksum, deleting bad ones")
+    parser.add_argument("--max-size", type=float, default=None, metavar="MB",
+                        help="evict least recently used entries down to this size")
+    parser.add_argument("--clear", action="store_true", help="delete every entry")
+    args = parser.parse_args(argv)
+
+    with CallCache(args.cache) as cache:
+        if args.clear:
+            cache.db.execute("DELETE FROM entries")
+            cache.db.commit()
+            cache.total_bytes = 0
+            print(f"✓ Cleared {args.cache}")
+        if args.verify:
+            checked, bad = cache.verify()
+            print(f"✓ Verified {checked} entries: {bad} failed their checksum and were deleted")
+        if args.max_size is not None:
+            evicted = cache.evict(args.max_size * 1_000_000)
+            print(f"✓ Evicted {evicted} least recently used entries")
+        print(f"✓ {len(cache)} entries, {cache.total_bytes / 1e6:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
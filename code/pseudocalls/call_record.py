@@ -0,0 +1,141 @@
+"""Structured representation of a generated call and its renderers.
+
+A CallRecord keeps the dialogue as parallel arrays (time, speaker index,
+text, phrase bank id) instead of a rendered string, so long calls stay compact and can be
+serialized to any format without going through the text transcript first.
+"""
+import json
+from array import array
+
+from phrase_bank import NO_PHRASE
+
+BANNER = "=" * 80
+# Rough characters per token of English text for BPE tokenizers
+CHARS_PER_TOKEN = 4
+
+
+class CallRecord:
+    """One generated call: header fields plus parallel utterance arrays"""
+
+    __slots__ = ("call_id", "company", "vertical", "call_type", "call_date",
+                 "participants", "duration_seconds", "times", "speakers", "texts", "phrase_ids")
+
+    def __init__(self, call_id, company, vertical, call_type, call_date, participants):
+        self.call_id = call_id
+        self.company = company
+        self.vertical = vertical
+        self.call_type = call_type
+        self.call_date = call_date
+        self.participants = participants
+        self.duration_seconds = 0
+        self.times = array("I")
+        self.speakers = array("B")
+        self.texts = []
+        # Id of the phrase_bank template each line was filled from
+        self.phrase_ids = array("H")
+
+    @classmethod
+    def from_lines(cls, call_id, company, vertical, call_type, call_date, participants, lines, duration_seconds):
+        """Build a record from the (time, speaker, text, phrase_id) tuples the segment generators produce"""
+        record = cls(call_id, company, vertical, call_type, call_date, participants)
+        speaker_index = {p: i for i, p in enumerate(participants)}
+        for time_sec, speaker, text, phrase_id in lines:
+            record.times.append(time_sec)
+            record.speakers.append(speaker_index[speaker])
+            record.texts.append(text)
+            record.phrase_ids.append(phrase_id)
+        record.duration_seconds = duration_seconds
+        return record
+
+    def state(self):
+        """The record as a tuple of plain values marshal can store; see from_state()"""
+        return (self.call_id, self.company, self.vertical, self.call_type, self.call_date, self.participants,
+                self.duration_seconds, self.times.tobytes(), self.speakers.tobytes(), self.texts,
+                self.phrase_ids.tobytes())
+
+    @classmethod
+    def from_state(cls, state):
+        """Rebuild a record from state()"""
+        (call_id, company, vertical, call_type, call_date, participants,
+         duration_seconds, times, speakers, texts, phrase_ids) = state
+        record = cls(call_id, company, vertical, call_type, call_date, participants)
+        record.duration_seconds = duration_seconds
+        record.times.frombytes(times)
+        record.speakers.frombytes(speakers)
+        record.texts = texts
+        record.phrase_ids.frombytes(phrase_ids)
+        return record
+
+    def __len__(self):
+        return len(self.texts)
+
+    def lines(self):
+        """Iterate (time_sec, speaker, text) tuples"""
+        participants = self.participants
+        for time_sec, speaker, text in zip(self.times, self.speakers, self.texts):
+            yield time_sec, participants[speaker], text
+
+    def metadata(self):
+        """Metadata dict in the calls_metadata format"""
+        return {
+            "call_id": self.call_id,
+            "company": self.company,
+            "vertical": self.vertical,
+            "call_type": self.call_type,
+            "participants": self.participants,
+            "duration_seconds": self.duration_seconds,
+            "duration_minutes": round(self.duration_seconds / 60, 1)
+        }
+
+
+def render_header(call):
+    """The ===== banner block that opens every call"""
+    return (
+        f"{BANNER}\n"
+        f"CALL #{call.call_id:03d} - {call.company} ({call.vertical})\n"
+        f"Date: {call.call_date}\n"
+        f"Duration: ~{call.duration_seconds // 60} minutes\n"
+        f"Participants: {len(call.participants)}\n"
+        f"Call Type: {call.call_type.replace('_', ' ').title()}\n"
+        f"{BANNER}\n\n"
+    )
+
+
+def render_text(call):
+    """Render a call in the fake_customer_calls transcript format"""
+    participants = call.participants
+    parts = [render_header(call)]
+    for time_sec, speaker, text in zip(call.times, call.speakers, call.texts):
+        parts.append(f"[{time_sec // 60:02d}:{time_sec % 60:02d}] {participants[speaker]}:\n{text}\n\n")
+    return "".join(parts)
+
+
+def rendered_line_size(time_sec, speaker, text):
+    """Characters render_text() spends on one utterance, computed without rendering it"""
+    # "[MM:SS] " + ":\n" + "\n\n"; minutes widen past 99
+    return max(2, len(str(time_sec // 60))) + 10 + len(speaker) + len(text)
+
+
+def render_json(call):
+    """Render a call as a single-line JSON object: metadata plus utterances"""
+    doc = call.metadata()
+    doc["date"] = call.call_date
+    doc["utterances"] = [
+        {"time_sec": time_sec, "speaker": speaker, "text": text,
+         "phrase_id": None if phrase_id == NO_PHRASE else phrase_id}
+        for time_sec, speaker, text, phrase_id in zip(call.times, call.speakers, call.texts, call.phrase_ids)
+    ]
+    return json.dumps(doc, ensure_ascii=False)
+
+
+# Output format name -> (renderer, separator written after each call)
+FORMATS = {
+    "text": (render_text, "\n\n"),
+    "json": (render_json, "\n"),
+}
+
+
+def write_call(call, out, fmt="text"):
+    """Render a call and write it (plus its separator) with a single write"""
+    render, separator = FORMATS[fmt]
+    out.write(render(call) + separator)
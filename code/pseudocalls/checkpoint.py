@@ -0,0 +1,78 @@
+"""Checkpoints for resumable corpus generation.
+
+Every call is generated from (seed, call_id) alone, so the whole RNG state
+of a run is its seed plus the next call_id to generate. A checkpoint
+records that along with the other settings that shape the output, and the
+transcript byte offset that was durably on disk at that point:
+
+    {"version": 1, "seed": 42, "date": "2026-02-11", "format": "text",
+     "engine": "random", "content_packs": [], "verticals": null,
+     "dedup": null, "dedup_mode": "regenerate", "model": null, "target": null,
+     "next_call_id": 800001, "output_bytes": 7612345678}
+
+Checkpoints are written with write-to-temp, fsync, rename, so a crash
+leaves either the previous checkpoint or the new one, never a torn file.
+"""
+import json
+import os
+
+CHECKPOINT_VERSION = 1
+
+
+def checkpoint_path_for(output_file):
+    """fake_customer_calls_2.txt -> fake_customer_calls_2.checkpoint.json"""
+    stem, _ = os.path.splitext(output_file)
+    return stem + ".checkpoint.json"
+
+
+def sync(f):
+    """Flush a file object all the way to disk"""
+    f.flush()
+    os.fsync(f.fileno())
+
+
+def save_checkpoint(path, state):
+    """Atomically replace the checkpoint at path"""
+    state = dict(state, version=CHECKPOINT_VERSION)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=2)
+        sync(f)
+    os.replace(tmp_path, path)
+
+
+def load_checkpoint(path):
+    """The checkpoint at path, or None if there isn't a usable one"""
+    try:
+        with open(path, encoding="utf-8") as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if state.get("version") != CHECKPOINT_VERSION:
+        return None
+    return state
+
+
+def truncate(path, size):
+    """Cut a file back to size bytes, discarding anything written after a checkpoint"""
+    with open(path, "r+b") as f:
+        f.truncate(size)
+
+
+def iter_jsonl(path):
+    """Yield (record, end_offset) for each complete, parseable line of a JSON Lines file
+
+    Stops at the first torn or unparseable line, so the last end_offset is
+    where a clean append can resume.
+    """
+    offset = 0
+    with open(path, "rb") as f:
+        for line in f:
+            if not line.endswith(b"\n"):
+                return
+            try:
+                record = json.loads(line)
+            except ValueError:
+                return
+            offset += len(line)
+            yield record, offset
@@ -0,0 +1,189 @@
+"""Streaming transcript chunker for agent ingestion.
+
+Splits calls into overlapping windows of whole utterances, bounded by any
+combination of time span, utterance count and approximate tokens:
+
+    - a window grows utterance by utterance until the next one would break a
+      bound; an utterance that breaks one on its own is a window by itself,
+      so utterances are never split
+    - each window after the first starts with the last `overlap` utterances
+      of the one before it
+    - every chunk carries its call's header fields
+
+Corpora are scanned call by call straight off the memory-mapped file
+(transcript_reader.iter_call_spans), and a chunk's text is a memoryview
+slice of the mapping, so nothing is copied until a consumer decodes it and
+memory stays flat however large the corpus is. Compressed shards are
+decompressed one shard at a time. The generator's line tuples (append_line,
+CallRecord.lines()) can be chunked the same way with chunk_lines().
+
+Usage:
+    python chunker.py fake_customer_calls_2.txt --max-tokens 2000 --overlap 2 --output chunks.jsonl
+    python chunker.py calls.manifest.json --max-seconds 300 --max-utterances 40
+"""
+import argparse
+import json
+import re
+import sys
+import time
+
+from call_record import CHARS_PER_TOKEN, rendered_line_size
+from search_index import expand_sources, open_source
+from transcript_reader import iter_call_spans
+
+DEFAULT_OVERLAP = 1
+# transcript_reader.UTTERANCE_RE with the preceding newline as a literal
+# prefix the regex engine can skip ahead to, and no groups, so a match
+# allocates nothing; timestamps are parsed only where needed (_time_at)
+LINE_START_RE = re.compile(rb"\n\[\d+:\d\d\] [^\r\n]+:\r?\n")
+
+
+def windows(times, sizes, max_seconds=None, max_utterances=None, max_tokens=None, overlap=DEFAULT_OVERLAP):
+    """(first, end) utterance ranges of the windows over one call
+
+    times are the utterances' start times (only needed with max_seconds)
+    and sizes their lengths in characters; a window holds utterances
+    starting less than max_seconds after its first one, at most
+    max_utterances of them and at most max_tokens (characters /
+    CHARS_PER_TOKEN).
+    """
+    n = len(sizes)
+    max_chars = max_tokens * CHARS_PER_TOKEN if max_tokens is not None else None
+    first = 0
+    while first < n:
+        end = first + 1
+        chars = sizes[first]
+        while end < n:
+            if max_utterances is not None and end - first >= max_utterances:
+                break
+            if max_seconds is not None and times[end] - times[first] >= max_seconds:
+                break
+            if max_chars is not None and chars + sizes[end] > max_chars:
+                break
+            chars += sizes[end]
+            end += 1
+        yield first, end
+        if end == n:
+            return
+        # Overlap, but always move forward
+        first = max(end - overlap, first + 1)
+
+
+class Chunk:
+    """One window of consecutive utterances from a call"""
+
+    __slots__ = ("header", "seq", "first", "end", "start_sec", "end_sec", "data", "lines")
+
+    def __init__(self, header, seq, first, end, start_sec, end_sec, data=None, lines=None):
+        self.header = header
+        self.seq = seq
+        self.first = first
+        self.end = end
+        self.start_sec = start_sec
+        self.end_sec = end_sec
+        # Transcript bytes (a memoryview into the corpus), or (time, speaker, text, ...) tuples
+        self.data = data
+        self.lines = lines
+
+    @property
+    def text(self):
+        """The chunk's utterances in the transcript format"""
+        if self.data is not None:
+            return str(self.data, "utf-8")
+        return "".join(f"[{t // 60:02d}:{t % 60:02d}] {speaker}:\n{text}\n\n" for t, speaker, text, *_ in self.lines)
+
+    def __len__(self):
+        return self.end - self.first
+
+    def to_dict(self):
+        doc = dict(self.header)
+        doc.update(chunk=self.seq, first_utterance=self.first, end_utterance=self.end,
+                   start_sec=self.start_sec, end_sec=self.end_sec, text=self.text)
+        return doc
+
+    def __repr__(self):
+        return (f"Chunk(call {self.header.get('call_id')}, #{self.seq}, utterances {self.first}-{self.end}, "
+                f"{self.start_sec}-{self.end_sec}s)")
+
+
+def _time_at(buf, pos):
+    """Seconds of the [MM:SS] timestamp at pos"""
+    minutes, _, seconds = buf[pos + 1:buf.find(b"]", pos)].partition(b":")
+    return int(minutes) * 60 + int(seconds)
+
+
+def chunk_buffer(buf, **bounds):
+    """Chunks for every call in a transcript corpus buffer, in file order"""
+    view = memoryview(buf)
+    for _, header_end, end, header in iter_call_spans(buf):
+        # Searching the buffer between offsets avoids copying the call out of it
+        starts = [match.start() + 1 for match in LINE_START_RE.finditer(buf, header_end, end)]
+        times = [_time_at(buf, pos) for pos in starts] if bounds.get("max_seconds") is not None else None
+        # The last utterance ends with one blank line, not the gap before the next call
+        tail = end
+        while tail > header_end and buf[tail - 1] in b"\r\n":
+            tail -= 1
+        starts.append(min(end, tail + (4 if buf[tail:tail + 1] == b"\r" else 2)))
+        sizes = [b - a for a, b in zip(starts, starts[1:])]
+        for seq, (first, last) in enumerate(windows(times, sizes, **bounds)):
+            if times is None:
+                start_sec, end_sec = _time_at(buf, starts[first]), _time_at(buf, starts[last - 1])
+            else:
+                start_sec, end_sec = times[first], times[last - 1]
+            yield Chunk(header, seq, first, last, start_sec, end_sec, data=view[starts[first]:starts[last]])
+
+
+def chunk_lines(lines, header, **bounds):
+    """Chunks for one call given as (time_sec, speaker, text, ...) tuples, e.g. from append_line()"""
+    times = [line[0] for line in lines]
+    sizes = [rendered_line_size(line[0], line[1], line[2]) for line in lines]
+    for seq, (first, last) in enumerate(windows(times, sizes, **bounds)):
+        yield Chunk(header, seq, first, last, times[first], times[last - 1], lines=lines[first:last])
+
+
+def chunk_call(call, **bounds):
+    """Chunks for a CallRecord, with its metadata as the header"""
+    header = call.metadata()
+    header["date"] = call.call_date
+    return chunk_lines(list(call.lines()), header, **bounds)
+
+
+def chunk_corpus(paths, **bounds):
+    """Chunks for every call in transcript corpus files, shards or shard manifests"""
+    for path in expand_sources(paths):
+        # Chunks keep the mapping alive; it is released once none refer to it
+        yield from chunk_buffer(open_source(path), **bounds)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Split transcript corpora into overlapping windows of utterances")
+    parser.add_argument("sources", nargs="+", help="transcript corpora, shards or shard manifests")
+    parser.add_argument("--max-seconds", type=int, default=None, help="time span of a window")
+    parser.add_argument("--max-utterances", type=int, default=None, help="utterances in a window")
+    parser.add_argument("--max-tokens", type=int, default=None,
+                        help=f"approximate tokens in a window (characters / {CHARS_PER_TOKEN})")
+    parser.add_argument("--overlap", type=int, default=DEFAULT_OVERLAP,
+                        help=f"utterances repeated from the previous window (default: {DEFAULT_OVERLAP})")
+    parser.add_argument("--output", default="-", help="JSON Lines output file (default: stdout)")
+    args = parser.parse_args(argv)
+    if args.max_seconds is None and args.max_utterances is None and args.max_tokens is None:
+        parser.error("give at least one of --max-seconds, --max-utterances, --max-tokens")
+
+    started = time.perf_counter()
+    out = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    chunks = 0
+    calls = 0
+    with out:
+        for chunk in chunk_corpus(args.sources, max_seconds=args.max_seconds, max_utterances=args.max_utterances,
+                                  max_tokens=args.max_tokens, overlap=args.overlap):
+            out.write(json.dumps(chunk.to_dict(), ensure_ascii=False))
+            out.write("\n")
+            chunks += 1
+            calls += chunk.seq == 0
+    if args.output != "-":
+        print(f"✓ {chunks} chunks from {calls} calls in {time.perf_counter() - started:.1f}s")
+        print(f"✓ Chunks saved to: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
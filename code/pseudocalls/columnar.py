@@ -0,0 +1,341 @@
+"""Columnar binary export of generated calls for analytics.
+
+Calls are written straight from their CallRecords (no rendering or
+parsing) into a directory of flat little-endian column files plus a JSON
+manifest:
+
+    calls.columns/
+        manifest.json               row counts, column dtypes, dictionaries
+        calls.call_id.bin           <u4   one row per call
+        calls.company.bin           <u4   code into dictionaries["company"]
+        calls.vertical.bin          <u2   code into dictionaries["vertical"]
+        calls.call_type.bin         <u2   code into dictionaries["call_type"]
+        calls.call_date.bin         <u2   code into dictionaries["call_date"]
+        calls.duration_seconds.bin  <u4
+        calls.num_participants.bin  u1
+        calls.utterance_offsets.bin <u8   calls + 1 entries: call i's utterances are rows
+                                          offsets[i]:offsets[i + 1] of the utterance columns
+        utterances.call_row.bin     <u4   row of the utterance's call in the calls columns
+        utterances.time_sec.bin     <u4
+        utterances.speaker.bin      <u4   code into dictionaries["speaker"] ("Name (Role)")
+        utterances.role.bin         <u2   code into dictionaries["role"]
+        utterances.phrase_id.bin    <u2   phrase_bank id, 65535 for dialogue model lines
+        utterances.text_offsets.bin <u8   utterances + 1 entries into utterances.text.bin
+        utterances.text.bin         u1    every utterance's UTF-8 text, back to back
+
+ColumnarWriter only needs the standard library and buffers a bounded
+number of rows per column, so a corpus of any size is written in constant
+memory. ColumnarCorpus (needs NumPy) memory-maps every column, so opening
+a corpus costs the same for ten utterances or ten million, and nothing is
+copied or parsed until it is read.
+
+Usage:
+    python generate_fake_calls.py --calls 200000 --stream --quiet --columnar calls.columns
+    python columnar.py calls.columns
+
+    corpus = ColumnarCorpus("calls.columns")
+    minutes = corpus.calls["duration_seconds"] / 60
+    per_vertical = numpy.bincount(corpus.calls["vertical"], weights=minutes)
+    corpus.text(12345)
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from array import array
+from itertools import accumulate, islice
+
+from corpus_db import split_participant
+
+FORMAT_VERSION = 1
+MANIFEST = "manifest.json"
+# Utterance rows buffered before the columns are appended to their files
+FLUSH_UTTERANCES = 1 << 18
+
+# Column -> (array typecode, NumPy dtype)
+COLUMNS = {
+    "calls.call_id": ("I", "<u4"),
+    "calls.company": ("I", "<u4"),
+    "calls.vertical": ("H", "<u2"),
+    "calls.call_type": ("H", "<u2"),
+    "calls.call_date": ("H", "<u2"),
+    "calls.duration_seconds": ("I", "<u4"),
+    "calls.num_participants": ("B", "u1"),
+    "calls.utterance_offsets": ("Q", "<u8"),
+    "utterances.call_row": ("I", "<u4"),
+    "utterances.time_sec": ("I", "<u4"),
+    "utterances.speaker": ("I", "<u4"),
+    "utterances.role": ("H", "<u2"),
+    "utterances.phrase_id": ("H", "<u2"),
+    "utterances.text_offsets": ("Q", "<u8"),
+    "utterances.text": ("B", "u1"),
+}
+# Dictionary-encoded columns and the dictionary each uses
+DICTIONARIES = {
+    "calls.company": "company",
+    "calls.vertical": "vertical",
+    "calls.call_type": "call_type",
+    "calls.call_date": "call_date",
+    "utterances.speaker": "speaker",
+    "utterances.role": "role",
+}
+
+
+class _Dictionary:
+    """Strings in order of first appearance, each coded by its position"""
+
+    def __init__(self):
+        self.values = []
+        self.codes = {}
+
+    def code(self, value):
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+
+class ColumnarWriter:
+    """Append CallRecords to a columnar corpus directory; the manifest is written by close()"""
+
+    def __init__(self, path):
+        if sys.byteorder != "little":
+            raise ValueError("columnar export writes little-endian columns; big-endian hosts aren't supported")
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        # A stale manifest would describe columns that are about to be rewritten
+        if os.path.exists(os.path.join(path, MANIFEST)):
+            os.remove(os.path.join(path, MANIFEST))
+        self.calls = 0
+        self.utterances = 0
+        self.text_bytes = 0
+        self.dictionaries = {name: _Dictionary() for name in DICTIONARIES.values()}
+        self._files = {name: open(os.path.join(path, name + ".bin"), "wb") for name in COLUMNS}
+        self._buffers = {name: array(typecode) for name, (typecode, _) in COLUMNS.items()}
+        self._text = []
+        self._buffered = 0
+        # Offset columns have one more entry than rows: a leading 0
+        self._buffers["calls.utterance_offsets"].append(0)
+        self._buffers["utterances.text_offsets"].append(0)
+
+    def add(self, call):
+        """Append one CallRecord"""
+        buffers = self._buffers
+        dictionaries = self.dictionaries
+        speakers = dictionaries["speaker"]
+        roles = dictionaries["role"]
+        buffers["calls.call_id"].append(call.call_id)
+        buffers["calls.company"].append(dictionaries["company"].code(call.company))
+        buffers["calls.vertical"].append(dictionaries["vertical"].code(call.vertical))
+        buffers["calls.call_type"].append(dictionaries["call_type"].code(call.call_type))
+        buffers["calls.call_date"].append(dictionaries["call_date"].code(call.call_date))
+        buffers["calls.duration_seconds"].append(call.duration_seconds)
+        buffers["calls.num_participants"].append(len(call.participants))
+
+        n = len(call)
+        # Participant index -> global speaker and role codes
+        speaker_codes = [speakers.code(p) for p in call.participants]
+        role_codes = [roles.code(split_participant(p)[1]) for p in call.participants]
+        buffers["utterances.call_row"].extend([self.calls] * n)
+        buffers["utterances.time_sec"].extend(call.times)
+        buffers["utterances.speaker"].extend([speaker_codes[s] for s in call.speakers])
+        buffers["utterances.role"].extend([role_codes[s] for s in call.speakers])
+        buffers["utterances.phrase_id"].extend(call.phrase_ids)
+
+        # Encoding the call's text in one go; an all-ASCII call's byte
+        # offsets are its character offsets
+        data = "".join(call.texts).encode("utf-8")
+        sizes = list(map(len, call.texts))
+        if len(data) != sum(sizes):
+            sizes = [len(text.encode("utf-8")) for text in call.texts]
+        # Each call's first offset is the previous call's end, already written
+        buffers["utterances.text_offsets"].extend(islice(accumulate(sizes, initial=self.text_bytes), 1, None))
+        self._text.append(data)
+        self.text_bytes += len(data)
+
+        self.calls += 1
+        self.utterances += n
+        buffers["calls.utterance_offsets"].append(self.utterances)
+        self._buffered += n
+        if self._buffered >= FLUSH_UTTERANCES:
+            self.flush()
+
+    def flush(self):
+        """Append the buffered rows to the column files"""
+        for name, buffer in self._buffers.items():
+            if name == "utterances.text":
+                self._files[name].write(b"".join(self._text))
+                self._text.clear()
+            elif buffer:
+                buffer.tofile(self._files[name])
+                del buffer[:]
+        self._buffered = 0
+
+    def manifest(self):
+        lengths = {name: self.utterances if name.startswith("utterances.") else self.calls for name in COLUMNS}
+        lengths["calls.utterance_offsets"] = self.calls + 1
+        lengths["utterances.text_offsets"] = self.utterances + 1
+        lengths["utterances.text"] = self.text_bytes
+        return {
+            "version": FORMAT_VERSION,
+            "calls": self.calls,
+            "utterances": self.utterances,
+            "columns": {name: {"file": name + ".bin", "dtype": dtype, "length": lengths[name]}
+                        for name, (_, dtype) in COLUMNS.items()},
+            "dictionaries": {name: dictionary.values for name, dictionary in self.dictionaries.items()},
+        }
+
+    def close(self, complete=True):
+        """Flush and close every column, then write the manifest, which marks the corpus complete
+
+        With complete=False the manifest isn't written, so readers treat the
+        directory as unfinished.
+        """
+        self.flush()
+        for f in self._files.values():
+            f.close()
+        if not complete:
+            return
+        manifest_path = os.path.join(self.path, MANIFEST)
+        with open(manifest_path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(self.manifest(), f, ensure_ascii=False)
+        os.replace(manifest_path + ".tmp", manifest_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        # A corpus cut short by an exception must not look complete
+        self.close(complete=exc_type is None)
+
+
+def write_columnar(calls, path):
+    """Write an iterable of CallRecords as a columnar corpus; returns the manifest"""
+    with ColumnarWriter(path) as writer:
+        for call in calls:
+            writer.add(call)
+    return writer.manifest()
+
+
+class _Table:
+    """Name -> column view for one table ("calls" or "utterances")"""
+
+    def __init__(self, corpus, table):
+        self._corpus = corpus
+        self._prefix = table + "."
+
+    def __getitem__(self, name):
+        return self._corpus.column(self._prefix + name)
+
+    def keys(self):
+        return [name[len(self._prefix):] for name in self._corpus.manifest["columns"] if name.startswith(self._prefix)]
+
+
+class ColumnarCorpus:
+    """A columnar corpus opened with every column memory-mapped as a read-only NumPy array (requires NumPy)"""
+
+    def __init__(self, path):
+        # Imported lazily so writing a corpus doesn't need NumPy
+        import numpy as np
+        self._np = np
+        self.path = path
+        manifest_path = os.path.join(path, MANIFEST)
+        if not os.path.exists(manifest_path):
+            raise ValueError(f"{path}: no {MANIFEST}; not a columnar corpus, or its export didn't finish")
+        with open(manifest_path, encoding="utf-8") as f:
+            self.manifest = json.load(f)
+        if self.manifest.get("version") != FORMAT_VERSION:
+            raise ValueError(f"{path}: columnar format version {self.manifest.get('version')}, "
+                             f"expected {FORMAT_VERSION}")
+        self.dictionaries = self.manifest["dictionaries"]
+        self._columns = {}
+        self.calls = _Table(self, "calls")
+        self.utterances = _Table(self, "utterances")
+
+    def column(self, name):
+        """The column as a NumPy array backed by the file; "calls.vertical", "utterances.text", ..."""
+        if name not in self._columns:
+            spec = self.manifest["columns"][name]
+            np = self._np
+            if spec["length"] == 0:
+                # mmap can't map an empty file
+                view = np.empty(0, dtype=spec["dtype"])
+            else:
+                view = np.memmap(os.path.join(self.path, spec["file"]), dtype=spec["dtype"], mode="r",
+                                 shape=(spec["length"],))
+            self._columns[name] = view
+        return self._columns[name]
+
+    def __len__(self):
+        return self.manifest["calls"]
+
+    @property
+    def num_utterances(self):
+        return self.manifest["utterances"]
+
+    def decode(self, name, codes=None):
+        """Strings of a dictionary-encoded column (or of the given codes from it), as a NumPy object array"""
+        values = self._np.asarray(self.dictionaries[DICTIONARIES[name]], dtype=object)
+        return values[self.column(name) if codes is None else codes]
+
+    def text(self, row):
+        """Text of one utterance"""
+        offsets = self.column("utterances.text_offsets")
+        return self.column("utterances.text")[offsets[row]:offsets[row + 1]].tobytes().decode("utf-8")
+
+    def texts(self, start=0, stop=None):
+        """Texts of utterance rows start:stop, decoded in one pass"""
+        offsets = self.column("utterances.text_offsets")
+        stop = self.num_utterances if stop is None else stop
+        ends = offsets[start:stop + 1]
+        data = self.column("utterances.text")[ends[0]:ends[-1]].tobytes()
+        bounds = (ends - ends[0]).tolist()
+        return [data[a:b].decode("utf-8") for a, b in zip(bounds, bounds[1:])]
+
+    def utterance_rows(self, call_row):
+        """Range of utterance rows of the call in calls row call_row"""
+        offsets = self.column("calls.utterance_offsets")
+        return range(int(offsets[call_row]), int(offsets[call_row + 1]))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Open a columnar corpus and summarize it")
+    parser.add_argument("path", help="corpus directory written by generate_fake_calls.py --columnar")
+    parser.add_argument("--show", type=int, default=0, metavar="N", help="also print the first N utterances")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    try:
+        corpus = ColumnarCorpus(args.path)
+    except ImportError:
+        raise SystemExit("Error: reading a columnar corpus needs NumPy (pip install numpy)")
+    except (ValueError, OSError) as e:
+        raise SystemExit(f"Error: {e}")
+    np = corpus._np
+    for name in corpus.manifest["columns"]:
+        corpus.column(name)
+    opened = time.perf_counter() - started
+
+    calls = corpus.calls
+    utterances = np.diff(calls["utterance_offsets"])
+    minutes = calls["duration_seconds"] / 60
+    print(f"✓ {len(corpus)} calls, {corpus.num_utterances} utterances, "
+          f"{corpus.manifest['columns']['utterances.text']['length'] / 1e6:.1f} MB of text, "
+          f"mapped in {opened * 1000:.1f} ms")
+    verticals = corpus.dictionaries["vertical"]
+    per_vertical = np.bincount(calls["vertical"], minlength=len(verticals))
+    per_vertical_utterances = np.bincount(calls["vertical"], weights=utterances, minlength=len(verticals))
+    per_vertical_minutes = np.bincount(calls["vertical"], weights=minutes, minlength=len(verticals))
+    for code, vertical in enumerate(verticals):
+        print(f"  - {vertical}: {per_vertical[code]} calls, {per_vertical_utterances[code]:.0f} utterances, "
+              f"{per_vertical_minutes[code] / max(per_vertical[code], 1):.1f} min average")
+    speakers = corpus.dictionaries["speaker"]
+    for row, text in enumerate(corpus.texts(0, min(args.show, corpus.num_utterances))):
+        call_row = corpus.utterances["call_row"][row]
+        print(f"  [{calls['call_id'][call_row]}] {speakers[corpus.utterances['speaker'][row]]}: {text}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,274 @@
+"""Content packs: verticals and name, company and role lists from JSON or TOML.
+
+A pack is a .json or .toml file with any of these keys:
+
+    {
+      "companies": ["Contoso", "Fabrikam"],
+      "participant_roles": [...], "first_names": [...], "last_names": [...],
+      "call_archetypes": ["problem_discovery", "mixed"],
+      "verticals": {
+        "Energy": {"concerns": [...], "use_cases": [...], "problems": [...],
+                   "functional_reqs": [...], "nonfunctional_reqs": [...]}
+      }
+    }
+
+Packs are parsed and validated once, then compiled into a __packcache__
+directory next to them, keyed by the SHA-256 of the pack file. A compiled
+pack is a small header (the lists, plus the byte range of each vertical)
+followed by one marshal blob per vertical, so opening a pack reads only the
+header and a vertical's phrases are only read when that vertical is used.
+The cache index records each pack's size and mtime next to its hash, so an
+unchanged pack isn't even re-hashed.
+"""
+import hashlib
+import io
+import json
+import marshal
+import os
+import struct
+
+try:
+    import tomllib
+except ImportError:  # Python < 3.11
+    tomllib = None
+
+CACHE_DIR_NAME = "__packcache__"
+CACHE_INDEX = "index.json"
+MAGIC = b"PCPACK1\n"
+PACK_EXTENSIONS = (".json", ".toml")
+
+LIST_FIELDS = ("participant_roles", "companies", "first_names", "last_names", "call_archetypes")
+VERTICAL_FIELDS = ("concerns", "use_cases", "problems", "functional_reqs", "nonfunctional_reqs")
+# build_call() picks up to 5 distinct roles per call
+MIN_LENGTHS = {"participant_roles": 5}
+# Vertical phrases are emitted as-is, so they can't contain format slots
+TEMPLATE_FIELDS = ("problems", "functional_reqs", "nonfunctional_reqs")
+# What reading a corrupt or truncated compiled pack raises
+CACHE_ERRORS = (ValueError, EOFError, TypeError, KeyError, struct.error)
+
+
+class ContentPackError(ValueError):
+    """A content pack that can't be parsed or doesn't validate"""
+
+
+def parse_pack(path):
+    """Parse a pack file into a dict"""
+    ext = os.path.splitext(path)[1].lower()
+    try:
+        if ext == ".toml":
+            if tomllib is None:
+                raise ContentPackError(f"{path}: TOML packs need Python 3.11+ (tomllib)")
+            with open(path, "rb") as f:
+                return tomllib.load(f)
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except ContentPackError:
+        raise
+    except ValueError as e:
+        raise ContentPackError(f"{path}: {e}") from e
+
+
+def _check_strings(source, where, values, min_length=1, no_parens=False, no_braces=False):
+    if not isinstance(values, list) or len(values) < min_length:
+        raise ContentPackError(f"{source}: {where} must be a list of at least {min_length} string(s)")
+    for i, value in enumerate(values):
+        if not isinstance(value, str) or not value.strip():
+            raise ContentPackError(f"{source}: {where}[{i}] must be a non-empty string")
+        if no_parens and ("(" in value or ")" in value):
+            raise ContentPackError(f"{source}: {where}[{i}] can't contain parentheses: {value!r}")
+        if no_braces and ("{" in value or "}" in value):
+            raise ContentPackError(f"{source}: {where}[{i}] can't contain {{ or }}: {value!r}")
+
+
+def validate_pack(data, source):
+    """Raise ContentPackError unless data is a well-formed pack"""
+    if not isinstance(data, dict):
+        raise ContentPackError(f"{source}: a pack must be an object/table at the top level")
+    unknown = set(data) - set(LIST_FIELDS) - {"verticals", "name", "description"}
+    if unknown:
+        raise ContentPackError(f"{source}: unknown keys {sorted(unknown)}")
+
+    for field in LIST_FIELDS:
+        if field in data:
+            # Roles and vertical names end up inside "Name (Role)" and
+            # "Company (Vertical)", which the readers split on parentheses
+            _check_strings(source, field, data[field], MIN_LENGTHS.get(field, 1),
+                           no_parens=field == "participant_roles")
+
+    verticals = data.get("verticals", {})
+    if not isinstance(verticals, dict):
+        raise ContentPackError(f"{source}: verticals must map vertical names to their phrases")
+    for name, vertical in verticals.items():
+        _check_strings(source, "verticals", [name], no_parens=True)
+        if not isinstance(vertical, dict):
+            raise ContentPackError(f"{source}: verticals.{name} must be an object/table")
+        missing = [field for field in VERTICAL_FIELDS if field not in vertical]
+        if missing:
+            raise ContentPackError(f"{source}: verticals.{name} is missing {missing}")
+        unknown = set(vertical) - set(VERTICAL_FIELDS)
+        if unknown:
+            raise ContentPackError(f"{source}: verticals.{name} has unknown keys {sorted(unknown)}")
+        for field in VERTICAL_FIELDS:
+            _check_strings(source, f"verticals.{name}.{field}", vertical[field],
+                           no_braces=field in TEMPLATE_FIELDS)
+
+
+def compile_pack(data, sha256):
+    """Serialize a validated pack into the cached binary layout"""
+    blobs = []
+    ranges = {}
+    offset = 0
+    for name, vertical in data.get("verticals", {}).items():
+        blob = marshal.dumps({field: list(vertical[field]) for field in VERTICAL_FIELDS})
+        ranges[name] = (offset, len(blob))
+        blobs.append(blob)
+        offset += len(blob)
+    header = marshal.dumps({
+        "sha256": sha256,
+        "lists": {field: list(data[field]) for field in LIST_FIELDS if field in data},
+        "verticals": ranges,
+    })
+    return MAGIC + struct.pack("<I", len(header)) + header + b"".join(blobs)
+
+
+class CompiledPack:
+    """A compiled pack; the header is read up front, verticals on request"""
+
+    def __init__(self, source, cache_path=None, blob=None):
+        self.source = source
+        self._cache_path = cache_path
+        self._blob = blob
+        with self._open() as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ContentPackError(f"{cache_path}: not a compiled content pack")
+            (header_len,) = struct.unpack("<I", f.read(4))
+            header = marshal.loads(f.read(header_len))
+        self._body_start = len(MAGIC) + 4 + header_len
+        self.sha256 = header["sha256"]
+        self.lists = header["lists"]
+        self._ranges = header["verticals"]
+
+    def _open(self):
+        return io.BytesIO(self._blob) if self._blob is not None else open(self._cache_path, "rb")
+
+    @property
+    def verticals(self):
+        return list(self._ranges)
+
+    def load_vertical(self, name):
+        """The vertical's phrase lists, read from the compiled pack"""
+        offset, length = self._ranges[name]
+        try:
+            with self._open() as f:
+                f.seek(self._body_start + offset)
+                return marshal.loads(f.read(length))
+        except CACHE_ERRORS:
+            if self._cache_path is None:
+                raise
+            # The cache file was damaged after its header was read: compile the pack again
+            _discard(self._cache_path)
+            return open_pack(self.source).load_vertical(name)
+
+
+def _file_sha256(path):
+    sha256 = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            sha256.update(block)
+    return sha256.hexdigest()
+
+
+def _read_cache_index(cache_dir):
+    try:
+        with open(os.path.join(cache_dir, CACHE_INDEX), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _discard(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def _write_atomic(path, data):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def open_pack(path):
+    """Open a pack through its compiled cache, (re)compiling it if the file changed"""
+    cache_dir = os.path.join(os.path.dirname(os.path.abspath(path)), CACHE_DIR_NAME)
+    name = os.path.basename(path)
+    stat = os.stat(path)
+    index = _read_cache_index(cache_dir)
+    entry = index.get(name)
+    if entry and entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+        sha256 = entry["sha256"]
+    else:
+        sha256 = _file_sha256(path)
+    cache_path = os.path.join(cache_dir, sha256 + ".bin")
+
+    pack = None
+    if os.path.exists(cache_path):
+        try:
+            pack = CompiledPack(path, cache_path=cache_path)
+        except CACHE_ERRORS:
+            # Corrupt or truncated: delete it and compile the pack again
+            _discard(cache_path)
+    if pack is None:
+        data = parse_pack(path)
+        validate_pack(data, path)
+        blob = compile_pack(data, sha256)
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            _write_atomic(cache_path, blob)
+        except OSError:
+            # Read-only location: use the compiled pack from memory this time
+            return CompiledPack(path, blob=blob)
+        pack = CompiledPack(path, cache_path=cache_path)
+
+    if entry != {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": sha256}:
+        index[name] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": sha256}
+        try:
+            _write_atomic(os.path.join(cache_dir, CACHE_INDEX), json.dumps(index, indent=2).encode("utf-8"))
+        except OSError:
+            pass
+    return pack
+
+
+def expand_pack_paths(paths):
+    """Pack files for a list of files and directories (a directory means every pack in it, sorted)"""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(os.path.join(path, name) for name in sorted(os.listdir(path))
+                         if name.lower().endswith(PACK_EXTENSIONS))
+        else:
+            files.append(path)
+    return files
+
+
+class ContentCatalog:
+    """Merged view of several packs; for each list and vertical the last pack defining it wins"""
+
+    def __init__(self, paths=()):
+        self.packs = [open_pack(path) for path in expand_pack_paths(paths)]
+        self.lists = {}
+        self._vertical_packs = {}
+        for pack in self.packs:
+            self.lists.update(pack.lists)
+            for name in pack.verticals:
+                self._vertical_packs[name] = pack
+
+    @property
+    def verticals(self):
+        """Names of the verticals the packs define, in pack order"""
+        return list(self._vertical_packs)
+
+    def load_vertical(self, name):
+        return self._vertical_packs[name].load_vertical(name)
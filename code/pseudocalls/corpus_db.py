@@ -0,0 +1,253 @@
+"""SQLite corpus store: calls, participants and utterances as indexed tables.
+
+    calls(call_id, company, vertical, call_type, call_date, duration_seconds, num_participants)
+    participants(call_id, idx, name, role)
+    utterances(call_id, seq, time_sec, speaker, text, phrase_id)   -- speaker is participants.idx,
+                                                                   -- phrase_id NULL for model lines
+    utterances_fts                                                 -- FTS5 over utterances.text
+
+Calls are buffered and written in batches with executemany, one transaction
+per batch, in WAL mode, by a background thread so the inserts (sqlite3
+releases the GIL while it works) overlap with generating the next batch.
+Secondary indexes (vertical, call type, duration, role, utterances by call)
+are created when the store is closed, so a bulk load doesn't pay for index
+maintenance row by row; appending to an existing store keeps them up to
+date as usual.
+
+Usage:
+    python generate_fake_calls.py --calls 1000000 --stream --quiet --db calls.db
+    python corpus_db.py calls.db --vertical "Financial Services" --type architecture_review \\
+        --min-minutes 11 --role "Data Engineer" --search "lineage"
+"""
+import argparse
+import queue
+import sqlite3
+import threading
+
+from phrase_bank import NO_PHRASE
+
+DEFAULT_BATCH_CALLS = 2000
+# Batches handed to the writer thread but not yet written; add() blocks
+# beyond this, so a slow disk holds the generator back instead of memory
+MAX_PENDING_BATCHES = 2
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS calls (
+    call_id INTEGER PRIMARY KEY,
+    company TEXT NOT NULL,
+    vertical TEXT NOT NULL,
+    call_type TEXT NOT NULL,
+    call_date TEXT NOT NULL,
+    duration_seconds INTEGER NOT NULL,
+    num_participants INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS participants (
+    call_id INTEGER NOT NULL,
+    idx INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    role TEXT NOT NULL,
+    PRIMARY KEY (call_id, idx)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS utterances (
+    call_id INTEGER NOT NULL,
+    seq INTEGER NOT NULL,
+    time_sec INTEGER NOT NULL,
+    speaker INTEGER NOT NULL,
+    text TEXT NOT NULL,
+    phrase_id INTEGER
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS utterances_fts USING fts5 (
+    text, content='utterances', content_rowid='rowid'
+);
+"""
+
+# Built at close(); see the module docstring
+INDEXES = """
+CREATE INDEX IF NOT EXISTS idx_utterances_call ON utterances (call_id, seq);
+CREATE INDEX IF NOT EXISTS idx_calls_vertical ON calls (vertical, call_type, duration_seconds);
+CREATE INDEX IF NOT EXISTS idx_calls_type ON calls (call_type, duration_seconds);
+CREATE INDEX IF NOT EXISTS idx_calls_duration ON calls (duration_seconds);
+CREATE INDEX IF NOT EXISTS idx_participants_role ON participants (role, call_id);
+"""
+
+
+def split_participant(participant):
+    """"Sarah Chen (Data Engineer)" -> ("Sarah Chen", "Data Engineer")"""
+    name, _, role = participant.partition(" (")
+    return name, role.rstrip(")")
+
+
+class CorpusStore:
+    """Batched writer for the SQLite corpus store"""
+
+    def __init__(self, path, batch_calls=DEFAULT_BATCH_CALLS):
+        self.path = path
+        self.batch_calls = batch_calls
+        # Shared with the writer thread; the main thread only uses it once
+        # the queue has drained
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        # WAL + NORMAL only syncs at checkpoints; a crash can lose the last
+        # batches but never corrupts the file
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute("PRAGMA temp_store=MEMORY")
+        self.db.executescript(SCHEMA)
+        self._calls = []
+        self._participants = []
+        self._utterances = []
+        self._error = None
+        self._pending = queue.Queue(MAX_PENDING_BATCHES)
+        self._writer = threading.Thread(target=self._write_batches, name="corpus-db-writer", daemon=True)
+        self._writer.start()
+
+    def _write_batches(self):
+        while True:
+            batch = self._pending.get()
+            try:
+                if batch is None:
+                    return
+                if self._error is None:
+                    self._write(*batch)
+            except Exception as e:
+                self._error = e
+            finally:
+                self._pending.task_done()
+
+    def _write(self, calls, participants, utterances):
+        with self.db:
+            (last_rowid,) = self.db.execute("SELECT COALESCE(MAX(rowid), 0) FROM utterances").fetchone()
+            self.db.executemany("INSERT INTO calls VALUES (?, ?, ?, ?, ?, ?, ?)", calls)
+            self.db.executemany("INSERT INTO participants VALUES (?, ?, ?, ?)", participants)
+            self.db.executemany("INSERT INTO utterances VALUES (?, ?, ?, ?, ?, ?)", utterances)
+            self.db.execute("INSERT INTO utterances_fts (rowid, text) "
+                            "SELECT rowid, text FROM utterances WHERE rowid > ?", (last_rowid,))
+
+    def _submit(self):
+        if self._calls:
+            self._pending.put((self._calls, self._participants, self._utterances))
+            self._calls, self._participants, self._utterances = [], [], []
+
+    def _drain(self):
+        """Wait for every submitted batch to be written"""
+        self._pending.join()
+        if self._error is not None:
+            raise self._error
+
+    def add(self, call):
+        """Queue a CallRecord; written once batch_calls calls are queued"""
+        # Stop the run as soon as the writer thread has failed
+        if self._error is not None:
+            raise self._error
+        call_id = call.call_id
+        self._calls.append((call_id, call.company, call.vertical, call.call_type, call.call_date,
+                            call.duration_seconds, len(call.participants)))
+        self._participants.extend((call_id, i, *split_participant(p)) for i, p in enumerate(call.participants))
+        phrase_ids = call.phrase_ids
+        if NO_PHRASE in phrase_ids:
+            phrase_ids = [None if p == NO_PHRASE else p for p in phrase_ids]
+        self._utterances.extend(zip([call_id] * len(call), range(len(call)), call.times, call.speakers,
+                                    call.texts, phrase_ids))
+        if len(self._calls) >= self.batch_calls:
+            self._submit()
+
+    def flush(self):
+        """Write everything queued so far and wait until it is committed"""
+        self._submit()
+        self._drain()
+
+    def truncate_from(self, call_id):
+        """Delete calls with call_id >= call_id, e.g. ones written after the checkpoint being resumed"""
+        self._calls, self._participants, self._utterances = [], [], []
+        self._drain()
+        with self.db:
+            # External-content FTS rows have to be removed with their old text
+            self.db.execute("INSERT INTO utterances_fts (utterances_fts, rowid, text) "
+                            "SELECT 'delete', rowid, text FROM utterances WHERE call_id >= ?", (call_id,))
+            for table in ("utterances", "participants", "calls"):
+                self.db.execute(f"DELETE FROM {table} WHERE call_id >= ?", (call_id,))
+
+    def clear(self):
+        """Delete every call, e.g. before a fresh run writes the corpus from call 1"""
+        self._calls, self._participants, self._utterances = [], [], []
+        self._drain()
+        with self.db:
+            self.db.execute("INSERT INTO utterances_fts (utterances_fts) VALUES ('delete-all')")
+            for table in ("utterances", "participants", "calls"):
+                self.db.execute(f"DELETE FROM {table}")
+
+    def close(self):
+        self.flush()
+        self._pending.put(None)
+        self._writer.join()
+        self.db.executescript(INDEXES)
+        self.db.execute("PRAGMA optimize")
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def query_calls(db, vertical=None, call_type=None, min_minutes=None, max_minutes=None,
+                role=None, search=None, limit=100):
+    """Calls matching every given filter, as dicts in call_id order
+
+    search is an FTS5 query over utterance text; role matches any
+    participant's role.
+    """
+    where = []
+    params = []
+    if vertical is not None:
+        where.append("c.vertical = ?")
+        params.append(vertical)
+    if call_type is not None:
+        where.append("c.call_type = ?")
+        params.append(call_type)
+    if min_minutes is not None:
+        where.append("c.duration_seconds >= ?")
+        params.append(int(min_minutes * 60))
+    if max_minutes is not None:
+        where.append("c.duration_seconds <= ?")
+        params.append(int(max_minutes * 60))
+    if role is not None:
+        where.append("EXISTS (SELECT 1 FROM participants p WHERE p.call_id = c.call_id AND p.role = ?)")
+        params.append(role)
+    if search is not None:
+        where.append("c.call_id IN (SELECT u.call_id FROM utterances_fts f "
+                     "JOIN utterances u ON u.rowid = f.rowid WHERE utterances_fts MATCH ?)")
+        params.append(search)
+    sql = "SELECT c.* FROM calls c"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += " ORDER BY c.call_id LIMIT ?"
+    params.append(limit)
+    cursor = db.execute(sql, params)
+    columns = [d[0] for d in cursor.description]
+    return [dict(zip(columns, row)) for row in cursor]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Query a SQLite corpus store")
+    parser.add_argument("db", help="store written with generate_fake_calls.py --db")
+    parser.add_argument("--vertical", default=None)
+    parser.add_argument("--type", dest="call_type", default=None, help="call type, e.g. architecture_review")
+    parser.add_argument("--min-minutes", type=float, default=None)
+    parser.add_argument("--max-minutes", type=float, default=None)
+    parser.add_argument("--role", default=None, help="calls with a participant in this role")
+    parser.add_argument("--search", default=None, help="FTS5 query over utterance text")
+    parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    db = sqlite3.connect(f"file:{args.db}?mode=ro", uri=True)
+    rows = query_calls(db, args.vertical, args.call_type, args.min_minutes, args.max_minutes,
+                       args.role, args.search, args.limit)
+    for row in rows:
+        print(f"  #{row['call_id']} {row['company']} ({row['vertical']}) - "
+              f"{row['call_type']}, {row['duration_seconds'] / 60:.1f} min")
+    print(f"✓ {len(rows)} call(s)" + (" (limit reached)" if len(rows) == args.limit else ""))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,481 @@
+"""Statistical dialogue model trained on transcripts, sampled with alias tables.
+
+Instead of the fixed phrase lists, a DialogueModel learns from transcript
+files (data/*.txt, generated corpora, shards):
+
+    lengths, participants   utterances per call, speakers per call
+    slots                   who speaks next, as the speaker's order of first
+                            appearance, given the previous speaker and the
+                            number of participants
+    kinds                   question or statement, given the previous kind
+                            and the section of the call (opening, body,
+                            closing by relative position)
+    words                   word n-grams (order 3 by default) per vertical,
+                            section and kind, plus a table for each section
+                            and kind across all verticals as a fallback
+    roles, names, companies, pauses between utterances
+
+While training, the speaker's own name and role, other participants' names
+and the company are replaced by <self>, <role>, <name> and <company> tokens,
+which are filled back in from the call being generated.
+
+Every distribution is compiled into a Vose alias table, all stored in three
+flat arrays, so any draw - including the next word out of a large
+vocabulary - costs one rng.random() and two array reads. Word contexts are
+compiled into a graph whose nodes are the contexts where the text can
+branch: each edge carries the word drawn plus the run of words that
+deterministically follows it, pre-joined into one text fragment, so an
+utterance costs one draw per branch point rather than one per word. The
+compiled model is saved as a marshal file and loaded with a single read.
+
+Usage:
+    python dialogue_model.py train ../../data/*.txt --output dialogue.model
+    python dialogue_model.py sample dialogue.model --calls 2 --seed 7 --vertical Healthcare
+    python generate_fake_calls.py --calls 100000 --stream --quiet --engine model --model dialogue.model
+"""
+import argparse
+import marshal
+import os
+import random
+import sys
+import time
+from array import array
+from collections import Counter, defaultdict
+from datetime import datetime
+
+from call_record import CallRecord, render_text
+from corpus_db import split_participant
+from diversity import iter_corpus_calls
+from phrase_bank import NO_PHRASE
+
+MODEL_MAGIC = b"PCDLGv1\n"
+DEFAULT_ORDER = 3
+# Utterances before this fraction of a call are its opening, after CLOSING_START its closing
+OPENING_END = 0.15
+CLOSING_START = 0.9
+# Cap on generated utterance length: words per compiled run, runs per utterance
+MAX_WORDS = 80
+# Pauses longer than this (in seconds) are clamped when training
+MAX_PAUSE = 120
+
+START = 0
+END = 1
+RESERVED_WORDS = ("<s>", "</s>")
+SELF_TOKEN = "<self>"
+NAME_TOKEN = "<name>"
+ROLE_TOKEN = "<role>"
+COMPANY_TOKEN = "<company>"
+
+
+def alias_table(weights):
+    """Vose's alias method: (prob, alias) lists for drawing index i with probability weights[i] / sum"""
+    n = len(weights)
+    total = float(sum(weights))
+    scaled = [w * n / total for w in weights]
+    prob = [1.0] * n
+    alias = list(range(n))
+    small = [i for i, p in enumerate(scaled) if p < 1.0]
+    large = [i for i, p in enumerate(scaled) if p >= 1.0]
+    while small and large:
+        s = small.pop()
+        l = large.pop()
+        prob[s] = scaled[s]
+        alias[s] = l
+        scaled[l] += scaled[s] - 1.0
+        (small if scaled[l] < 1.0 else large).append(l)
+    return prob, alias
+
+
+class AliasTables:
+    """Many discrete distributions as alias tables packed into flat arrays"""
+
+    def __init__(self):
+        self.outcomes = array("I")
+        self.prob = array("d")
+        self.alias = array("I")
+
+    def add(self, counter):
+        """Compile a Counter of outcome ids; returns the (start, n) slice that draw() takes"""
+        outcomes = sorted(counter)
+        prob, alias = alias_table([counter[o] for o in outcomes])
+        start = len(self.outcomes)
+        self.outcomes.extend(outcomes)
+        self.prob.extend(prob)
+        self.alias.extend(alias)
+        return start, len(outcomes)
+
+    def draw(self, table, rng):
+        """One outcome from the distribution at table = (start, n)"""
+        start, n = table
+        if n == 1:
+            return self.outcomes[start]
+        # One uniform draw picks the column and decides between it and its alias
+        u = rng.random() * n
+        i = int(u)
+        k = start + i
+        if u - i < self.prob[k]:
+            return self.outcomes[k]
+        return self.outcomes[start + self.alias[k]]
+
+
+def section_of(i, n):
+    """Section index of utterance i of n"""
+    position = i / n
+    if position < OPENING_END:
+        return 0
+    if position >= CLOSING_START:
+        return 2
+    return 1
+
+
+def mask_words(text, own_names, role, names, company):
+    """Whitespace-split words of an utterance with names, role and company replaced by tokens
+
+    own_names are the speaker's first and last name, names everyone else's; a
+    full name ("Sarah Chen") becomes a single token.
+    """
+    if company:
+        text = text.replace(company, COMPANY_TOKEN)
+    if role:
+        text = text.replace(role, ROLE_TOKEN)
+    words = []
+    for word in text.split():
+        # Keep trailing punctuation on the placeholder ("Chen's," -> "<name>'s,")
+        core = word.rstrip(".,!?;:")
+        if core.endswith("'s"):
+            core = core[:-2]
+        token = SELF_TOKEN if core in own_names else NAME_TOKEN if core in names else None
+        if token is not None:
+            if words and words[-1] == token:
+                words.pop()
+            word = token + word[len(core):]
+        words.append(word)
+    return words
+
+
+class DialogueModel:
+    """Trainable turn and word n-gram model; build_call() samples a CallRecord"""
+
+    def __init__(self, state):
+        # The marshal-able form save() writes
+        self.state = state
+        self.order = state["order"]
+        self.words = state["words"]
+        self.roles = state["roles"]
+        self.names = state["names"]
+        self.companies = state["companies"]
+        self.verticals = state["verticals"]
+        self.tables = AliasTables()
+        self.tables.outcomes.frombytes(state["outcomes"])
+        self.tables.prob.frombytes(state["prob"])
+        self.tables.alias.frombytes(state["alias"])
+        # Small distributions by name/tuple key
+        self.dists = state["dists"]
+        # Word graph: node -> alias table over edges, edge -> (fragment, next node or -1 at the end)
+        self.node_start = array("I")
+        self.node_start.frombytes(state["node_start"])
+        self.node_count = array("I")
+        self.node_count.frombytes(state["node_count"])
+        self.edge_text = state["edge_text"]
+        self.edge_next = array("i")
+        self.edge_next.frombytes(state["edge_next"])
+        self.word_tables = state["word_tables"]
+        # First node of each word table
+        self.starts = state["starts"]
+        self._word_table_ids = {key: i for i, key in enumerate(self.word_tables)}
+
+    @classmethod
+    def train(cls, paths, order=DEFAULT_ORDER):
+        """Learn a model from transcript or JSON Lines corpora"""
+        word_ids = {word: i for i, word in enumerate(RESERVED_WORDS)}
+        role_ids, name_ids, company_ids = {}, {}, {}
+        counts = defaultdict(Counter)
+        ngrams = defaultdict(Counter)
+        verticals = Counter()
+
+        def intern(ids, value):
+            return ids.setdefault(value, len(ids))
+
+        for header, texts, speakers in iter_corpus_calls(paths):
+            n = len(texts)
+            if not n:
+                continue
+            vertical = header.get("vertical") or ""
+            verticals[vertical] += 1
+            company = header.get("company") or ""
+            counts["lengths"][n] += 1
+            if company:
+                counts["companies"][intern(company_ids, company)] += 1
+
+            slots = {}
+            names = {}
+            roles = {}
+            for speaker in speakers:
+                if speaker not in slots:
+                    slots[speaker] = len(slots)
+                    name, role = split_participant(speaker)
+                    names[speaker] = set(name.split())
+                    roles[speaker] = role
+                    first, _, last = name.partition(" ")
+                    counts["first_names"][intern(name_ids, first)] += 1
+                    if last:
+                        counts["last_names"][intern(name_ids, last)] += 1
+                    key = "lead_roles" if not slots[speaker] else "roles"
+                    counts[key][intern(role_ids, role)] += 1
+            counts["participants"][len(slots)] += 1
+
+            all_names = set().union(*names.values())
+            previous_slot = -1
+            previous_kind = -1
+            for i, (text, speaker) in enumerate(zip(texts, speakers)):
+                section = section_of(i, n)
+                slot = slots[speaker]
+                counts[("slot", len(slots), previous_slot)][slot] += 1
+                kind = 1 if text.rstrip().endswith("?") else 0
+                counts[("kind", section, previous_kind)][kind] += 1
+                previous_slot, previous_kind = slot, kind
+
+                words = [START] * (order - 1)
+                masked = mask_words(text, names[speaker], roles[speaker], all_names, company)
+                words += [intern(word_ids, word) for word in masked]
+                words.append(END)
+                for vertical_key in (vertical, None):
+                    table = ngrams[(vertical_key, section, kind)]
+                    for j in range(order - 1, len(words)):
+                        table[tuple(words[j - order + 1:j + 1])] += 1
+
+            times = header["times"]
+            for previous, current in zip(times, times[1:]):
+                counts["pauses"][min(max(current - previous, 0), MAX_PAUSE)] += 1
+
+        return cls.compile(order, word_ids, role_ids, name_ids, company_ids, counts, ngrams, verticals)
+
+    @classmethod
+    def compile(cls, order, word_ids, role_ids, name_ids, company_ids, counts, ngrams, verticals):
+        """Turn raw counts into alias tables and return the model"""
+        tables = AliasTables()
+        dists = {key: tables.add(counter) for key, counter in counts.items() if counter}
+        word_tables = sorted(ngrams, key=lambda key: (key[0] is None, key[0] or "", key[1], key[2]))
+        words = list(word_ids)
+        node_start, node_count = array("I"), array("I")
+        edge_text, edge_next = [], array("i")
+        starts = []
+
+        for key in word_tables:
+            successors = defaultdict(Counter)
+            for ngram, count in ngrams[key].items():
+                successors[ngram[:-1]][ngram[-1]] += count
+            first_node = len(node_start)
+            start = (START,) * (order - 1)
+            nodes = {start: first_node}
+            starts.append(first_node)
+            pending = [start]
+            node_tables = {}
+            while pending:
+                node = pending.pop()
+                edges = Counter()
+                for word, count in successors[node].items():
+                    # The edge covers the drawn word plus every word that can only follow it
+                    run = []
+                    context = node
+                    while word != END and len(run) < MAX_WORDS:
+                        run.append(word)
+                        context = context[1:] + (word,)
+                        following = successors[context]
+                        if len(following) > 1:
+                            break
+                        word = next(iter(following))
+                    if word == END:
+                        target = -1
+                    else:
+                        if context not in nodes:
+                            nodes[context] = first_node + len(nodes)
+                            pending.append(context)
+                        target = nodes[context]
+                    edges[len(edge_text)] = count
+                    edge_text.append("".join(" " + words[w] for w in run))
+                    edge_next.append(target)
+                node_tables[nodes[node]] = tables.add(edges)
+            for node_id in range(first_node, first_node + len(nodes)):
+                node_start.append(node_tables[node_id][0])
+                node_count.append(node_tables[node_id][1])
+        return cls({
+            "order": order,
+            "words": list(word_ids),
+            "roles": list(role_ids),
+            "names": list(name_ids),
+            "companies": list(company_ids),
+            "verticals": dict(verticals),
+            "outcomes": tables.outcomes.tobytes(),
+            "prob": tables.prob.tobytes(),
+            "alias": tables.alias.tobytes(),
+            "dists": dists,
+            "node_start": node_start.tobytes(),
+            "node_count": node_count.tobytes(),
+            "edge_text": edge_text,
+            "edge_next": edge_next.tobytes(),
+            "word_tables": word_tables,
+            "starts": starts,
+        })
+
+    def save(self, path):
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(MODEL_MAGIC)
+            marshal.dump(self.state, f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            if f.read(len(MODEL_MAGIC)) != MODEL_MAGIC:
+                raise ValueError(f"{path}: not a dialogue model")
+            return cls(marshal.load(f))
+
+    def _draw(self, key, rng):
+        return self.tables.draw(self.dists[key], rng)
+
+    def _word_table(self, vertical, section, kind):
+        """Id of the n-gram table for a vertical, section and kind, falling back to all verticals"""
+        ids = self._word_table_ids
+        for key in ((vertical, section, kind), (None, section, kind), (None, section, 1 - kind)):
+            if key in ids:
+                return ids[key]
+        return ids[next(iter(ids))]
+
+    def sentence(self, table_id, rng):
+        """Text of one utterance drawn from an n-gram table"""
+        outcomes, prob, alias = self.tables.outcomes, self.tables.prob, self.tables.alias
+        node_start, node_count = self.node_start, self.node_count
+        edge_text, edge_next = self.edge_text, self.edge_next
+        node = self.starts[table_id]
+        parts = []
+        # Inlined AliasTables.draw: this is the hot loop of the model engine
+        while node >= 0 and len(parts) < MAX_WORDS:
+            start = node_start[node]
+            n = node_count[node]
+            if n == 1:
+                edge = outcomes[start]
+            else:
+                u = rng.random() * n
+                i = int(u)
+                k = start + i
+                edge = outcomes[k] if u - i < prob[k] else outcomes[start + alias[k]]
+            parts.append(edge_text[edge])
+            node = edge_next[edge]
+        return "".join(parts)[1:]
+
+    def _participants(self, rng):
+        count = self._draw("participants", rng)
+        roles = [self.roles[self._draw("lead_roles", rng)]]
+        # Rejection sampling keeps roles distinct while every draw stays O(1)
+        attempts = 0
+        while len(roles) < count and attempts < 20 * count:
+            role = self.roles[self._draw("roles", rng)]
+            if role not in roles:
+                roles.append(role)
+            attempts += 1
+        participants = []
+        for role in roles:
+            first = self.names[self._draw("first_names", rng)]
+            last = self.names[self._draw("last_names", rng)] if "last_names" in self.dists else ""
+            name = f"{first} {last}" if last else first
+            participants.append(f"{name} ({role})" if role else name)
+        return participants
+
+    def build_call(self, call_id, vertical, archetype, rng=random, call_date=None):
+        """Sample one call as a CallRecord; vertical picks the n-gram tables, archetype is only recorded"""
+        company = self.companies[self._draw("companies", rng)] if self.companies else "Contoso"
+        participants = self._participants(rng)
+        n = self._draw("lengths", rng)
+        has_pauses = "pauses" in self.dists
+
+        lines = []
+        t = 0
+        previous_slot = -1
+        previous_kind = -1
+        for i in range(n):
+            section = section_of(i, n)
+            slot_key = ("slot", len(participants), previous_slot)
+            slot = self._draw(slot_key, rng) if slot_key in self.dists else rng.randrange(len(participants))
+            kind_key = ("kind", section, previous_kind)
+            kind = self._draw(kind_key, rng) if kind_key in self.dists else 0
+            previous_slot, previous_kind = slot, kind
+
+            speaker = participants[slot]
+            text = self.sentence(self._word_table(vertical, section, kind), rng)
+            if "<" in text:
+                text = self._fill(text, speaker, participants, company, rng)
+            lines.append((t, speaker, text, NO_PHRASE))
+            t += self._draw("pauses", rng) if has_pauses else rng.randint(5, 20)
+
+        if call_date is None:
+            call_date = datetime.now().strftime('%Y-%m-%d')
+        return CallRecord.from_lines(call_id, company, vertical, archetype, call_date, participants, lines, t)
+
+    def _fill(self, text, speaker, participants, company, rng):
+        """Put the names, role and company back into <self>/<role>/<name>/<company> slots
+
+        <self> is the speaker's full name, <name> another participant's first name.
+        """
+        name, role = split_participant(speaker)
+        text = text.replace(COMPANY_TOKEN, company).replace(SELF_TOKEN, name).replace(ROLE_TOKEN, role)
+        if NAME_TOKEN not in text:
+            return text
+        others = [p for p in participants if p != speaker] or participants
+        parts = text.split(NAME_TOKEN)
+        out = [parts[0]]
+        for part in parts[1:]:
+            out.append(split_participant(rng.choice(others))[0].split()[0])
+            out.append(part)
+        return "".join(out)
+
+    def stats(self):
+        return {
+            "order": self.order,
+            "vocabulary": len(self.words) - len(RESERVED_WORDS),
+            "nodes": len(self.node_start),
+            "edges": len(self.edge_text),
+            "roles": len(self.roles),
+            "word_tables": len(self.word_tables),
+        }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Train and sample the statistical dialogue model")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    train = commands.add_parser("train", help="learn a model from transcript corpora")
+    train.add_argument("sources", nargs="+", help="transcript or JSON Lines corpora, shards or shard manifests")
+    train.add_argument("--output", default="dialogue.model", help="model file (default: dialogue.model)")
+    train.add_argument("--order", type=int, default=DEFAULT_ORDER, help=f"word n-gram order (default: {DEFAULT_ORDER})")
+
+    sample = commands.add_parser("sample", help="print calls sampled from a model")
+    sample.add_argument("model", help="model file written by train")
+    sample.add_argument("--calls", type=int, default=1)
+    sample.add_argument("--seed", type=int, default=None)
+    sample.add_argument("--vertical", default=None, help="vertical of the sampled calls (default: the most common)")
+    args = parser.parse_args(argv)
+
+    if args.command == "train":
+        started = time.perf_counter()
+        model = DialogueModel.train(args.sources, order=args.order)
+        model.save(args.output)
+        stats = model.stats()
+        print(f"✓ Trained on {sum(model.verticals.values())} calls in {time.perf_counter() - started:.1f}s: "
+              f"{stats['vocabulary']} words, {stats['nodes']} branch points in {stats['word_tables']} tables")
+        print(f"✓ Model saved to: {args.output} ({os.path.getsize(args.output) / 1e6:.1f} MB)")
+        return 0
+
+    model = DialogueModel.load(args.model)
+    vertical = args.vertical or max(model.verticals, key=model.verticals.get)
+    seed = args.seed if args.seed is not None else random.randrange(2 ** 32)
+    for call_id in range(1, args.calls + 1):
+        call = model.build_call(call_id, vertical, "mixed", rng=random.Random(f"{seed}:{call_id}"))
+        print(render_text(call))
+        print()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
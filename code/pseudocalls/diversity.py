@@ -0,0 +1,367 @@
+"""Corpus diversity metrics and MinHash/LSH near-duplicate detection.
+
+Each call is reduced to a set of shingles: its utterances, lowercased, with
+the speakers' names and the company masked out so calls that only differ in
+who says a line look alike (or, with word_shingles=N, the word N-grams of
+that text). The shingle set is summarized by a one-permutation MinHash
+signature: every shingle is hashed once into one of SIGNATURE_SIZE bins and
+each bin keeps its minimum, so a call costs O(shingles) however long the
+signature is. The fraction of equal bins estimates the Jaccard similarity
+of two calls.
+
+NearDuplicateIndex finds near-duplicates with LSH: signatures are cut into
+bands, and a call is only compared with the earlier calls it shares a band
+with. Clustering is single-pass: a call within the threshold of a cluster's
+first call (its leader) joins that cluster, otherwise it leads a new one,
+so a corpus takes one linear pass and only leaders are kept in memory.
+generate_fake_calls.py --dedup uses the same index to drop or regenerate
+near-duplicates as it writes.
+
+The report gives, per vertical and archetype, the calls, distinct phrase
+combinations (distinct sets of masked utterances), distinct utterances and
+near-duplicates, plus the Shannon entropy of word 1..N-grams over the corpus.
+
+Usage:
+    python diversity.py fake_customer_calls_2.txt --threshold 0.8
+    python diversity.py ../../data/*.txt big.manifest.json --entropy-every 100 --save diversity.json
+"""
+import argparse
+import json
+import math
+import re
+import sys
+import time
+import zlib
+from array import array
+from collections import Counter
+
+from search_index import expand_sources, normalize_call_type, open_source, tokenize
+from transcript_reader import iter_call_spans, parse_utterances
+
+SIGNATURE_SIZE = 64
+DEFAULT_THRESHOLD = 0.8
+# Relative cost of an LSH false positive against a false negative (see lsh_params)
+FALSE_POSITIVE_WEIGHT = 0.1
+# Empty-bin marker; larger than any 32-bit bin value
+EMPTY = 1 << 32
+# Odd 64-bit multiplier that spreads a 32-bit CRC over 64 bits
+MIX = 0x9E3779B97F4A7C15
+MASK64 = (1 << 64) - 1
+
+# Words that can be (part of) a name; compared against the call's speakers
+CAPITALIZED_RE = re.compile(r"\b[A-Z][\w'-]*")
+
+
+def masked_lines(texts, speakers, company):
+    """Utterance texts, lowercased, with speaker names and the company replaced by placeholders"""
+    names = set()
+    for speaker in speakers:
+        names.update((speaker.rpartition(" (")[0] or speaker).split())
+    text = "\n".join(texts)
+    if company:
+        text = text.replace(company, "<company>")
+    if names:
+        text = CAPITALIZED_RE.sub(lambda m: "<name>" if m.group() in names else m.group(), text)
+    return text.lower().split("\n")
+
+
+def shingles(lines, word_shingles=0):
+    """CRC-32 of each line, or of each word N-gram of the lines with word_shingles=N"""
+    if not word_shingles:
+        return {zlib.crc32(line.encode("utf-8")) for line in lines}
+    hashes = set()
+    for line in lines:
+        words = line.split()
+        for i in range(max(1, len(words) - word_shingles + 1)):
+            hashes.add(zlib.crc32(" ".join(words[i:i + word_shingles]).encode("utf-8")))
+    return hashes
+
+
+def minhash(hashes, size=SIGNATURE_SIZE):
+    """One-permutation MinHash signature (a list of size ints) of a set of shingle hashes
+
+    Bins no shingle fell into are filled from the next non-empty bin
+    (rotation densification), so short calls still compare bin by bin.
+    """
+    bins = [EMPTY] * size
+    for h in hashes:
+        h = h * MIX & MASK64
+        b = (h >> 32) % size
+        value = h & 0xFFFFFFFF
+        if value < bins[b]:
+            bins[b] = value
+    if EMPTY in bins and any(value != EMPTY for value in bins):
+        filled = list(bins)
+        for b in range(size):
+            if bins[b] == EMPTY:
+                distance = 1
+                while bins[(b + distance) % size] == EMPTY:
+                    distance += 1
+                # Above any real bin value, and equal only for the same source bin and distance
+                filled[b] = distance * EMPTY + bins[(b + distance) % size]
+        bins = filled
+    return bins
+
+
+def call_signature(texts, speakers, company, word_shingles=0, size=SIGNATURE_SIZE):
+    """MinHash signature of a call from its utterance texts and speaker labels"""
+    return minhash(shingles(masked_lines(texts, speakers, company), word_shingles), size)
+
+
+def similarity(a, b):
+    """Estimated Jaccard similarity of two signatures"""
+    return sum(x == y for x, y in zip(a, b)) / len(a)
+
+
+def lsh_params(threshold, size=SIGNATURE_SIZE):
+    """(bands, rows) with bands * rows == size that best separates pairs above and below threshold
+
+    Picks the split minimizing the probability mass of false negatives
+    above the threshold plus that of false positives below it, the latter
+    weighted down by FALSE_POSITIVE_WEIGHT: a false positive only costs a
+    signature comparison, a false negative is a missed near-duplicate.
+    """
+    best = None
+    for rows in range(1, size + 1):
+        if size % rows:
+            continue
+        bands = size // rows
+        steps = 100
+        error = 0.0
+        for i in range(steps):
+            s = (i + 0.5) / steps
+            p = 1 - (1 - s ** rows) ** bands
+            error += p * FALSE_POSITIVE_WEIGHT if s < threshold else 1 - p
+        if best is None or error < best[0]:
+            best = (error, bands, rows)
+    return best[1], best[2]
+
+
+class NearDuplicateIndex:
+    """Single-pass LSH clustering of MinHash signatures"""
+
+    def __init__(self, threshold=DEFAULT_THRESHOLD, size=SIGNATURE_SIZE):
+        self.threshold = threshold
+        self.size = size
+        self.bands, self.rows = lsh_params(threshold, size)
+        # Per band: band hash -> first leader with that band
+        self._buckets = [{} for _ in range(self.bands)]
+        # Leader signatures, size values each (bins can exceed 32 bits after densification)
+        self._signatures = array("Q")
+        self.sizes = array("I")
+        self.labels = []
+        self.duplicates = 0
+
+    def __len__(self):
+        return len(self.sizes)
+
+    def _band_keys(self, signature):
+        rows = self.rows
+        return [hash(tuple(signature[i:i + rows])) for i in range(0, self.size, rows)]
+
+    def leader_signature(self, leader):
+        return self._signatures[leader * self.size:(leader + 1) * self.size]
+
+    def find(self, signature):
+        """(leader, similarity) of the most similar leader at or above the threshold, or None"""
+        best = None
+        seen = set()
+        for band, key in enumerate(self._band_keys(signature)):
+            leader = self._buckets[band].get(key)
+            if leader is None or leader in seen:
+                continue
+            seen.add(leader)
+            score = similarity(signature, self.leader_signature(leader))
+            if score >= self.threshold and (best is None or score > best[1]):
+                best = (leader, score)
+        return best
+
+    def add(self, signature, label=None):
+        """Start a new cluster led by signature; returns its leader number"""
+        leader = len(self.sizes)
+        self._signatures.extend(signature)
+        self.sizes.append(1)
+        self.labels.append(label)
+        for band, key in enumerate(self._band_keys(signature)):
+            self._buckets[band].setdefault(key, leader)
+        return leader
+
+    def join(self, leader):
+        """Count one more near-duplicate in leader's cluster"""
+        self.sizes[leader] += 1
+        self.duplicates += 1
+
+    def assign(self, signature, label=None):
+        """Cluster a call: returns (leader, True) for a near-duplicate, else (new leader, False)"""
+        found = self.find(signature)
+        if found is not None:
+            self.join(found[0])
+            return found[0], True
+        return self.add(signature, label), False
+
+    def largest(self, n):
+        """(label, size) of the n largest clusters"""
+        order = sorted(range(len(self.sizes)), key=lambda leader: -self.sizes[leader])[:n]
+        return [(self.labels[leader], self.sizes[leader]) for leader in order]
+
+
+def iter_corpus_calls(paths):
+    """(header, texts, speakers) for each call in transcript or JSON Lines corpus files
+
+    header has call_id, company, vertical, call_type (normalized) and the
+    utterance times; paths may include compressed shards and shard manifests.
+    Files are scanned call by call, so memory doesn't grow with the corpus.
+    """
+    for path in expand_sources(paths):
+        buf = open_source(path)
+        if buf[:1] == b"{":
+            start = 0
+            while start < len(buf):
+                end = buf.find(b"\n", start)
+                if end == -1:
+                    end = len(buf)
+                line = buf[start:end]
+                start = end + 1
+                if not line.strip():
+                    continue
+                doc = json.loads(line)
+                participants = doc["participants"]
+                utterances = doc.get("utterances", [])
+                header = {"call_id": doc.get("call_id"), "company": doc.get("company"),
+                          "vertical": doc.get("vertical"), "call_type": normalize_call_type(doc.get("call_type")),
+                          "times": [u["time_sec"] for u in utterances]}
+                yield (header, [u["text"] for u in utterances],
+                       [participants[u["speaker"]] for u in utterances])
+            continue
+        for _, header_end, end, header in iter_call_spans(buf):
+            utterances = parse_utterances(buf[header_end:end])
+            header = {"call_id": header.get("call_id"), "company": header.get("company"),
+                      "vertical": header.get("vertical"), "call_type": normalize_call_type(header.get("call_type")),
+                      "times": [t for t, _, _ in utterances]}
+            yield header, [text for _, _, text in utterances], [speaker for _, speaker, _ in utterances]
+
+
+def entropy(counter):
+    """Shannon entropy in bits of a Counter's distribution"""
+    total = sum(counter.values())
+    if not total:
+        return 0.0
+    return math.log2(total) - sum(c * math.log2(c) for c in counter.values()) / total
+
+
+class DiversityReport:
+    """Streaming diversity metrics and near-duplicate clusters for a corpus"""
+
+    def __init__(self, threshold=DEFAULT_THRESHOLD, word_shingles=0, ngrams=3, entropy_every=1):
+        self.index = NearDuplicateIndex(threshold)
+        self.word_shingles = word_shingles
+        self.ngrams = ngrams
+        self.entropy_every = entropy_every
+        self.calls = 0
+        self.groups = {}
+        # Masked utterance -> occurrences; n-grams don't cross utterances, so
+        # the n-gram counts are expanded from these when the report is made
+        self.line_counts = Counter()
+
+    def add(self, header, texts, speakers):
+        lines = masked_lines(texts, speakers, header.get("company"))
+        line_hashes = shingles(lines)
+        hashes = shingles(lines, self.word_shingles) if self.word_shingles else line_hashes
+        _, duplicate = self.index.assign(minhash(hashes, self.index.size), header.get("call_id"))
+
+        key = (header.get("vertical") or "", header.get("call_type") or "")
+        group = self.groups.get(key)
+        if group is None:
+            group = self.groups[key] = {"calls": 0, "near_duplicates": 0, "combinations": set(), "lines": set()}
+        group["calls"] += 1
+        group["near_duplicates"] += duplicate
+        group["combinations"].add(hash(frozenset(line_hashes)))
+        group["lines"].update(line_hashes)
+
+        if self.calls % self.entropy_every == 0:
+            self.line_counts.update(lines)
+        self.calls += 1
+
+    def ngram_counts(self):
+        """Counter of word n-grams for n = 1..ngrams"""
+        counters = [Counter() for _ in range(self.ngrams)]
+        for line, count in self.line_counts.items():
+            words = tokenize(line)
+            for n, counter in enumerate(counters, 1):
+                for ngram in zip(*(words[i:] for i in range(n))):
+                    counter[ngram] += count
+        return counters
+
+    def report(self, top=10):
+        index = self.index
+        return {
+            "calls": self.calls,
+            "threshold": index.threshold,
+            "lsh": {"bands": index.bands, "rows": index.rows},
+            "clusters": len(index),
+            "near_duplicates": index.duplicates,
+            "near_duplicate_rate": round(index.duplicates / self.calls, 4) if self.calls else 0.0,
+            "groups": [
+                {"vertical": vertical, "call_type": call_type, "calls": group["calls"],
+                 "combinations": len(group["combinations"]), "distinct_utterances": len(group["lines"]),
+                 "near_duplicates": group["near_duplicates"]}
+                for (vertical, call_type), group in sorted(self.groups.items())
+            ],
+            "ngram_entropy": [
+                {"n": n, "entropy_bits": round(entropy(counter), 3), "distinct": len(counter)}
+                for n, counter in enumerate(self.ngram_counts(), 1)
+            ],
+            "largest_clusters": [{"leader_call_id": label, "calls": size} for label, size in index.largest(top)],
+        }
+
+
+def print_report(report):
+    print(f"{report['calls']} calls, {report['clusters']} clusters, {report['near_duplicates']} near-duplicates "
+          f"({report['near_duplicate_rate']:.1%}) at similarity >= {report['threshold']:g} "
+          f"({report['lsh']['bands']} bands x {report['lsh']['rows']} rows)\n")
+    print(f"  {'Vertical / call type':<46} {'calls':>8} {'combos':>8} {'lines':>7} {'near-dups':>10}")
+    for group in report["groups"]:
+        label = f"{group['vertical'] or '?'} / {group['call_type'] or '?'}"
+        rate = group["near_duplicates"] / group["calls"]
+        print(f"  {label:<46} {group['calls']:>8} {group['combinations']:>8} "
+              f"{group['distinct_utterances']:>7} {rate:>10.1%}")
+    print("\nWord n-gram entropy:")
+    for row in report["ngram_entropy"]:
+        print(f"  {row['n']}-grams: {row['entropy_bits']:.2f} bits ({row['distinct']} distinct)")
+    if report["largest_clusters"]:
+        print("\nLargest clusters:")
+        for cluster in report["largest_clusters"]:
+            print(f"  call #{cluster['leader_call_id']}: {cluster['calls']} calls")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Diversity metrics and near-duplicate clusters for a transcript corpus")
+    parser.add_argument("sources", nargs="+", help="transcript or JSON Lines corpora, shards or shard manifests")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help=f"estimated Jaccard similarity at which calls are near-duplicates (default: {DEFAULT_THRESHOLD})")
+    parser.add_argument("--word-shingles", type=int, default=0, metavar="N",
+                        help="compare calls by word N-grams instead of whole utterances")
+    parser.add_argument("--ngrams", type=int, default=3, help="report entropy of word 1..N-grams (default: 3)")
+    parser.add_argument("--entropy-every", type=int, default=1, metavar="K",
+                        help="count n-grams in every Kth call only (default: 1)")
+    parser.add_argument("--top", type=int, default=10, help="largest clusters to list (default: 10)")
+    parser.add_argument("--save", default=None, help="write the report as JSON")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    diversity = DiversityReport(args.threshold, args.word_shingles, args.ngrams, args.entropy_every)
+    for header, texts, speakers in iter_corpus_calls(args.sources):
+        diversity.add(header, texts, speakers)
+    report = diversity.report(args.top)
+    print_report(report)
+    print(f"\n✓ Analyzed {report['calls']} calls in {time.perf_counter() - started:.1f}s")
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"✓ Report saved to: {args.save}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,7 +1,28 @@
+import argparse
+import hashlib
 import json
+import multiprocessing
+import os
 import random
+import sys
+from collections import Counter
 from datetime import datetime, timedelta
 
+from functools import partial
+
+from call_cache import DEFAULT_MAX_MB, CallCache, entry_key
+from call_record import CHARS_PER_TOKEN, FORMATS, CallRecord, render_header, render_text, rendered_line_size
+from columnar import ColumnarWriter
+from checkpoint import checkpoint_path_for, iter_jsonl, load_checkpoint, save_checkpoint, sync, truncate
+from content_packs import ContentCatalog, ContentPackError
+from corpus_db import CorpusStore
+from dialogue_model import DialogueModel
+from diversity import NearDuplicateIndex, call_signature, iter_corpus_calls
+from phrase_bank import VERTICAL_POOLS, compile_bank
+from profiling import DEFAULT_REPORT, Profiler, print_report
+from shard_writer import COMPRESSORS, ShardWriter
+from transcript_reader import TranscriptCorpus
+
 VERTICALS = {
     "Healthcare": {
         "concerns": ["HIPAA compliance", "patient data security", "EHR integration", "data privacy", "PHI handling", "audit trail requirements"],
@@ -166,6 +187,21 @@ LAST_NAMES = [
     "Thompson", "White", "Harris", "Clark", "Patel", "Chen", "Nakamura", "Okonkwo"
 ]
 
+# Calls handed to each worker process at a time in parallel generation
+POOL_CHUNKSIZE = 64
+
+# Times a near-duplicate is redrawn with --dedup-mode regenerate before it is kept anyway
+DEDUP_ATTEMPTS = 5
+
+# Bump when a change to the generators alters the calls drawn from the same
+# seed and content, so calls cached by older code (call_cache.py) aren't reused
+GENERATOR_VERSION = 1
+
+# Units a SizeTarget can be given in; tokens are estimated from characters
+SIZE_UNITS = ("minutes", "chars", "tokens")
+# Relative error SizeTarget.within() accepts
+DEFAULT_SIZE_TOLERANCE = 0.02
+
 # Call archetypes determine the overall flow of the conversation
 CALL_ARCHETYPES = [
     "problem_discovery",       # Heavy on pain points and current-state problems
@@ -174,31 +210,178 @@ CALL_ARCHETYPES = [
     "mixed",                   # Blend of all three
 ]
 
+# Fixed lines every call contains, keyed by their place in the call
+SCRIPTED_LINES = {
+    "welcome": "Good morning everyone, thanks for joining today's call. I'm {host_name} and I'll be facilitating our discussion on the Foundry IQ implementation for {company}.",
+    "introductions": "Before we jump in, let me do a quick round of introductions so everyone knows who's on the line.",
+    "agenda": "Great. So for today's agenda, I'd like to cover the current challenges you're facing, walk through the Foundry IQ solution approach, and then discuss implementation specifics. Sound good?",
+    "agenda_ack": "Sounds good. I'd also like to make sure we carve out time toward the end to talk about requirements and success criteria.",
+    "kickoff": "Absolutely, we'll make sure we get to that. Let's get started.",
+    "problem_intro": "Let's start by getting a clear picture of the current pain points. Can someone walk us through the biggest challenges you're facing today?",
+    "problem_transition": "That makes sense. What about the other challenges? I know we had a few more items on the list.",
+    "requirements_intro": "Alright, let's shift gears and talk about requirements. I want to make sure we capture both the functional needs - what the system must do - and the non-functional requirements around performance, security, and reliability.",
+    "functional_intro": "Let's start with functional requirements. What are the must-have capabilities for Phase 1?",
+    "nonfunctional_intro": "Good, those functional requirements are solid. Now let's talk about the non-functional side. Performance, scalability, security - what are the hard constraints?",
+    "closing_summary": "We're getting close to time, so let me try to summarize the key takeaways and action items.",
+    "closing_questions": "Great. I'll send out meeting notes and the follow-up calendar invite today. Any final questions before we wrap?",
+    "goodbye": "Thanks everyone. Talk to you next week. Have a great rest of your day.",
+}
+
+# Phrase pools used by the segment generators. Entries with {placeholders}
+# are filled in per call with str.format().
+OPENING_INTROS = [
+    "Hi everyone, {name} here. I'm the {role} on this engagement. Excited to be part of this.",
+    "Hey team, I'm {name}, serving as {role}. Looking forward to a productive session.",
+    "Good morning. {name}, {role}. I've been working closely with the {company} team on the pre-work for this.",
+    "Hi, {name} here, {role}. Happy to dive into the details today.",
+]
+
+PROBLEM_FOLLOWUPS = [
+    "Can you quantify the business impact of that? Like, what does that translate to in terms of revenue or operational cost?",
+    "How long has this been a problem? And what have you tried so far to address it?",
+    "Is that affecting all teams equally or are certain groups hit harder than others?",
+    "Walk me through a specific example. What does that look like day-to-day for your team?",
+    "And that's with your current tooling? What are you using today for that workflow?",
+]
+
+IMPACT_RESPONSES = [
+    "We estimate it's costing us roughly $1.5 million annually in lost productivity alone. And that doesn't account for the downstream effects on customer satisfaction.",
+    "It's been building for about 18 months. We did a POC with another vendor last year but it didn't scale past the pilot phase. That's why we're looking at Foundry IQ now.",
+    "The operations team is definitely hit the hardest. They're the ones dealing with the manual workarounds every single day. But it cascades - leadership can't get accurate reports either.",
+    "Sure. Just last week, we had a situation where the data was 36 hours stale. The team made a decision based on that data and it cost us a significant customer escalation.",
+    "We're using a mix of custom scripts, some legacy ETL tools, and honestly a lot of Excel. It's not sustainable and everyone knows it.",
+]
+
+FOUNDRY_BRIDGES = [
+    "This is actually a great use case for Foundry IQ's ontology layer. By unifying the data model, we can eliminate a lot of those manual reconciliation steps.",
+    "I've seen Foundry IQ address exactly this kind of challenge at other organizations. The key is getting the data integration right from the start.",
+    "So one of the things Foundry IQ does really well is handle that data fragmentation problem. The platform's designed to bring together heterogeneous data sources into a coherent model.",
+    "That's helpful context. From a Foundry IQ perspective, we'd approach this by first building a comprehensive ontology that maps all those data relationships.",
+]
+
+REQUIREMENT_DISCUSSIONS = [
+    "That's clear. From an implementation standpoint, Foundry IQ can support that through the Pipeline Builder. We'd configure the data flows to match those specifications.",
+    "Got it. I want to flag that one as high priority. Can we put a hard requirement around that in the design document?",
+    "Makes sense. We should also think about how that requirement evolves over the next 12-18 months. Is that scope likely to expand?",
+    "Noted. I'll map that to the specific Foundry IQ modules we'll need to configure. That touches the ontology layer and possibly the Workshop application.",
+    "Good. Let me make sure I understand the acceptance criteria there. Are we talking about a binary pass/fail or are there graduated levels of compliance?",
+    "I agree that's critical. We'll want to build automated tests around that requirement so we can validate it continuously as the platform evolves.",
+]
+
+NFR_DISCUSSIONS = [
+    "That's a rigorous target. We'll need to validate that during the load testing phase. I'd suggest we build performance benchmarks into the acceptance criteria.",
+    "Understood. Foundry IQ's architecture is designed to meet that kind of SLA. We'll document the specific configuration needed to achieve it.",
+    "I want to make sure we're being realistic there. Let me check with the infrastructure team on what's achievable with the current resource allocation.",
+    "That aligns with what I've seen in similar deployments. We should plan for capacity testing early in the implementation timeline.",
+    "Critical requirement. I'll make sure we build monitoring dashboards in Foundry IQ that track this metric continuously so we can catch any degradation early.",
+    "Noted. That's a hard constraint, not a nice-to-have. We'll design the architecture with that as a non-negotiable baseline.",
+]
+
+ARCHITECTURE_DISCUSSIONS = [
+    "Let's talk about the architecture for {use_case}. I'm proposing a three-tier approach within Foundry IQ: raw ingestion layer, a transformation layer, and then the ontology-backed application layer.",
+    "For the ingestion layer, we'll set up connectors to all your source systems. Foundry IQ supports both batch and streaming ingestion, so we can configure each source based on its latency requirements.",
+    "The transformation layer is where the heavy lifting happens. We'll use Foundry IQ's Code Repositories to write and version-control all our data transformations. Everything runs as managed Spark jobs.",
+    "On the {concern} front, we need to implement data classification at the ontology level. Foundry IQ has a tagging system that lets us mark sensitive fields and automatically enforce access policies.",
+    "I want to walk through the data model. We've identified about 20 core object types in the ontology. Each one maps to a business entity and has defined relationships to other objects.",
+    "For the application layer, I'm recommending we use Workshop to build the operational interfaces. It gives us the flexibility to create custom workflows without a full frontend development cycle.",
+    "We should discuss the build pipeline. I'm thinking we use incremental builds wherever possible to keep compute costs down. Foundry IQ's build scheduler is quite sophisticated for dependency management.",
+    "What about the API layer? We'll need external systems to both push data in and pull insights out. The Foundry IQ API supports both REST and GraphQL patterns.",
+    "One thing I want to flag is the importance of getting the ontology right. In my experience, about 60% of implementation issues trace back to an ontology that doesn't accurately represent the business domain.",
+    "Let's talk about monitoring and observability. We need to instrument the pipelines so we know immediately when data quality drops or a pipeline fails.",
+    "For the Quiver analytics layer, we should pre-compute the most common aggregations. This gives us sub-second query performance for the dashboards that get the most traffic.",
+    "I'm recommending we implement a medallion architecture - bronze for raw data, silver for cleaned and conformed data, and gold for business-ready aggregations and ontology objects.",
+    "We also need to plan for data lifecycle management. Not everything needs to live in hot storage forever. Foundry IQ supports tiered storage policies.",
+    "For the {use_case} workflow specifically, I want to build a feedback loop where the model outputs are validated against actual outcomes and the model is retrained on a configurable schedule.",
+    "Let's talk about environments. We'll need at least three - development, staging, and production. Foundry IQ supports project-level isolation which maps well to this.",
+    "Security architecture is critical here. I'm proposing we implement project-level RBAC, field-level access controls on the ontology, and network-level isolation for the production environment.",
+    "One architecture decision we need to make is whether to use Foundry IQ's native compute or bring our own Kubernetes cluster. There are trade-offs either way.",
+    "For the CI/CD pipeline, I'm recommending we use Foundry IQ's Checks framework to run automated data quality validations on every build before promoting to production.",
+]
+
+ARCHITECTURE_CLARIFICATIONS = [
+    "Can you elaborate on that? How does that compare to the approach we discussed in the pre-call?",
+    "That makes sense. One question though - how does that handle the edge case where we have conflicting data from two different sources?",
+    "I like that approach. Have you seen that pattern work at this scale before?",
+    "Agreed. Let me add that to the architecture decision record so we have it documented.",
+    "Good point. We should validate that assumption during the POC phase before committing to it for the full rollout.",
+    "Quick question on that - does Foundry IQ support that natively or would we need to build a custom extension?",
+]
+
+ACTION_ITEMS = [
+    "I'll circulate the updated architecture diagram and ontology mapping by end of week for everyone to review.",
+    "We need to finalize the data source inventory and get access credentials for the development environment.",
+    "I'll draft the requirements document based on today's discussion and send it out for review by Thursday.",
+    "Let's schedule a follow-up session specifically focused on the security and compliance architecture.",
+    "I'll set up the Foundry IQ development environment so the team can start hands-on exploration.",
+    "We should loop in the infrastructure team for the next call to discuss compute provisioning and network configuration.",
+]
+
+CLOSING_REMARKS = [
+    "No, I think we covered a lot of ground today. Really productive session. Thanks everyone.",
+    "Just want to say this was a great discussion. I feel much more confident about the Foundry IQ approach now.",
+    "Nothing from my side. Appreciate everyone's time. Looking forward to the next steps.",
+    "All good here. Let's keep the momentum going. Excited to see this come together.",
+]
+
+# Every phrase above compiled once into id-keyed templates; the generators
+# pick phrase ids and only format the templates that have slots
+PHRASES = compile_bank(SCRIPTED_LINES, {
+    "opening_intros": OPENING_INTROS,
+    "problem_followups": PROBLEM_FOLLOWUPS,
+    "impact_responses": IMPACT_RESPONSES,
+    "foundry_bridges": FOUNDRY_BRIDGES,
+    "requirement_discussions": REQUIREMENT_DISCUSSIONS,
+    "nfr_discussions": NFR_DISCUSSIONS,
+    "architecture_discussions": ARCHITECTURE_DISCUSSIONS,
+    "architecture_clarifications": ARCHITECTURE_CLARIFICATIONS,
+    "action_items": ACTION_ITEMS,
+    "closing_remarks": CLOSING_REMARKS,
+}, VERTICALS)
+PHRASE_TEMPLATES = PHRASES.templates
+
+# Verticals calls rotate through, in order; see use_content()
+ACTIVE_VERTICALS = list(VERTICALS)
+BUILTIN_ARCHETYPES = tuple(CALL_ARCHETYPES)
+
+# (pack paths, verticals) last applied by use_content(), so pool workers
+# that inherited it through fork don't apply it a second time
+_applied_content = ((), None)
+
+# DialogueModel used by engine="model", and the path it was loaded from;
+# see use_dialogue_model()
+_dialogue_model = None
+_applied_model = None
+
+# content_fingerprint() by (engine, vertical); cleared whenever the content changes
+_fingerprints = {}
+
 def generate_timestamp(base_time, seconds):
     """Generate timestamp in MM:SS format"""
     minutes = seconds // 60
     secs = seconds % 60
     return f"{minutes:02d}:{secs:02d}"
 
-def generate_participant_name(role):
+def generate_participant_name(role, rng=random):
     """Generate a participant with name and role"""
-    first = random.choice(FIRST_NAMES)
-    last = random.choice(LAST_NAMES)
+    first = rng.choice(FIRST_NAMES)
+    last = rng.choice(LAST_NAMES)
     return f"{first} {last} ({role})"
 
-def pick_speaker(participants, last_speaker=None):
+def pick_speaker(participants, last_speaker=None, rng=random):
     """Pick a speaker, slightly biased away from the last speaker for realism"""
-    if last_speaker and len(participants) > 2 and random.random() < 0.7:
+    if last_speaker and len(participants) > 2 and rng.random() < 0.7:
         candidates = [p for p in participants if p != last_speaker]
-        return random.choice(candidates)
-    return random.choice(participants)
+        return rng.choice(candidates)
+    return rng.choice(participants)
 
-def append_line(lines, current_time, speaker, text, pause_range=(12, 25)):
-    """Append a dialogue line and advance the clock"""
-    lines.append((current_time, speaker, text))
-    return current_time + random.randint(*pause_range)
+def append_line(lines, current_time, speaker, phrase_id, pause_range=(12, 25), rng=random, **slots):
+    """Append a dialogue line from the phrase bank and advance the clock"""
+    # Only phrases compiled with slots are formatted, so literal braces elsewhere are left alone
+    text = PHRASES.phrases[phrase_id].fill(slots)
+    lines.append((current_time, speaker, text, phrase_id))
+    return current_time + rng.randint(*pause_range)
 
-def generate_opening(participants, company, vertical):
+def generate_opening(participants, company, vertical, rng=random):
     """Generate call opening with agenda setting"""
     host = participants[0]
     host_name = host.split(" (")[0]
@@ -206,35 +389,30 @@ def generate_opening(participants, company, vertical):
     lines = []
     t = 0
     t = append_line(lines, t, host,
-        f"Good morning everyone, thanks for joining today's call. I'm {host_name} and I'll be facilitating our discussion on the Foundry IQ implementation for {company}.", (8, 12))
+        PHRASES.scripted("welcome"), (8, 12), rng=rng, host_name=host_name, company=company)
     t = append_line(lines, t, host,
-        "Before we jump in, let me do a quick round of introductions so everyone knows who's on the line.", (6, 10))
+        PHRASES.scripted("introductions"), (6, 10), rng=rng)
 
     for p in participants[1:]:
         name = p.split(" (")[0]
         role = p.split("(")[1].rstrip(")")
-        intros = [
-            f"Hi everyone, {name} here. I'm the {role} on this engagement. Excited to be part of this.",
-            f"Hey team, I'm {name}, serving as {role}. Looking forward to a productive session.",
-            f"Good morning. {name}, {role}. I've been working closely with the {company} team on the pre-work for this.",
-            f"Hi, {name} here, {role}. Happy to dive into the details today.",
-        ]
-        t = append_line(lines, t, p, random.choice(intros), (5, 8))
+        intro = rng.choice(PHRASES.pool("opening_intros"))
+        t = append_line(lines, t, p, intro, (5, 8), rng=rng, name=name, role=role, company=company)
 
     t = append_line(lines, t, host,
-        "Great. So for today's agenda, I'd like to cover the current challenges you're facing, walk through the Foundry IQ solution approach, and then discuss implementation specifics. Sound good?", (8, 12))
+        PHRASES.scripted("agenda"), (8, 12), rng=rng)
 
-    affirmer = random.choice(participants[1:])
+    affirmer = rng.choice(participants[1:])
     t = append_line(lines, t, affirmer,
-        "Sounds good. I'd also like to make sure we carve out time toward the end to talk about requirements and success criteria.", (6, 10))
+        PHRASES.scripted("agenda_ack"), (6, 10), rng=rng)
 
     t = append_line(lines, t, host,
-        "Absolutely, we'll make sure we get to that. Let's get started.", (5, 8))
+        PHRASES.scripted("kickoff"), (5, 8), rng=rng)
 
     return lines, t
 
 
-def generate_problem_segment(participants, vertical_data, start_time):
+def generate_problem_segment(participants, vertical, start_time, rng=random):
     """Generate a problem-articulation segment"""
     lines = []
     t = start_time
@@ -242,56 +420,37 @@ def generate_problem_segment(participants, vertical_data, start_time):
 
     facilitator = participants[0]
     t = append_line(lines, t, facilitator,
-        "Let's start by getting a clear picture of the current pain points. Can someone walk us through the biggest challenges you're facing today?", (10, 15))
+        PHRASES.scripted("problem_intro"), (10, 15), rng=rng)
 
     # Pick 2 problems and discuss them in depth
-    problems = random.sample(vertical_data["problems"], min(2, len(vertical_data["problems"])))
+    problem_pool = PHRASES.pool(f"{vertical}.problems")
+    problems = rng.sample(problem_pool, min(2, len(problem_pool)))
 
     for i, problem in enumerate(problems):
-        speaker = pick_speaker(participants[1:], last_speaker)
+        speaker = pick_speaker(participants[1:], last_speaker, rng=rng)
         last_speaker = speaker
-        t = append_line(lines, t, speaker, problem, (15, 22))
+        t = append_line(lines, t, speaker, problem, (15, 22), rng=rng)
 
         # Follow-up questions and deeper discussion
-        questioner = pick_speaker(participants, speaker)
-        followups = [
-            "Can you quantify the business impact of that? Like, what does that translate to in terms of revenue or operational cost?",
-            "How long has this been a problem? And what have you tried so far to address it?",
-            "Is that affecting all teams equally or are certain groups hit harder than others?",
-            "Walk me through a specific example. What does that look like day-to-day for your team?",
-            "And that's with your current tooling? What are you using today for that workflow?",
-        ]
-        t = append_line(lines, t, questioner, random.choice(followups), (12, 18))
-
-        responder = pick_speaker(participants, questioner)
-        impact_responses = [
-            f"We estimate it's costing us roughly $1.5 million annually in lost productivity alone. And that doesn't account for the downstream effects on customer satisfaction.",
-            f"It's been building for about 18 months. We did a POC with another vendor last year but it didn't scale past the pilot phase. That's why we're looking at Foundry IQ now.",
-            f"The operations team is definitely hit the hardest. They're the ones dealing with the manual workarounds every single day. But it cascades - leadership can't get accurate reports either.",
-            f"Sure. Just last week, we had a situation where the data was 36 hours stale. The team made a decision based on that data and it cost us a significant customer escalation.",
-            f"We're using a mix of custom scripts, some legacy ETL tools, and honestly a lot of Excel. It's not sustainable and everyone knows it.",
-        ]
-        t = append_line(lines, t, responder, random.choice(impact_responses), (15, 22))
+        questioner = pick_speaker(participants, speaker, rng=rng)
+        t = append_line(lines, t, questioner, rng.choice(PHRASES.pool("problem_followups")), (12, 18), rng=rng)
+
+        responder = pick_speaker(participants, questioner, rng=rng)
+        t = append_line(lines, t, responder, rng.choice(PHRASES.pool("impact_responses")), (15, 22), rng=rng)
 
         # Someone connects it to Foundry IQ
-        connector = pick_speaker(participants, responder)
-        bridges = [
-            "This is actually a great use case for Foundry IQ's ontology layer. By unifying the data model, we can eliminate a lot of those manual reconciliation steps.",
-            "I've seen Foundry IQ address exactly this kind of challenge at other organizations. The key is getting the data integration right from the start.",
-            "So one of the things Foundry IQ does really well is handle that data fragmentation problem. The platform's designed to bring together heterogeneous data sources into a coherent model.",
-            "That's helpful context. From a Foundry IQ perspective, we'd approach this by first building a comprehensive ontology that maps all those data relationships.",
-        ]
-        t = append_line(lines, t, connector, random.choice(bridges), (12, 18))
+        connector = pick_speaker(participants, responder, rng=rng)
+        t = append_line(lines, t, connector, rng.choice(PHRASES.pool("foundry_bridges")), (12, 18), rng=rng)
 
         if i < len(problems) - 1:
-            transition = pick_speaker(participants, connector)
+            transition = pick_speaker(participants, connector, rng=rng)
             t = append_line(lines, t, transition,
-                "That makes sense. What about the other challenges? I know we had a few more items on the list.", (8, 12))
+                PHRASES.scripted("problem_transition"), (8, 12), rng=rng)
 
     return lines, t
 
 
-def generate_requirements_segment(participants, vertical_data, start_time):
+def generate_requirements_segment(participants, vertical, start_time, rng=random):
     """Generate functional and non-functional requirements discussion"""
     lines = []
     t = start_time
@@ -299,111 +458,72 @@ def generate_requirements_segment(participants, vertical_data, start_time):
 
     facilitator = participants[0]
     t = append_line(lines, t, facilitator,
-        "Alright, let's shift gears and talk about requirements. I want to make sure we capture both the functional needs - what the system must do - and the non-functional requirements around performance, security, and reliability.", (12, 16))
+        PHRASES.scripted("requirements_intro"), (12, 16), rng=rng)
 
     # --- Functional Requirements ---
     t = append_line(lines, t, facilitator,
-        "Let's start with functional requirements. What are the must-have capabilities for Phase 1?", (8, 12))
+        PHRASES.scripted("functional_intro"), (8, 12), rng=rng)
 
-    func_reqs = random.sample(vertical_data["functional_reqs"], min(4, len(vertical_data["functional_reqs"])))
+    func_pool = PHRASES.pool(f"{vertical}.functional_reqs")
+    func_reqs = rng.sample(func_pool, min(4, len(func_pool)))
     for req in func_reqs:
-        speaker = pick_speaker(participants[1:], last_speaker)
+        speaker = pick_speaker(participants[1:], last_speaker, rng=rng)
         last_speaker = speaker
-        t = append_line(lines, t, speaker, req, (15, 22))
+        t = append_line(lines, t, speaker, req, (15, 22), rng=rng)
 
         # Discussion around the requirement
-        discusser = pick_speaker(participants, speaker)
-        req_discussions = [
-            "That's clear. From an implementation standpoint, Foundry IQ can support that through the Pipeline Builder. We'd configure the data flows to match those specifications.",
-            "Got it. I want to flag that one as high priority. Can we put a hard requirement around that in the design document?",
-            "Makes sense. We should also think about how that requirement evolves over the next 12-18 months. Is that scope likely to expand?",
-            "Noted. I'll map that to the specific Foundry IQ modules we'll need to configure. That touches the ontology layer and possibly the Workshop application.",
-            "Good. Let me make sure I understand the acceptance criteria there. Are we talking about a binary pass/fail or are there graduated levels of compliance?",
-            "I agree that's critical. We'll want to build automated tests around that requirement so we can validate it continuously as the platform evolves.",
-        ]
-        t = append_line(lines, t, discusser, random.choice(req_discussions), (12, 18))
+        discusser = pick_speaker(participants, speaker, rng=rng)
+        t = append_line(lines, t, discusser, rng.choice(PHRASES.pool("requirement_discussions")), (12, 18), rng=rng)
 
     # Transition to non-functional
-    transitioner = pick_speaker(participants)
+    transitioner = pick_speaker(participants, rng=rng)
     t = append_line(lines, t, transitioner,
-        "Good, those functional requirements are solid. Now let's talk about the non-functional side. Performance, scalability, security - what are the hard constraints?", (10, 14))
+        PHRASES.scripted("nonfunctional_intro"), (10, 14), rng=rng)
 
     # --- Non-Functional Requirements ---
-    nonfunc_reqs = random.sample(vertical_data["nonfunctional_reqs"], min(4, len(vertical_data["nonfunctional_reqs"])))
+    nonfunc_pool = PHRASES.pool(f"{vertical}.nonfunctional_reqs")
+    nonfunc_reqs = rng.sample(nonfunc_pool, min(4, len(nonfunc_pool)))
     for req in nonfunc_reqs:
-        speaker = pick_speaker(participants[1:], last_speaker)
+        speaker = pick_speaker(participants[1:], last_speaker, rng=rng)
         last_speaker = speaker
-        t = append_line(lines, t, speaker, req, (15, 22))
-
-        discusser = pick_speaker(participants, speaker)
-        nfr_discussions = [
-            "That's a rigorous target. We'll need to validate that during the load testing phase. I'd suggest we build performance benchmarks into the acceptance criteria.",
-            "Understood. Foundry IQ's architecture is designed to meet that kind of SLA. We'll document the specific configuration needed to achieve it.",
-            "I want to make sure we're being realistic there. Let me check with the infrastructure team on what's achievable with the current resource allocation.",
-            "That aligns with what I've seen in similar deployments. We should plan for capacity testing early in the implementation timeline.",
-            "Critical requirement. I'll make sure we build monitoring dashboards in Foundry IQ that track this metric continuously so we can catch any degradation early.",
-            "Noted. That's a hard constraint, not a nice-to-have. We'll design the architecture with that as a non-negotiable baseline.",
-        ]
-        t = append_line(lines, t, discusser, random.choice(nfr_discussions), (12, 18))
+        t = append_line(lines, t, speaker, req, (15, 22), rng=rng)
+
+        discusser = pick_speaker(participants, speaker, rng=rng)
+        t = append_line(lines, t, discusser, rng.choice(PHRASES.pool("nfr_discussions")), (12, 18), rng=rng)
 
     return lines, t
 
 
-def generate_architecture_segment(participants, vertical_data, start_time):
+def generate_architecture_segment(participants, vertical, start_time, rng=random):
     """Generate a deep technical architecture discussion"""
     lines = []
     t = start_time
     last_speaker = None
 
-    concern = random.choice(vertical_data["concerns"])
-    use_case = random.choice(vertical_data["use_cases"])
-
-    architecture_discussions = [
-        f"Let's talk about the architecture for {use_case}. I'm proposing a three-tier approach within Foundry IQ: raw ingestion layer, a transformation layer, and then the ontology-backed application layer.",
-        "For the ingestion layer, we'll set up connectors to all your source systems. Foundry IQ supports both batch and streaming ingestion, so we can configure each source based on its latency requirements.",
-        "The transformation layer is where the heavy lifting happens. We'll use Foundry IQ's Code Repositories to write and version-control all our data transformations. Everything runs as managed Spark jobs.",
-        f"On the {concern} front, we need to implement data classification at the ontology level. Foundry IQ has a tagging system that lets us mark sensitive fields and automatically enforce access policies.",
-        "I want to walk through the data model. We've identified about 20 core object types in the ontology. Each one maps to a business entity and has defined relationships to other objects.",
-        "For the application layer, I'm recommending we use Workshop to build the operational interfaces. It gives us the flexibility to create custom workflows without a full frontend development cycle.",
-        "We should discuss the build pipeline. I'm thinking we use incremental builds wherever possible to keep compute costs down. Foundry IQ's build scheduler is quite sophisticated for dependency management.",
-        "What about the API layer? We'll need external systems to both push data in and pull insights out. The Foundry IQ API supports both REST and GraphQL patterns.",
-        "One thing I want to flag is the importance of getting the ontology right. In my experience, about 60% of implementation issues trace back to an ontology that doesn't accurately represent the business domain.",
-        "Let's talk about monitoring and observability. We need to instrument the pipelines so we know immediately when data quality drops or a pipeline fails.",
-        "For the Quiver analytics layer, we should pre-compute the most common aggregations. This gives us sub-second query performance for the dashboards that get the most traffic.",
-        "I'm recommending we implement a medallion architecture - bronze for raw data, silver for cleaned and conformed data, and gold for business-ready aggregations and ontology objects.",
-        "We also need to plan for data lifecycle management. Not everything needs to live in hot storage forever. Foundry IQ supports tiered storage policies.",
-        f"For the {use_case} workflow specifically, I want to build a feedback loop where the model outputs are validated against actual outcomes and the model is retrained on a configurable schedule.",
-        "Let's talk about environments. We'll need at least three - development, staging, and production. Foundry IQ supports project-level isolation which maps well to this.",
-        "Security architecture is critical here. I'm proposing we implement project-level RBAC, field-level access controls on the ontology, and network-level isolation for the production environment.",
-        "One architecture decision we need to make is whether to use Foundry IQ's native compute or bring our own Kubernetes cluster. There are trade-offs either way.",
-        "For the CI/CD pipeline, I'm recommending we use Foundry IQ's Checks framework to run automated data quality validations on every build before promoting to production.",
-    ]
-
-    random.shuffle(architecture_discussions)
-    selected = architecture_discussions[:random.randint(12, 16)]
-
-    for text in selected:
-        speaker = pick_speaker(participants, last_speaker)
+    vertical_data = VERTICALS[vertical]
+    concern = rng.choice(vertical_data["concerns"])
+    use_case = rng.choice(vertical_data["use_cases"])
+
+    # Shuffling the ids draws the same permutation the full phrase list would;
+    # only the 12-16 kept phrases get their slots filled
+    architecture_discussions = list(PHRASES.pool("architecture_discussions"))
+    rng.shuffle(architecture_discussions)
+    selected = architecture_discussions[:rng.randint(12, 16)]
+
+    for phrase_id in selected:
+        speaker = pick_speaker(participants, last_speaker, rng=rng)
         last_speaker = speaker
-        t = append_line(lines, t, speaker, text, (14, 22))
+        t = append_line(lines, t, speaker, phrase_id, (14, 22), rng=rng, use_case=use_case, concern=concern)
 
         # ~40% chance of a follow-up question/clarification
-        if random.random() < 0.4:
-            responder = pick_speaker(participants, speaker)
-            clarifications = [
-                "Can you elaborate on that? How does that compare to the approach we discussed in the pre-call?",
-                "That makes sense. One question though - how does that handle the edge case where we have conflicting data from two different sources?",
-                "I like that approach. Have you seen that pattern work at this scale before?",
-                "Agreed. Let me add that to the architecture decision record so we have it documented.",
-                "Good point. We should validate that assumption during the POC phase before committing to it for the full rollout.",
-                "Quick question on that - does Foundry IQ support that natively or would we need to build a custom extension?",
-            ]
-            t = append_line(lines, t, responder, random.choice(clarifications), (12, 18))
+        if rng.random() < 0.4:
+            responder = pick_speaker(participants, speaker, rng=rng)
+            t = append_line(lines, t, responder, rng.choice(PHRASES.pool("architecture_clarifications")), (12, 18), rng=rng)
 
     return lines, t
 
 
-def generate_closing(participants, start_time):
+def generate_closing(participants, start_time, rng=random):
     """Generate call closing with action items"""
     lines = []
     t = start_time
@@ -412,157 +532,866 @@ def generate_closing(participants, start_time):
     fac_name = facilitator.split(" (")[0]
 
     t = append_line(lines, t, facilitator,
-        "We're getting close to time, so let me try to summarize the key takeaways and action items.", (8, 12))
-
-    action_items = [
-        f"I'll circulate the updated architecture diagram and ontology mapping by end of week for everyone to review.",
-        "We need to finalize the data source inventory and get access credentials for the development environment.",
-        "I'll draft the requirements document based on today's discussion and send it out for review by Thursday.",
-        "Let's schedule a follow-up session specifically focused on the security and compliance architecture.",
-        "I'll set up the Foundry IQ development environment so the team can start hands-on exploration.",
-        "We should loop in the infrastructure team for the next call to discuss compute provisioning and network configuration.",
-    ]
-
-    selected_actions = random.sample(action_items, random.randint(3, 4))
+        PHRASES.scripted("closing_summary"), (8, 12), rng=rng)
+
+    selected_actions = rng.sample(PHRASES.pool("action_items"), rng.randint(3, 4))
     for action in selected_actions:
-        speaker = pick_speaker(participants)
-        t = append_line(lines, t, speaker, action, (10, 15))
+        speaker = pick_speaker(participants, rng=rng)
+        t = append_line(lines, t, speaker, action, (10, 15), rng=rng)
 
     t = append_line(lines, t, facilitator,
-        "Great. I'll send out meeting notes and the follow-up calendar invite today. Any final questions before we wrap?", (8, 12))
+        PHRASES.scripted("closing_questions"), (8, 12), rng=rng)
 
-    closer = pick_speaker(participants[1:])
-    closing_remarks = [
-        "No, I think we covered a lot of ground today. Really productive session. Thanks everyone.",
-        "Just want to say this was a great discussion. I feel much more confident about the Foundry IQ approach now.",
-        "Nothing from my side. Appreciate everyone's time. Looking forward to the next steps.",
-        "All good here. Let's keep the momentum going. Excited to see this come together.",
-    ]
-    t = append_line(lines, t, closer, random.choice(closing_remarks), (6, 10))
+    closer = pick_speaker(participants[1:], rng=rng)
+    t = append_line(lines, t, closer, rng.choice(PHRASES.pool("closing_remarks")), (6, 10), rng=rng)
 
     t = append_line(lines, t, facilitator,
-        f"Thanks everyone. Talk to you next week. Have a great rest of your day.", (5, 8))
+        PHRASES.scripted("goodbye"), (5, 8), rng=rng)
 
     return lines, t
 
 
-def generate_call(call_id, vertical, archetype):
-    """Generate a single fake customer call targeting ~10 minutes"""
-    vertical_data = VERTICALS[vertical]
-    company = random.choice(COMPANIES)
+# Main body of each archetype, in order (~7-8 min); anything else is mixed
+ARCHETYPE_SEGMENTS = {
+    "problem_discovery": (generate_problem_segment, generate_architecture_segment),
+    # Brief problem context then deep requirements
+    "requirements_gathering": (generate_problem_segment, generate_requirements_segment),
+    "architecture_review": (generate_architecture_segment, generate_requirements_segment),
+    "mixed": (generate_problem_segment, generate_requirements_segment, generate_architecture_segment),
+}
 
-    num_participants = random.randint(3, 5)
-    selected_roles = random.sample(PARTICIPANT_ROLES, num_participants)
-    participants = [generate_participant_name(role) for role in selected_roles]
 
-    transcript = []
+def pick_participants(rng=random):
+    """Company and 3-5 participants with distinct roles"""
+    company = rng.choice(COMPANIES)
+    num_participants = rng.randint(3, 5)
+    selected_roles = rng.sample(PARTICIPANT_ROLES, num_participants)
+    participants = [generate_participant_name(role, rng=rng) for role in selected_roles]
+    return company, participants
 
-    # Opening (~1-1.5 min)
-    opening_lines, t = generate_opening(participants, company, vertical)
-    transcript.extend(opening_lines)
 
-    # Main body based on archetype (~7-8 min)
-    if archetype == "problem_discovery":
-        seg, t = generate_problem_segment(participants, vertical_data, t)
-        transcript.extend(seg)
-        seg, t = generate_architecture_segment(participants, vertical_data, t)
-        transcript.extend(seg)
+def build_call(call_id, vertical, archetype, rng=random, call_date=None):
+    """Generate a single fake customer call targeting ~10 minutes as a CallRecord"""
+    company, participants = pick_participants(rng=rng)
 
-    elif archetype == "requirements_gathering":
-        # Brief problem context then deep requirements
-        seg, t = generate_problem_segment(participants, vertical_data, t)
-        transcript.extend(seg)
-        seg, t = generate_requirements_segment(participants, vertical_data, t)
-        transcript.extend(seg)
+    transcript = []
 
-    elif archetype == "architecture_review":
-        seg, t = generate_architecture_segment(participants, vertical_data, t)
-        transcript.extend(seg)
-        seg, t = generate_requirements_segment(participants, vertical_data, t)
-        transcript.extend(seg)
+    # Opening (~1-1.5 min)
+    opening_lines, t = generate_opening(participants, company, vertical, rng=rng)
+    transcript.extend(opening_lines)
 
-    else:  # mixed
-        seg, t = generate_problem_segment(participants, vertical_data, t)
-        transcript.extend(seg)
-        seg, t = generate_requirements_segment(participants, vertical_data, t)
-        transcript.extend(seg)
-        seg, t = generate_architecture_segment(participants, vertical_data, t)
+    for segment in ARCHETYPE_SEGMENTS.get(archetype, ARCHETYPE_SEGMENTS["mixed"]):
+        seg, t = segment(participants, vertical, t, rng=rng)
         transcript.extend(seg)
 
     # Closing (~1 min)
-    closing_lines, t = generate_closing(participants, t)
+    closing_lines, t = generate_closing(participants, t, rng=rng)
     transcript.extend(closing_lines)
 
-    # Format
-    call_transcript = "=" * 80 + "\n"
-    call_transcript += f"CALL #{call_id:03d} - {company} ({vertical})\n"
-    call_transcript += f"Date: {datetime.now().strftime('%Y-%m-%d')}\n"
-    call_transcript += f"Duration: ~{t // 60} minutes\n"
-    call_transcript += f"Participants: {len(participants)}\n"
-    call_transcript += f"Call Type: {archetype.replace('_', ' ').title()}\n"
-    call_transcript += "=" * 80 + "\n\n"
-
-    for time_sec, speaker, text in transcript:
-        timestamp = generate_timestamp(0, time_sec)
-        call_transcript += f"[{timestamp}] {speaker}:\n{text}\n\n"
-
-    return call_transcript, {
-        "call_id": call_id,
-        "company": company,
-        "vertical": vertical,
-        "call_type": archetype,
-        "participants": participants,
-        "duration_seconds": t,
-        "duration_minutes": round(t / 60, 1)
-    }
-
-
-def main():
-    print("Generating 50 fake customer calls for Foundry IQ implementation testing...\n")
-
-    all_transcripts = []
-    metadata = []
-
-    verticals_list = list(VERTICALS.keys())
-
-    for i in range(1, 51):
-        vertical = verticals_list[(i - 1) % len(verticals_list)]
-        archetype = CALL_ARCHETYPES[(i - 1) % len(CALL_ARCHETYPES)]
-        print(f"Generating call {i}/50 ({vertical} - {archetype})...")
-
-        transcript, meta = generate_call(i, vertical, archetype)
-        all_transcripts.append(transcript)
-        metadata.append(meta)
-
-    output_file = "fake_customer_calls_2.txt"
-    with open(output_file, 'w', encoding='utf-8') as f:
-        for transcript in all_transcripts:
-            f.write(transcript)
-            f.write("\n\n")
-
-    metadata_file = "calls_metadata_2.json"
-    with open(metadata_file, 'w', encoding='utf-8') as f:
-        json.dump(metadata, f, indent=2)
-
-    print(f"\n✓ Generated 50 calls successfully!")
-    print(f"✓ Transcripts saved to: {output_file}")
+    if call_date is None:
+        call_date = datetime.now().strftime('%Y-%m-%d')
+
+    return CallRecord.from_lines(call_id, company, vertical, archetype, call_date,
+                                 participants, transcript, t)
+
+
+class SizeTarget:
+    """A call size to generate: minutes of call time, characters of text transcript, or approximate tokens"""
+
+    def __init__(self, unit, value, tolerance=DEFAULT_SIZE_TOLERANCE):
+        if unit not in SIZE_UNITS:
+            raise ValueError(f"unknown size unit {unit!r}; expected one of {SIZE_UNITS}")
+        if value <= 0:
+            raise ValueError("size target must be positive")
+        self.unit = unit
+        self.value = value
+        self.tolerance = tolerance
+
+    def __repr__(self):
+        return f"SizeTarget({self.unit!r}, {self.value}, tolerance={self.tolerance})"
+
+    def goal(self):
+        """The target in the units build_sized_call counts: seconds, or characters"""
+        if self.unit == "minutes":
+            return self.value * 60
+        return self.value * CHARS_PER_TOKEN if self.unit == "tokens" else self.value
+
+    def measure(self, call, text=None):
+        """Size of a generated call in the target's unit; text is its render_text() if already rendered"""
+        if self.unit == "minutes":
+            return call.duration_seconds / 60
+        chars = len(text if text is not None else render_text(call))
+        return chars / CHARS_PER_TOKEN if self.unit == "tokens" else chars
+
+    def within(self, size):
+        return abs(size - self.value) <= self.tolerance * self.value
+
+
+def build_sized_call(call_id, vertical, archetype, target, rng=random, call_date=None):
+    """Generate a call grown or cut to a SizeTarget, as a CallRecord
+
+    The archetype's body segments repeat as extra discussion rounds until
+    the running size estimate - seconds, or characters from
+    rendered_line_size() - reaches the target. The closing is drawn first so
+    its size is known, and the last round is cut at the line boundary nearest
+    the target, so a call lands within half a line of it.
+    """
+    company, participants = pick_participants(rng=rng)
+    if call_date is None:
+        call_date = datetime.now().strftime('%Y-%m-%d')
+    count_chars = target.unit != "minutes"
+
+    def sizes(lines, end_time):
+        """Size of each line: its rendered characters, or the pause after it"""
+        if count_chars:
+            return [rendered_line_size(time_sec, speaker, text) for time_sec, speaker, text, _ in lines]
+        times = [line[0] for line in lines] + [end_time]
+        return [b - a for a, b in zip(times, times[1:])]
+
+    transcript, t = generate_opening(participants, company, vertical, rng=rng)
+    closing, closing_seconds = generate_closing(participants, 0, rng=rng)
+    size = sum(sizes(transcript, t)) + sum(sizes(closing, closing_seconds))
+    if count_chars:
+        size += len(render_header(CallRecord(call_id, company, vertical, archetype, call_date, participants)))
+
+    goal = target.goal()
+    segments = ARCHETYPE_SEGMENTS.get(archetype, ARCHETYPE_SEGMENTS["mixed"])
+    rounds = 0
+    last = None
+    while size < goal:
+        seg, end = segments[rounds % len(segments)](participants, vertical, t, rng=rng)
+        rounds += 1
+        for i, (line, line_size) in enumerate(zip(seg, sizes(seg, end))):
+            transcript.append(line)
+            size += line_size
+            t = seg[i + 1][0] if i + 1 < len(seg) else end
+            last = line, line_size
+            if size >= goal:
+                break
+    # Stop before the last line instead if that ends closer to the goal
+    if last is not None and size - goal > goal - (size - last[1]):
+        transcript.pop()
+        size -= last[1]
+        t = last[0][0]
+
+    transcript.extend((time_sec + t, speaker, text, phrase_id) for time_sec, speaker, text, phrase_id in closing)
+    t += closing_seconds
+    return CallRecord.from_lines(call_id, company, vertical, archetype, call_date,
+                                 participants, transcript, t)
+
+
+def generate_call(call_id, vertical, archetype, rng=random, call_date=None):
+    """Generate a single fake customer call and return (transcript, metadata)"""
+    call = build_call(call_id, vertical, archetype, rng=rng, call_date=call_date)
+    return render_text(call), call.metadata()
+
+
+def use_content(pack_paths=(), verticals=None):
+    """Apply content packs and pick the verticals calls rotate through
+
+    Lists a pack defines (companies, roles, names, archetypes) replace the
+    built-in ones; pack verticals are added, or replace a built-in vertical
+    of the same name. Only verticals in the rotation - all of them, or just
+    the given names - are read from their packs and compiled into PHRASES.
+    Raises ContentPackError for invalid packs or unknown names.
+    """
+    global _applied_content
+    key = (tuple(pack_paths), tuple(verticals) if verticals else None)
+    if key == _applied_content:
+        return
+
+    catalog = ContentCatalog(pack_paths)
+    archetypes = catalog.lists.get("call_archetypes")
+    unknown = sorted(set(archetypes or ()) - set(BUILTIN_ARCHETYPES))
+    if unknown:
+        raise ContentPackError(f"unknown call archetypes {unknown}; expected some of {list(BUILTIN_ARCHETYPES)}")
+    for field, target in (("participant_roles", PARTICIPANT_ROLES), ("companies", COMPANIES),
+                          ("first_names", FIRST_NAMES), ("last_names", LAST_NAMES),
+                          ("call_archetypes", CALL_ARCHETYPES)):
+        if field in catalog.lists:
+            # In place, so modules that imported these lists see the change
+            target[:] = catalog.lists[field]
+
+    available = list(VERTICALS) + [name for name in catalog.verticals if name not in VERTICALS]
+    names = list(verticals) if verticals else available
+    unknown = [name for name in names if name not in available]
+    if unknown:
+        raise ContentPackError(f"unknown verticals {unknown}; available: {available}")
+    for name in names:
+        if name in catalog.verticals:
+            VERTICALS[name] = catalog.load_vertical(name)
+            for field in VERTICAL_POOLS:
+                PHRASES.add_pool(f"{name}.{field}", VERTICALS[name][field], replace=True)
+    ACTIVE_VERTICALS[:] = names
+    _applied_content = key
+    _fingerprints.clear()
+
+
+def use_dialogue_model(path):
+    """Load the trained dialogue model that engine="model" samples calls from"""
+    global _dialogue_model, _applied_model
+    if path is None or path == _applied_model:
+        return
+    _dialogue_model = DialogueModel.load(path)
+    _applied_model = path
+    _fingerprints.clear()
+
+
+def _init_worker(pack_paths, verticals, model_path):
+    """Pool initializer: re-apply the parent's content packs and dialogue model"""
+    use_content(pack_paths, verticals)
+    use_dialogue_model(model_path)
+
+
+def call_builder(engine="random", target=None):
+    """The build_call the engine uses: the template one, or the loaded dialogue model's
+
+    With a SizeTarget, build_sized_call with that target (template engine only).
+    """
+    if target is not None:
+        if engine != "random":
+            raise ValueError(f"size targets need the random engine, not {engine!r}")
+        return partial(build_sized_call, target=target)
+    if engine != "model":
+        return build_call
+    if _dialogue_model is None:
+        raise ValueError('engine="model" needs a dialogue model; call use_dialogue_model() first')
+    return _dialogue_model.build_call
+
+
+def call_plan(call_id):
+    """Vertical and archetype for a call, rotating through both lists by call_id"""
+    vertical = ACTIVE_VERTICALS[(call_id - 1) % len(ACTIVE_VERTICALS)]
+    archetype = CALL_ARCHETYPES[(call_id - 1) % len(CALL_ARCHETYPES)]
+    return vertical, archetype
+
+
+def content_fingerprint(vertical, engine="random"):
+    """Hex digest of the content calls in vertical are drawn from
+
+    For the template engines: GENERATOR_VERSION, the role, company and name
+    lists, the scripted lines and shared phrase pools, and the vertical's own
+    pools (with their phrase ids, which JSON output carries) and slot values.
+    Other verticals' pools aren't included, so editing one vertical changes
+    only its fingerprint. For engine="model", the dialogue model file.
+    """
+    key = (engine, vertical)
+    if key not in _fingerprints:
+        digest = hashlib.sha256(f"{GENERATOR_VERSION}:{engine}:".encode("utf-8"))
+        if engine == "model":
+            with open(_applied_model, "rb") as f:
+                for block in iter(partial(f.read, 1 << 20), b""):
+                    digest.update(block)
+        else:
+            pools = {name: [[phrase_id, PHRASE_TEMPLATES[phrase_id]] for phrase_id in ids]
+                     for name, ids in PHRASES.pools.items()
+                     if "." not in name or name.partition(".")[0] in ("scripted", vertical)}
+            slots = {field: values for field, values in VERTICALS[vertical].items() if field not in VERTICAL_POOLS}
+            content = [PARTICIPANT_ROLES, COMPANIES, FIRST_NAMES, LAST_NAMES, pools, slots]
+            digest.update(json.dumps(content, sort_keys=True).encode("utf-8"))
+        _fingerprints[key] = digest.hexdigest()
+    return _fingerprints[key]
+
+
+def cache_key(seed, call_id, call_date, fmt="text", engine="random", target=None):
+    """Key of a call in the call cache: a hash of everything the call is generated from"""
+    vertical, archetype = call_plan(call_id)
+    size = [target.unit, target.value] if target is not None else None
+    return entry_key(seed, call_id, vertical, archetype, call_date, fmt, engine, size,
+                     content_fingerprint(vertical, engine))
+
+
+def call_rng(seed, call_id, attempt=0):
+    """Independent RNG for one call, derived from the master seed and call_id
+
+    attempt > 0 gives the RNG for a redraw of the call (see dedup_call).
+    """
+    # str seeds are hashed with SHA-512, so this is stable across processes
+    # and Python runs (unlike hash()-based seeding).
+    if attempt:
+        return random.Random(f"{seed}:{call_id}:{attempt}")
+    return random.Random(f"{seed}:{call_id}")
+
+
+def _generate_task(task):
+    """Worker entry point: generate and render one call from a
+    (call_id, seed, call_date, fmt, records, engine, target) task"""
+    call_id, seed, call_date, fmt, records, engine, target = task
+    vertical, archetype = call_plan(call_id)
+    call = call_builder(engine, target)(call_id, vertical, archetype, rng=call_rng(seed, call_id), call_date=call_date)
+    render, _ = FORMATS[fmt]
+    if records:
+        return call_id, render(call), call.metadata(), call
+    return call_id, render(call), call.metadata()
+
+
+def generate_calls(num_calls, seed, workers=1, call_date=None, start_id=1, fmt="text", engine="random",
+                   records=False, target=None, cache=None):
+    """Yield (rendered call, metadata) for num_calls calls in call_id order
+
+    Every call is seeded from (seed, call_id) alone, so the output is
+    byte-identical whatever the worker count. engine="numpy" uses the
+    vectorized batch engine instead (in-process; workers is ignored), and
+    engine="model" samples calls from the dialogue model loaded with
+    use_dialogue_model(). A SizeTarget grows or cuts every call to that size
+    (see build_sized_call). With records=True the CallRecord is yielded as a
+    third element. With a CallCache, calls found under their cache_key() are
+    read back from it instead of generated, and the others are added to it.
+    """
+    if call_date is None:
+        call_date = datetime.now().strftime('%Y-%m-%d')
+    end_id = start_id + num_calls
+
+    if target is not None and engine != "random":
+        raise ValueError(f"size targets need the random engine, not {engine!r}")
+    if cache is not None and engine == "numpy":
+        raise ValueError("the call cache needs the random or model engine")
+    # Calls going into the cache are generated with their CallRecord
+    generate_records = records or cache is not None
+
+    def cached(call_id):
+        """(key, cached result or None); no key without a cache"""
+        if cache is None:
+            return None, None
+        key = cache_key(seed, call_id, call_date, fmt, engine, target)
+        return key, cache.get(key, records)
+
+    def store(key, result):
+        if cache is None:
+            return result
+        cache.put(key, result[0], result[2])
+        return result if records else result[:2]
+
+    if engine == "numpy":
+        # Imported lazily so NumPy stays optional for the default engine
+        from batch_engine import generate_batch, generate_rendered_batch
+        # batch_engine sees content through its own import of this module,
+        # a separate copy when this file is run as a script
+        import generate_fake_calls
+        generate_fake_calls.use_content(*_applied_content)
+        if fmt == "text":
+            # Transcripts are rendered a whole block at a time
+            yield from generate_rendered_batch(start_id, num_calls, seed=seed, call_date=call_date, records=records)
+            return
+        render, _ = FORMATS[fmt]
+        for call in generate_batch(start_id, num_calls, seed=seed, call_date=call_date):
+            yield (render(call), call.metadata(), call) if records else (render(call), call.metadata())
+        return
+
+    if workers <= 1:
+        for call_id in range(start_id, end_id):
+            key, result = cached(call_id)
+            if result is None:
+                result = store(key, _generate_task((call_id, seed, call_date, fmt, generate_records,
+                                                    engine, target))[1:])
+            yield result
+        return
+
+    # Work is submitted in bounded windows so results can't pile up in the
+    # pool faster than the caller writes them out.
+    window = workers * POOL_CHUNKSIZE * 4
+    # Workers started by spawn rather than fork re-import this module, so
+    # they re-apply the content packs and dialogue model the parent is using
+    with multiprocessing.Pool(workers, initializer=_init_worker,
+                              initargs=(*_applied_content, _applied_model)) as pool:
+        for window_start in range(start_id, end_id, window):
+            window_end = min(window_start + window, end_id)
+            # Reordering buffer: hold results until every earlier call_id is
+            # out; cache hits go straight in, the rest are handed to the pool
+            pending = {}
+            keys = {}
+            tasks = []
+            for call_id in range(window_start, window_end):
+                keys[call_id], result = cached(call_id)
+                if result is not None:
+                    pending[call_id] = result
+                else:
+                    tasks.append((call_id, seed, call_date, fmt, generate_records, engine, target))
+
+            results = pool.imap_unordered(_generate_task, tasks, chunksize=POOL_CHUNKSIZE)
+            next_id = window_start
+            while next_id < window_end:
+                if next_id not in pending:
+                    result = next(results)
+                    pending[result[0]] = store(keys[result[0]], result[1:])
+                    continue
+                yield pending.pop(next_id)
+                next_id += 1
+
+
+def record_signature(call):
+    """MinHash signature of a CallRecord, as diversity.py computes it from the rendered transcript"""
+    return call_signature(call.texts, [call.participants[s] for s in call.speakers], call.company)
+
+
+def dedup_call(call, index, seed, mode="regenerate", engine="random", target=None):
+    """Check a call against the near-duplicate index before it is written
+
+    Returns (call to write or None to drop it, number of redraws, whether
+    the call returned is still a near-duplicate). In regenerate mode a
+    near-duplicate is redrawn with call_rng(seed, call_id, attempt) up to
+    DEDUP_ATTEMPTS times and the last draw is kept even if it is still one.
+    Decisions depend only on the calls before this one, so the output stays
+    reproducible from the seed.
+    """
+    signature = record_signature(call)
+    found = index.find(signature)
+    attempt = 0
+    if mode == "regenerate":
+        vertical, archetype = call_plan(call.call_id)
+        builder = call_builder(engine, target)
+        while found is not None and attempt < DEDUP_ATTEMPTS:
+            attempt += 1
+            call = builder(call.call_id, vertical, archetype, rng=call_rng(seed, call.call_id, attempt),
+                           call_date=call.call_date)
+            signature = record_signature(call)
+            found = index.find(signature)
+    if found is None:
+        index.add(signature, call.call_id)
+        return call, attempt, False
+    index.join(found[0])
+    return (None if mode == "drop" else call), attempt, True
+
+
+class CorpusSummary:
+    """Running per-vertical, per-archetype and duration stats for a corpus"""
+
+    def __init__(self):
+        self.count = 0
+        self.verticals = Counter()
+        self.call_types = Counter()
+        self.total_minutes = 0.0
+        self.min_minutes = None
+        self.max_minutes = None
+
+    def add(self, meta):
+        """Fold one call's metadata into the running totals"""
+        minutes = meta['duration_minutes']
+        self.count += 1
+        self.verticals[meta['vertical']] += 1
+        self.call_types[meta['call_type']] += 1
+        self.total_minutes += minutes
+        if self.min_minutes is None or minutes < self.min_minutes:
+            self.min_minutes = minutes
+        if self.max_minutes is None or minutes > self.max_minutes:
+            self.max_minutes = minutes
+
+    def report(self):
+        """Print the end-of-run summary"""
+        print("\nSummary:")
+        for vertical in ACTIVE_VERTICALS:
+            print(f"  - {vertical}: {self.verticals[vertical]} calls")
+
+        print("\nCall types:")
+        for archetype in CALL_ARCHETYPES:
+            print(f"  - {archetype.replace('_', ' ').title()}: {self.call_types[archetype]} calls")
+
+        if not self.count:
+            return
+        print(f"\nDuration stats:")
+        print(f"  Average: {self.total_minutes / self.count:.1f} min")
+        print(f"  Min:     {self.min_minutes:.1f} min")
+        print(f"  Max:     {self.max_minutes:.1f} min")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Generate fake customer calls for Foundry IQ implementation testing")
+    parser.add_argument("--calls", type=int, default=50,
+                        help="number of calls to generate (default: 50)")
+    parser.add_argument("--output", default="fake_customer_calls_2.txt",
+                        help="transcript output file (default: fake_customer_calls_2.txt)")
+    parser.add_argument("--metadata", default=None,
+                        help="metadata output file (default: calls_metadata_2.json, or calls_metadata_2.jsonl with --stream)")
+    parser.add_argument("--format", choices=sorted(FORMATS), default="text",
+                        help="transcript output format: text transcript or one JSON object per call (default: text)")
+    parser.add_argument("--stream", action="store_true",
+                        help="constant-memory mode: write metadata as JSON Lines as each call is generated")
+    parser.add_argument("--seed", type=int, default=None,
+                        help="master seed; the same seed rebuilds the same corpus (default: random)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="number of worker processes (default: 1)")
+    parser.add_argument("--engine", choices=["random", "numpy", "model"], default="random",
+                        help="per-call generator, the vectorized NumPy batch engine, or a trained dialogue model "
+                             "(default: random)")
+    parser.add_argument("--model", default=None, metavar="PATH",
+                        help="dialogue model for --engine model, written by dialogue_model.py train")
+    size = parser.add_mutually_exclusive_group()
+    size.add_argument("--target-minutes", type=float, default=None, metavar="N",
+                      help="grow or cut every call to about N minutes of call time")
+    size.add_argument("--target-chars", type=int, default=None, metavar="N",
+                      help="grow or cut every call to about N characters of text transcript")
+    size.add_argument("--target-tokens", type=int, default=None, metavar="N",
+                      help=f"grow or cut every call to about N tokens (estimated as characters / {CHARS_PER_TOKEN})")
+    parser.add_argument("--target-tolerance", type=float, default=DEFAULT_SIZE_TOLERANCE, metavar="FRACTION",
+                        help="relative error a call may have and still count as on target in the final report "
+                             f"(default: {DEFAULT_SIZE_TOLERANCE})")
+    parser.add_argument("--date", default=None,
+                        help="date stamped on every call header, YYYY-MM-DD (default: today)")
+    parser.add_argument("--content-pack", action="append", default=[], metavar="PATH",
+                        help="JSON/TOML content pack, or a directory of them; repeatable, later packs win")
+    parser.add_argument("--verticals", default=None,
+                        help="comma-separated verticals to rotate through (default: all built-in and pack verticals)")
+    parser.add_argument("--shard-calls", type=int, default=None,
+                        help="roll to a new transcript shard after this many calls")
+    parser.add_argument("--shard-size", type=float, default=None,
+                        help="roll to a new transcript shard after this many MB of (uncompressed) text")
+    parser.add_argument("--compress", choices=sorted(COMPRESSORS), default=None,
+                        help="compress transcript shards while writing")
+    parser.add_argument("--db", default=None, metavar="PATH",
+                        help="also load calls, participants and utterances into this SQLite store")
+    parser.add_argument("--columnar", default=None, metavar="DIR",
+                        help="also export calls and utterances as memory-mappable columns (see columnar.py)")
+    parser.add_argument("--cache", default=None, metavar="PATH",
+                        help="read calls generated before from this call cache, and add the ones generated now")
+    parser.add_argument("--cache-size", type=float, default=DEFAULT_MAX_MB, metavar="MB",
+                        help=f"evict least recently used cached calls beyond this size (default: {DEFAULT_MAX_MB})")
+    parser.add_argument("--dedup", type=float, default=None, metavar="SIMILARITY",
+                        help="treat calls at or above this MinHash similarity to an earlier call as near-duplicates")
+    parser.add_argument("--dedup-mode", choices=["regenerate", "drop"], default="regenerate",
+                        help="redraw near-duplicates or leave them out (default: regenerate)")
+    parser.add_argument("--resume", action="store_true",
+                        help="continue an interrupted run, or extend an existing corpus up to --calls")
+    parser.add_argument("--checkpoint-every", type=int, default=10000,
+                        help="in --stream mode, checkpoint every N calls (default: 10000; 0 disables)")
+    parser.add_argument("--quiet", action="store_true",
+                        help="don't print a progress line per call")
+    parser.add_argument("--profile", action="store_true",
+                        help="time each generation stage, rendering and I/O, and write a JSON report")
+    parser.add_argument("--cprofile", action="store_true",
+                        help="also run cProfile (implies --profile); raw stats go next to the report as .prof")
+    parser.add_argument("--tracemalloc", action="store_true",
+                        help="also trace allocations with tracemalloc (implies --profile; slows generation down)")
+    parser.add_argument("--profile-report", default=DEFAULT_REPORT, metavar="PATH",
+                        help=f"where --profile writes its report (default: {DEFAULT_REPORT})")
+    return parser.parse_args(argv)
+
+
+def _resume_metadata(metadata_file, stream, start_id, summary):
+    """Cut existing metadata back to calls before start_id, folding them into summary
+
+    Returns (metadata list for JSON mode or None, last kept call_id). With
+    start_id=None everything parseable is kept.
+    """
+    if not os.path.exists(metadata_file):
+        return (None if stream else []), 0
+
+    last_id = 0
+    if stream:
+        valid_bytes = 0
+        for meta, offset in iter_jsonl(metadata_file):
+            if start_id is not None and meta['call_id'] >= start_id:
+                break
+            summary.add(meta)
+            last_id = meta['call_id']
+            valid_bytes = offset
+        truncate(metadata_file, valid_bytes)
+        return None, last_id
+
+    try:
+        with open(metadata_file, encoding='utf-8') as f:
+            existing = json.load(f)
+    except ValueError:
+        existing = []
+    metadata = [m for m in existing if start_id is None or m['call_id'] < start_id]
+    for meta in metadata:
+        summary.add(meta)
+    return metadata, (metadata[-1]['call_id'] if metadata else 0)
+
+
+def _last_complete_call(output_file, fmt):
+    """call_id of the last call in an unsharded transcript file known to be complete"""
+    if not os.path.exists(output_file):
+        return 0
+    if fmt == "json":
+        last_id = 0
+        for record, _ in iter_jsonl(output_file):
+            last_id = record['call_id']
+        return last_id
+    # A text call has no end marker, so the final call may be torn; only
+    # the one before it is known to be complete
+    with TranscriptCorpus(output_file, rebuild=True) as corpus:
+        return corpus[-2].header.get('call_id', 0) if len(corpus) > 1 else 0
+
+
+def _resume_transcripts(output_file, fmt, start_id):
+    """Cut an existing unsharded transcript file back to the calls before start_id"""
+    if not os.path.exists(output_file):
+        return
+    if fmt == "json":
+        valid_bytes = 0
+        for record, offset in iter_jsonl(output_file):
+            if record['call_id'] >= start_id:
+                break
+            valid_bytes = offset
+    else:
+        with TranscriptCorpus(output_file, rebuild=True) as corpus:
+            valid_bytes = next((call.start for call in corpus if call.header.get('call_id', 0) >= start_id),
+                               corpus.offsets[-1])
+    truncate(output_file, valid_bytes)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    num_calls = args.calls
+    output_file = args.output
+    metadata_file = args.metadata or ("calls_metadata_2.jsonl" if args.stream else "calls_metadata_2.json")
+    checkpoint_file = checkpoint_path_for(output_file)
+
+    seed, call_date, fmt, engine = args.seed, args.date, args.format, args.engine
+    model_path = os.path.abspath(args.model) if args.model else None
+    target = None
+    for unit in SIZE_UNITS:
+        value = getattr(args, f"target_{unit}")
+        if value is not None:
+            target = (unit, value, args.target_tolerance)
+    content_packs = [os.path.abspath(path) for path in args.content_pack]
+    verticals = args.verticals.split(",") if args.verticals else None
+    dedup_threshold, dedup_mode = args.dedup, args.dedup_mode
+    state = load_checkpoint(checkpoint_file) if args.resume else None
+    if state is not None:
+        # Settings that shape the output come from the run being resumed
+        seed, call_date, fmt, engine = state['seed'], state['date'], state['format'], state['engine']
+        content_packs = state.get('content_packs', [])
+        verticals = state.get('verticals')
+        dedup_threshold, dedup_mode = state.get('dedup'), state.get('dedup_mode', dedup_mode)
+        model_path = state.get('model')
+        target = state.get('target')
+    try:
+        use_content(content_packs, verticals)
+    except (ContentPackError, OSError) as e:
+        raise SystemExit(f"Error loading content packs: {e}")
+    if target is not None:
+        if engine != "random":
+            raise SystemExit("Error: --target-* sizes need --engine random")
+        try:
+            target = SizeTarget(*target)
+        except ValueError as e:
+            raise SystemExit(f"Error: {e}")
+    if args.columnar and args.resume:
+        raise SystemExit("Error: a --columnar export can't be resumed; rerun it without --resume")
+    if args.cache and engine == "numpy":
+        raise SystemExit("Error: --cache needs --engine random or model")
+    if dedup_threshold is not None and dedup_mode == "regenerate" and engine == "numpy":
+        # Redraws would come from the per-call generator and mix two engines in one corpus
+        raise SystemExit("Error: --dedup-mode regenerate needs --engine random or model; use --dedup-mode drop")
+    if engine == "model":
+        if model_path is None:
+            raise SystemExit("Error: --engine model needs --model PATH")
+        try:
+            use_dialogue_model(model_path)
+        except (ValueError, OSError) as e:
+            raise SystemExit(f"Error loading dialogue model: {e}")
+    if seed is None:
+        seed = random.randrange(2 ** 32)
+        if args.resume:
+            print("Warning: no checkpoint or --seed; resumed calls use a new random seed")
+    if call_date is None:
+        call_date = datetime.now().strftime('%Y-%m-%d')
+
+    # Transcripts always go straight to disk; in --stream mode the metadata
+    # does too, so nothing grows with the number of calls.
+    summary = CorpusSummary()
+    _, separator = FORMATS[fmt]
+    sharded = bool(args.shard_calls or args.shard_size or args.compress)
+    checkpoints = args.stream and args.checkpoint_every > 0
+
+    def save(next_call_id, output_bytes=None):
+        save_checkpoint(checkpoint_file, {
+            "seed": seed, "date": call_date, "format": fmt, "engine": engine,
+            "content_packs": content_packs, "verticals": verticals,
+            "dedup": dedup_threshold, "dedup_mode": dedup_mode, "model": model_path,
+            "target": [target.unit, target.value, target.tolerance] if target else None,
+            "next_call_id": next_call_id, "output_bytes": output_bytes,
+        })
+
+    def on_shard_closed(shard):
+        if checkpoints:
+            sync(meta_out)
+            if store is not None:
+                store.flush()
+            save(shard['last_call_id'] + 1)
+
+    if sharded:
+        out = ShardWriter(output_file, max_calls=args.shard_calls, compression=args.compress,
+                          max_bytes=int(args.shard_size * 1e6) if args.shard_size else None,
+                          on_shard_closed=on_shard_closed)
+
+    store = CorpusStore(args.db) if args.db else None
+    if store is not None and not args.resume:
+        # A fresh run rewrites the transcripts from call 1, so the store starts over too
+        store.clear()
+    cache = CallCache(args.cache, int(args.cache_size * 1e6)) if args.cache else None
+    columns = ColumnarWriter(args.columnar) if args.columnar else None
+
+    start_id = 1
+    metadata = None if args.stream else []
+    if args.resume:
+        if sharded:
+            start_id = out.resume()
+        elif state is not None:
+            start_id = state['next_call_id']
+        else:
+            # No checkpoint: continue after the last call that made it into
+            # both the transcripts and the metadata
+            _, last_meta_id = _resume_metadata(metadata_file, args.stream, None, CorpusSummary())
+            start_id = min(last_meta_id, _last_complete_call(output_file, fmt)) + 1
+        metadata, _ = _resume_metadata(metadata_file, args.stream, start_id, summary)
+        if store is not None:
+            store.truncate_from(start_id)
+        if not sharded:
+            if state is not None and state.get('output_bytes') is not None:
+                truncate(output_file, state['output_bytes'])
+            else:
+                _resume_transcripts(output_file, fmt, start_id)
+
+    profiler = None
+    check_duplicate = dedup_call
+    if args.profile or args.cprofile or args.tracemalloc:
+        profiler = Profiler(cprofile=args.cprofile, trace_malloc=args.tracemalloc)
+        # When run as a script this module is __main__, not generate_fake_calls
+        profiler.install(sys.modules[__name__])
+        check_duplicate = profiler.timed("dedup", dedup_call)
+        if store is not None:
+            store.add = profiler.timed("db", store.add)
+        if columns is not None:
+            columns.add = profiler.timed("columnar", columns.add)
+        if args.workers > 1 and engine != "numpy":
+            print("Warning: with --workers > 1, generation stages run in the workers and aren't profiled")
+
+    dedup = None
+    dedup_stats = Counter()
+    size_stats = Counter()
+    if dedup_threshold is not None:
+        dedup = NearDuplicateIndex(dedup_threshold)
+        if start_id > 1:
+            # Rebuild the index from the calls already written; the same
+            # calls in the same order leave it exactly as the interrupted run had it
+            if sharded:
+                written = [os.path.join(os.path.dirname(output_file), shard['file'])
+                           for shard in out.manifest['shards']]
+            else:
+                written = [output_file] if os.path.exists(output_file) else []
+            for header, texts, speakers in iter_corpus_calls(written):
+                dedup.assign(call_signature(texts, speakers, header['company']), header['call_id'])
+
+    remaining = max(0, num_calls - start_id + 1)
+    mode = 'a' if args.resume else 'w'
+    if not sharded:
+        out = open(output_file, mode, encoding='utf-8')
+    if profiler is not None:
+        out = profiler.writer(out)
+
+    if start_id > 1:
+        print(f"Resuming at call {start_id}: generating {remaining} more of {num_calls} fake customer calls...")
+    else:
+        print(f"Generating {num_calls} fake customer calls for Foundry IQ implementation testing...")
+    print(f"Seed: {seed} (workers: {args.workers})\n")
+
+    # A JSON array can't be appended to, so it is always rewritten in full
+    meta_mode = mode if args.stream else 'w'
+    # meta_out is listed first so it is still open when out closes its last shard
+    calls = generate_calls(remaining, seed, workers=args.workers, call_date=call_date, start_id=start_id,
+                           fmt=fmt, engine=engine, target=target, cache=cache,
+                           records=store is not None or columns is not None or dedup is not None or target is not None)
+    if profiler is not None:
+        calls = profiler.iterate(calls, "generate")
+        profiler.start()
+    with open(metadata_file, meta_mode, encoding='utf-8') as meta_out, out:
+        if profiler is not None:
+            meta_out = profiler.writer(meta_out)
+        for transcript, meta, *record in calls:
+            call_id = meta['call_id']
+            call = record[0] if record else None
+            keep = True
+            if dedup is not None:
+                call, attempts, duplicate = check_duplicate(call, dedup, seed, dedup_mode, engine, target)
+                keep = call is not None
+                dedup_stats['regenerated'] += attempts > 0
+                dedup_stats['duplicates_kept' if keep else 'dropped'] += duplicate
+                if attempts:
+                    transcript, meta = FORMATS[fmt][0](call), call.metadata()
+            if not keep:
+                if not args.quiet:
+                    print(f"Dropped call {call_id}/{num_calls} (near-duplicate)")
+            else:
+                if not args.quiet:
+                    print(f"Generated call {call_id}/{num_calls} ({meta['vertical']} - {meta['call_type']})")
+
+                if sharded:
+                    out.write(transcript + separator, call_id)
+                else:
+                    out.write(transcript + separator)
+                summary.add(meta)
+                if target is not None:
+                    size_stats['within'] += target.within(target.measure(call, transcript if fmt == "text" else None))
+
+                if metadata is None:
+                    meta_out.write(json.dumps(meta))
+                    meta_out.write("\n")
+                else:
+                    metadata.append(meta)
+                if store is not None:
+                    store.add(call)
+                if columns is not None:
+                    columns.add(call)
+
+            if checkpoints and not sharded and call_id % args.checkpoint_every == 0:
+                sync(out)
+                sync(meta_out)
+                if store is not None:
+                    store.flush()
+                save(call_id + 1, out.tell())
+
+        if metadata is not None:
+            json.dump(metadata, meta_out, indent=2)
+    if store is not None:
+        store.close()
+    if cache is not None:
+        cache.close()
+    if columns is not None:
+        columns.close()
+    if profiler is not None:
+        profiler.stop()
+        profiler.uninstall()
+
+    # The final checkpoint lets --resume extend the finished corpus; runs
+    # that don't checkpoint leave none behind
+    if checkpoints or args.resume:
+        save(max(start_id, num_calls + 1), None if sharded else os.path.getsize(output_file))
+    elif os.path.exists(checkpoint_file):
+        # Left by an earlier run into the same file; it no longer matches the output
+        os.remove(checkpoint_file)
+
+    # Calls dropped as near-duplicates were never written
+    written = remaining - dedup_stats['dropped']
+    print(f"\n✓ Generated {written} calls successfully!")
+    if sharded:
+        print(f"✓ Transcripts saved to {len(out.manifest['shards'])} shards, manifest: {out.manifest_path}")
+    else:
+        print(f"✓ Transcripts saved to: {output_file}")
     print(f"✓ Metadata saved to: {metadata_file}")
-
-    print("\nSummary:")
-    for vertical in verticals_list:
-        count = sum(1 for m in metadata if m['vertical'] == vertical)
-        print(f"  - {vertical}: {count} calls")
-
-    print("\nCall types:")
-    for archetype in CALL_ARCHETYPES:
-        count = sum(1 for m in metadata if m['call_type'] == archetype)
-        print(f"  - {archetype.replace('_', ' ').title()}: {count} calls")
-
-    durations = [m['duration_minutes'] for m in metadata]
-    print(f"\nDuration stats:")
-    print(f"  Average: {sum(durations)/len(durations):.1f} min")
-    print(f"  Min:     {min(durations):.1f} min")
-    print(f"  Max:     {max(durations):.1f} min")
+    if store is not None:
+        print(f"✓ Calls loaded into SQLite store: {args.db}")
+    if columns is not None:
+        print(f"✓ Columnar export: {columns.calls} calls, {columns.utterances} utterances in {args.columnar}")
+    if cache is not None:
+        print(f"✓ Call cache {args.cache}: {cache.hits} hits, {cache.misses} misses, {cache.evicted} evicted, "
+              f"{cache.total_bytes / 1e6:.1f} MB" + (f", {cache.corrupt} corrupt entries regenerated" if cache.corrupt else ""))
+    if dedup is not None:
+        print(f"✓ Near-duplicates (similarity >= {dedup_threshold:g}): {dedup_stats['regenerated']} regenerated, "
+              f"{dedup_stats['dropped']} dropped, {dedup_stats['duplicates_kept']} kept after {DEDUP_ATTEMPTS} redraws")
+    if target is not None:
+        print(f"✓ Size target {target.value:g} {target.unit}: {size_stats['within']} of {written} calls "
+              f"within ±{target.tolerance * 100:g}%")
+
+    if profiler is not None:
+        report = profiler.report(written)
+        prof_path = os.path.splitext(args.profile_report)[0] + ".prof" if args.cprofile else None
+        profiler.save(args.profile_report, report, prof_path)
+        print_report(report)
+        print(f"✓ Profile report saved to: {args.profile_report}" + (f" (cProfile stats: {prof_path})" if prof_path else ""))
+
+    summary.report()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,296 @@
+"""Live-call streaming server for load-testing the listener agent.
+
+Replays generated calls utterance by utterance, paced by their [MM:SS]
+timestamps (optionally sped up), so a listener can be pointed at hundreds or
+thousands of concurrent "live" conversations without real meetings.
+
+Each stream is a sequence of JSON Lines events:
+
+    {"event": "start", "call_id": 17, "company": ..., "participants": [...], ...}
+    {"event": "utterance", "call_id": 17, "seq": 0, "time_sec": 0, "speaker": "...", "text": "..."}
+    {"event": "end", "call_id": 17, "utterances": 42}
+
+served over either
+  - HTTP (default): GET /calls/<call_id> or /calls/next returns a chunked
+    response, GET /metrics returns the current lag metrics as JSON
+  - raw TCP (--protocol tcp): every connection is sent the next call
+
+Every write waits for the socket buffer to drain, so a slow reader holds up
+only its own stream. Lag is how far behind its timestamp an utterance was
+delivered; with --max-lag a stream that falls further behind is dropped.
+
+Usage:
+    python live_server.py --speed 60 --seed 42
+    curl -N http://127.0.0.1:8765/calls/next
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import random
+from datetime import datetime
+
+from generate_fake_calls import build_call, call_plan, call_rng
+from stats_util import Histogram
+
+DEFAULT_PORT = 8765
+# Per-connection write buffer; drain() blocks once this much is queued
+WRITE_BUFFER_BYTES = 64 * 1024
+
+
+class StreamStats:
+    """Delivery stats for one streamed call"""
+
+    __slots__ = ("call_id", "utterances", "bytes", "max_lag", "total_lag")
+
+    def __init__(self, call_id):
+        self.call_id = call_id
+        self.utterances = 0
+        self.bytes = 0
+        self.max_lag = 0.0
+        self.total_lag = 0.0
+
+    def record(self, lag, nbytes):
+        self.utterances += 1
+        self.bytes += nbytes
+        self.total_lag += lag
+        if lag > self.max_lag:
+            self.max_lag = lag
+
+
+class LiveMetrics:
+    """Server-wide stream counts and utterance lag distribution"""
+
+    def __init__(self):
+        self.active = 0
+        self.peak_active = 0
+        self.finished = {"completed": 0, "dropped": 0, "disconnected": 0}
+        self.utterances = 0
+        self.bytes = 0
+        # Distribution of delivered utterances' lag, in ms; constant size however long the server runs
+        self.lags = Histogram()
+        self.worst_stream = None
+
+    def opened(self):
+        self.active += 1
+        self.peak_active = max(self.peak_active, self.active)
+
+    def record(self, stats, lag, nbytes):
+        stats.record(lag, nbytes)
+        self.utterances += 1
+        self.bytes += nbytes
+        self.lags.add(lag * 1000)
+
+    def closed(self, stats, status):
+        self.active -= 1
+        self.finished[status] += 1
+        if self.worst_stream is None or stats.max_lag > self.worst_stream.max_lag:
+            self.worst_stream = stats
+
+    def snapshot(self):
+        lags = self.lags
+        worst = self.worst_stream
+        return {
+            "active": self.active,
+            "peak_active": self.peak_active,
+            **self.finished,
+            "utterances": self.utterances,
+            "bytes": self.bytes,
+            "lag_ms": {
+                "p50": round(lags.percentile(50), 1),
+                "p95": round(lags.percentile(95), 1),
+                "p99": round(lags.percentile(99), 1),
+                "max": round(lags.max, 1),
+            },
+            "worst_stream": {
+                "call_id": worst.call_id,
+                "max_lag_ms": round(worst.max_lag * 1000, 1),
+                "mean_lag_ms": round(worst.total_lag / worst.utterances * 1000, 1) if worst.utterances else 0.0,
+            } if worst else None,
+        }
+
+    def report_line(self):
+        snap = self.snapshot()
+        lag = snap["lag_ms"]
+        return (f"active {snap['active']:>5}  completed {snap['completed']:>6}  dropped {snap['dropped']}  "
+                f"disconnected {snap['disconnected']}  lag p50 {lag['p50']:.0f}ms  p95 {lag['p95']:.0f}ms  "
+                f"p99 {lag['p99']:.0f}ms  max {lag['max']:.0f}ms")
+
+
+class LiveCallServer:
+    """Stream generated calls in (scaled) real time to any number of clients"""
+
+    def __init__(self, seed, speed=1.0, call_date=None, max_lag=None, start_id=1):
+        self.seed = seed
+        self.speed = speed
+        self.call_date = call_date
+        self.max_lag = max_lag
+        self.metrics = LiveMetrics()
+        self._next_call_id = itertools.count(start_id)
+
+    def _build(self, call_id):
+        vertical, archetype = call_plan(call_id)
+        return build_call(call_id, vertical, archetype, rng=call_rng(self.seed, call_id), call_date=self.call_date)
+
+    async def stream_call(self, call_id, send):
+        """Send one call's events through send(bytes), pacing utterances by their timestamps"""
+        call = self._build(call_id)
+        stats = StreamStats(call_id)
+        metrics = self.metrics
+        metrics.opened()
+        loop = asyncio.get_running_loop()
+        status = "completed"
+        try:
+            await send(_event({"event": "start", **call.metadata(), "date": call.call_date}))
+            start = loop.time()
+            for seq, (time_sec, speaker, text) in enumerate(call.lines()):
+                due = start + time_sec / self.speed
+                delay = due - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                data = _event({"event": "utterance", "call_id": call_id, "seq": seq,
+                               "time_sec": time_sec, "speaker": speaker, "text": text})
+                await send(data)
+                lag = max(0.0, loop.time() - due)
+                metrics.record(stats, lag, len(data))
+                if self.max_lag is not None and lag > self.max_lag:
+                    status = "dropped"
+                    return
+            await send(_event({"event": "end", "call_id": call_id, "utterances": len(call)}))
+        except ConnectionError:
+            status = "disconnected"
+        finally:
+            metrics.closed(stats, status)
+
+    async def handle_tcp(self, reader, writer):
+        """Raw TCP: send the next call as JSON Lines, then close"""
+        writer.transport.set_write_buffer_limits(high=WRITE_BUFFER_BYTES)
+
+        async def send(data):
+            writer.write(data)
+            await writer.drain()
+
+        try:
+            await self.stream_call(next(self._next_call_id), send)
+        finally:
+            await _close(writer)
+
+    async def handle_http(self, reader, writer):
+        """Minimal HTTP/1.1: GET /calls/<id|next> streams a call, GET /metrics returns JSON"""
+        writer.transport.set_write_buffer_limits(high=WRITE_BUFFER_BYTES)
+        try:
+            request_line = await reader.readline()
+            while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                pass
+            parts = request_line.decode("latin-1").split()
+            path = parts[1] if len(parts) >= 2 and parts[0] == "GET" else None
+            if path == "/metrics":
+                body = json.dumps(self.metrics.snapshot()).encode("utf-8")
+                writer.write(_http_head("200 OK", "application/json", content_length=len(body)) + body)
+                await writer.drain()
+            elif path is not None and path.startswith("/calls/"):
+                call_id = _parse_call_id(path[len("/calls/"):], self._next_call_id)
+                if call_id is None:
+                    writer.write(_http_head("404 Not Found", "text/plain", content_length=0))
+                    await writer.drain()
+                    return
+                writer.write(_http_head("200 OK", "application/x-ndjson"))
+
+                async def send(data):
+                    writer.write(b"%x\r\n%b\r\n" % (len(data), data))
+                    await writer.drain()
+
+                await self.stream_call(call_id, send)
+                writer.write(b"0\r\n\r\n")
+                await writer.drain()
+            else:
+                writer.write(_http_head("404 Not Found", "text/plain", content_length=0))
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            await _close(writer)
+
+
+def _event(obj):
+    return (json.dumps(obj, ensure_ascii=False) + "\n").encode("utf-8")
+
+
+def _http_head(status, content_type, content_length=None):
+    length = (f"Content-Length: {content_length}\r\n" if content_length is not None
+              else "Transfer-Encoding: chunked\r\n")
+    return (f"HTTP/1.1 {status}\r\nContent-Type: {content_type}\r\n{length}"
+            f"Cache-Control: no-cache\r\nConnection: close\r\n\r\n").encode("ascii")
+
+
+def _parse_call_id(value, counter):
+    if value == "next":
+        return next(counter)
+    return int(value) if value.isdigit() and int(value) > 0 else None
+
+
+async def _close(writer):
+    writer.close()
+    try:
+        await writer.wait_closed()
+    except ConnectionError:
+        pass
+
+
+async def report_metrics(metrics, interval):
+    while True:
+        await asyncio.sleep(interval)
+        print(metrics.report_line(), flush=True)
+
+
+async def serve(server, host, port, protocol="http", stats_interval=5.0):
+    handler = server.handle_tcp if protocol == "tcp" else server.handle_http
+    # backlog sized for thousands of simultaneous connects from a load generator
+    listener = await asyncio.start_server(handler, host, port, backlog=4096)
+    reporter = asyncio.create_task(report_metrics(server.metrics, stats_interval)) if stats_interval else None
+    try:
+        async with listener:
+            await listener.serve_forever()
+    finally:
+        if reporter is not None:
+            reporter.cancel()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Stream generated calls as live conversations")
+    parser.add_argument("--host", default="127.0.0.1", help="Interface to listen on (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"Port to listen on (default: {DEFAULT_PORT})")
+    parser.add_argument("--protocol", choices=("http", "tcp"), default="http",
+                        help="HTTP chunked endpoint, or raw TCP with one call per connection (default: http)")
+    parser.add_argument("--speed", type=float, default=1.0,
+                        help="Clock speed-up; 60 plays a minute of call per second (default: 1, real time)")
+    parser.add_argument("--seed", type=int, default=None, help="Master seed (default: random, printed at start)")
+    parser.add_argument("--date", default=None, help="Date stamped on every call (YYYY-MM-DD, default: today)")
+    parser.add_argument("--start-id", type=int, default=1, help="First call_id handed out by /calls/next (default: 1)")
+    parser.add_argument("--max-lag", type=float, default=None,
+                        help="Drop a stream once it falls this many seconds behind (default: never)")
+    parser.add_argument("--stats-interval", type=float, default=5.0,
+                        help="Seconds between metrics lines, 0 to disable (default: 5)")
+    args = parser.parse_args(argv)
+    if not args.speed > 0:
+        parser.error("--speed must be positive")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    seed = args.seed if args.seed is not None else random.randrange(2**32)
+    call_date = args.date or datetime.now().strftime("%Y-%m-%d")
+    server = LiveCallServer(seed, speed=args.speed, call_date=call_date, max_lag=args.max_lag,
+                            start_id=args.start_id)
+    print(f"Serving live calls on {args.protocol}://{args.host}:{args.port} "
+          f"(seed: {seed}, speed: {args.speed:g}x)")
+    try:
+        asyncio.run(serve(server, args.host, args.port, args.protocol, args.stats_interval))
+    except KeyboardInterrupt:
+        pass
+    print(f"✓ {server.metrics.report_line()}")
+
+
+if __name__ == "__main__":
+    main()
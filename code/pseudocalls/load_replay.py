@@ -0,0 +1,329 @@
+"""Replay a transcript corpus against an HTTP endpoint and measure it under load.
+
+Reads calls from data/Contoso_customer_calls.txt or any generated text
+corpus (through TranscriptCorpus, so large files are memory-mapped) and
+POSTs them as JSON, either one request per call or one per utterance:
+
+    {"call_id": 7, "company": ..., "vertical": ..., "date": ..., "transcript": "..."}
+    {"call_id": 7, "seq": 3, "time_sec": 61, "speaker": "...", "text": "..."}
+
+Requests go over a pool of keep-alive connections. Load is either closed
+loop (--concurrency N requests in flight) or open loop (--rate R requests
+per second on a fixed schedule). In open-loop mode latency is measured from
+when a request was scheduled, not when it was sent, so queueing in front of
+a saturated endpoint shows up in the percentiles instead of being hidden.
+
+Every --interval seconds a line with throughput, p50/p95/p99 latency and
+error rate is printed; the full time series can be saved with --save.
+
+Usage:
+    python agent_stub.py --capacity 32 &
+    python load_replay.py ../../data/Contoso_customer_calls.txt --rate 200 --duration 30
+    python load_replay.py fake_customer_calls_2.txt --mode utterance --concurrency 64
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import sys
+import time
+from urllib.parse import urlsplit
+
+from stats_util import Histogram
+from transcript_reader import TranscriptCorpus
+
+DEFAULT_URL = "http://127.0.0.1:8080/transcripts"
+
+
+class ConnectionPool:
+    """Fixed-size pool of keep-alive HTTP/1.1 connections to one host"""
+
+    def __init__(self, url, size, timeout=None):
+        parts = urlsplit(url)
+        if parts.scheme != "http":
+            raise ValueError(f"only http:// endpoints are supported, got {url!r}")
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.path = parts.path or "/"
+        self.timeout = timeout
+        self._idle = asyncio.Queue()
+        for _ in range(size):
+            # None is a slot whose connection hasn't been opened yet (or was dropped)
+            self._idle.put_nowait(None)
+
+    async def post(self, body):
+        """POST a JSON body; returns the response status"""
+        conn = await self._idle.get()
+        try:
+            if conn is None:
+                conn = await asyncio.open_connection(self.host, self.port)
+            status, keep_alive = await asyncio.wait_for(self._exchange(conn, body), self.timeout)
+        except BaseException:
+            if conn is not None:
+                conn[1].close()
+            self._idle.put_nowait(None)
+            raise
+        if not keep_alive:
+            conn[1].close()
+            conn = None
+        self._idle.put_nowait(conn)
+        return status
+
+    async def _exchange(self, conn, body):
+        reader, writer = conn
+        writer.write(f"POST {self.path} HTTP/1.1\r\nHost: {self.host}:{self.port}\r\n"
+                     f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n"
+                     .encode("ascii") + body)
+        await writer.drain()
+        status_line = await reader.readline()
+        if not status_line:
+            raise ConnectionResetError("connection closed before response")
+        status = int(status_line.split()[1])
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        if headers.get("transfer-encoding", "").lower() == "chunked":
+            while True:
+                size = int((await reader.readline()).split(b";")[0], 16)
+                await reader.readexactly(size + 2)
+                if size == 0:
+                    break
+        else:
+            await reader.readexactly(int(headers.get("content-length", 0)))
+        return status, headers.get("connection", "").lower() != "close"
+
+    async def close(self):
+        while not self._idle.empty():
+            conn = self._idle.get_nowait()
+            if conn is not None:
+                conn[1].close()
+
+
+def call_requests(corpus):
+    """One request body per call"""
+    for call in corpus:
+        header = call.header
+        yield json.dumps({
+            "call_id": header.get("call_id"),
+            "company": header.get("company"),
+            "vertical": header.get("vertical"),
+            "date": header.get("date"),
+            "transcript": call.text,
+        }, ensure_ascii=False).encode("utf-8")
+
+
+def utterance_requests(corpus):
+    """One request body per utterance, call by call"""
+    for call in corpus:
+        call_id = call.header.get("call_id")
+        for seq, (time_sec, speaker, text) in enumerate(call.utterances):
+            yield json.dumps({"call_id": call_id, "seq": seq, "time_sec": time_sec,
+                              "speaker": speaker, "text": text}, ensure_ascii=False).encode("utf-8")
+
+
+REQUEST_MODES = {
+    "call": call_requests,
+    "utterance": utterance_requests,
+}
+
+
+def request_stream(corpus, mode, loop_corpus):
+    """Request bodies for the replay; cycles through the corpus again when loop_corpus is set"""
+    passes = itertools.count() if loop_corpus else range(1)
+    for _ in passes:
+        yield from REQUEST_MODES[mode](corpus)
+
+
+class Recorder:
+    """Latency and error counts, bucketed into fixed intervals since the start"""
+
+    def __init__(self, interval):
+        self.interval = interval
+        self.start = time.perf_counter()
+        # The current interval's counts; finished ones are replaced by their summary
+        self.windows = []
+        self.latencies = Histogram()
+        self.errors = 0
+        self.bytes = 0
+        self.statuses = {}
+
+    def _window(self, now):
+        n = int((now - self.start) // self.interval)
+        while len(self.windows) <= n:
+            if self.windows:
+                # Nothing more can land in the previous interval, so keep only its summary
+                self.windows[-1] = self.window_summary(len(self.windows) - 1)
+            self.windows.append({"latencies": Histogram(), "errors": 0, "bytes": 0})
+        return self.windows[n]
+
+    def record(self, latency, nbytes, status=None):
+        """One finished request; status None means it failed without a response"""
+        window = self._window(time.perf_counter())
+        key = str(status) if status is not None else "error"
+        self.statuses[key] = self.statuses.get(key, 0) + 1
+        if status is None or status >= 400:
+            window["errors"] += 1
+            self.errors += 1
+        latency_ms = latency * 1000
+        window["latencies"].add(latency_ms)
+        window["bytes"] += nbytes
+        self.latencies.add(latency_ms)
+        self.bytes += nbytes
+
+    def summarize(self, latencies, errors, nbytes, seconds):
+        """Stats for a Histogram of latencies in ms"""
+        requests = latencies.count
+        return {
+            "requests": requests,
+            "requests_per_sec": round(requests / seconds, 1) if seconds else 0.0,
+            "mb_per_sec": round(nbytes / 1e6 / seconds, 2) if seconds else 0.0,
+            "error_rate": round(errors / requests, 4) if requests else 0.0,
+            "latency_ms": {
+                "p50": round(latencies.percentile(50), 2),
+                "p95": round(latencies.percentile(95), 2),
+                "p99": round(latencies.percentile(99), 2),
+                "max": round(latencies.max, 2),
+            },
+        }
+
+    def window_summary(self, n):
+        window = self.windows[n]
+        if "latencies" not in window:
+            return window
+        return self.summarize(window["latencies"], window["errors"], window["bytes"], self.interval)
+
+    def report(self):
+        elapsed = time.perf_counter() - self.start
+        return {
+            "total": dict(self.summarize(self.latencies, self.errors, self.bytes, elapsed),
+                          seconds=round(elapsed, 2), statuses=self.statuses),
+            "intervals": [dict(self.window_summary(n), t=round((n + 1) * self.interval, 2))
+                          for n in range(len(self.windows))],
+        }
+
+
+def format_stats(label, stats):
+    lat = stats["latency_ms"]
+    return (f"{label:>8}  {stats['requests_per_sec']:>9.1f} req/s  {stats['mb_per_sec']:>7.2f} MB/s  "
+            f"p50 {lat['p50']:>7.1f}ms  p95 {lat['p95']:>7.1f}ms  p99 {lat['p99']:>7.1f}ms  "
+            f"errors {stats['error_rate']:.2%}")
+
+
+async def _send(pool, recorder, body, started):
+    try:
+        status = await pool.post(body)
+    except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError, IndexError):
+        status = None
+    recorder.record(time.perf_counter() - started, len(body), status)
+
+
+async def run_closed_loop(pool, recorder, requests, concurrency, deadline):
+    """concurrency workers, each sending its next request as soon as the last one returns"""
+    async def worker():
+        for body in requests:
+            if deadline is not None and time.perf_counter() >= deadline:
+                return
+            await _send(pool, recorder, body, time.perf_counter())
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+
+
+async def run_open_loop(pool, recorder, requests, rate, deadline):
+    """Send on a fixed schedule of rate requests/sec, regardless of how fast responses come back"""
+    start = time.perf_counter()
+    pending = set()
+    for i, body in enumerate(requests):
+        scheduled = start + i / rate
+        if deadline is not None and scheduled >= deadline:
+            break
+        delay = scheduled - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        task = asyncio.create_task(_send(pool, recorder, body, scheduled))
+        pending.add(task)
+        task.add_done_callback(pending.discard)
+    if pending:
+        await asyncio.wait(pending)
+
+
+async def report_intervals(recorder):
+    """Print each interval's stats once it has finished"""
+    reported = 0
+    while True:
+        await asyncio.sleep(recorder.interval)
+        complete = int((time.perf_counter() - recorder.start) // recorder.interval)
+        while reported < min(complete, len(recorder.windows)):
+            print(format_stats(f"{(reported + 1) * recorder.interval:g}s", recorder.window_summary(reported)),
+                  flush=True)
+            reported += 1
+
+
+async def replay(corpus, url, mode="call", concurrency=16, rate=None, connections=None,
+                 duration=None, interval=1.0, timeout=30.0, quiet=False):
+    """Run a replay and return Recorder.report()"""
+    # Open loop needs enough connections for requests to overlap; closed loop needs one per worker
+    pool = ConnectionPool(url, connections or concurrency, timeout=timeout)
+    recorder = Recorder(interval)
+    requests = request_stream(corpus, mode, loop_corpus=duration is not None)
+    deadline = recorder.start + duration if duration is not None else None
+    reporter = None if quiet else asyncio.create_task(report_intervals(recorder))
+    try:
+        if rate:
+            await run_open_loop(pool, recorder, requests, rate, deadline)
+        else:
+            await run_closed_loop(pool, recorder, requests, concurrency, deadline)
+    finally:
+        if reporter is not None:
+            reporter.cancel()
+        await pool.close()
+    return recorder.report()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Replay transcripts against an HTTP endpoint under load")
+    parser.add_argument("corpus", help="Transcript corpus, e.g. ../../data/Contoso_customer_calls.txt")
+    parser.add_argument("--url", default=DEFAULT_URL, help=f"Endpoint to POST to (default: {DEFAULT_URL})")
+    parser.add_argument("--mode", choices=sorted(REQUEST_MODES), default="call",
+                        help="One request per call or per utterance (default: call)")
+    parser.add_argument("--concurrency", type=int, default=16,
+                        help="Requests in flight in closed-loop mode, and pool size (default: 16)")
+    parser.add_argument("--rate", type=float, default=None,
+                        help="Open-loop target rate in requests/sec (default: closed loop)")
+    parser.add_argument("--connections", type=int, default=None,
+                        help="Keep-alive connections in the pool (default: --concurrency)")
+    parser.add_argument("--duration", type=float, default=None,
+                        help="Seconds to run, looping over the corpus (default: one pass)")
+    parser.add_argument("--interval", type=float, default=1.0, help="Seconds per reporting interval (default: 1)")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Per-request timeout in seconds (default: 30)")
+    parser.add_argument("--save", default=None, help="Write the report (total and per interval) as JSON")
+    parser.add_argument("--quiet", action="store_true", help="Only print the final summary")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    with TranscriptCorpus(args.corpus) as corpus:
+        load = f"{args.rate:g} req/s" if args.rate else f"concurrency {args.concurrency}"
+        print(f"Replaying {len(corpus)} calls from {args.corpus} to {args.url} "
+              f"({args.mode} mode, {load})")
+        report = asyncio.run(replay(corpus, args.url, args.mode, args.concurrency, args.rate,
+                                    args.connections, args.duration, args.interval, args.timeout,
+                                    args.quiet))
+
+    total = report["total"]
+    print(format_stats("total", total))
+    print(f"✓ {total['requests']} requests in {total['seconds']:.1f}s, statuses: {total['statuses']}")
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"✓ Report saved to: {args.save}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,108 @@
+"""Precompiled phrase bank for the call generators.
+
+Every phrase a call can contain - the scripted lines, the shared phrase
+pools and each vertical's problems and requirements - is compiled once into
+a PhraseBank: a flat table of interned templates keyed by integer id, each
+with the slot names it needs ({company}, {name}, {role}, ...) parsed up
+front. Named pools are tuples of ids, so the generators pick ids and only
+format the few templates that actually have slots.
+
+Ids are assigned in compile order, so they are stable for a given set of
+phrases, and every generated line carries the id of the phrase it came from
+(CallRecord.phrase_ids).
+
+    bank = compile_bank(SCRIPTED_LINES, {"opening_intros": OPENING_INTROS}, VERTICALS)
+    phrase_id = rng.choice(bank.pool("opening_intros"))
+    bank.text(phrase_id, name="Sarah Chen", role="Data Engineer", company="Acme Corp")
+"""
+import sys
+from string import Formatter
+
+# Phrase ids are stored as unsigned 16-bit ints (CallRecord.phrase_ids);
+# the last one marks lines that don't come from the bank (dialogue_model.py)
+MAX_PHRASES = (1 << 16) - 1
+NO_PHRASE = MAX_PHRASES
+
+# Vertical fields that are phrase pools; the others (concerns, use_cases)
+# are values filled into slots
+VERTICAL_POOLS = ("problems", "functional_reqs", "nonfunctional_reqs")
+
+
+class Phrase:
+    """One compiled template"""
+
+    __slots__ = ("id", "pool", "template", "slots")
+
+    def __init__(self, phrase_id, pool, template):
+        self.id = phrase_id
+        self.pool = pool
+        self.template = sys.intern(template)
+        self.slots = tuple(field for _, field, _, _ in Formatter().parse(template) if field)
+
+    def fill(self, values):
+        """The phrase text with its slots filled from the values dict"""
+        if not self.slots:
+            return self.template
+        return self.template.format_map(values)
+
+    def __repr__(self):
+        return f"Phrase({self.id}, {self.pool!r}, slots={self.slots})"
+
+
+class PhraseBank:
+    """Id-keyed phrase templates grouped into named pools"""
+
+    def __init__(self):
+        self.phrases = []
+        # Template of every phrase, indexed by id; grows in place as pools are added
+        self.templates = []
+        self.pools = {}
+
+    def add_pool(self, name, texts, replace=False):
+        """Compile a list of templates as pool name; returns its tuple of ids
+
+        With replace=True an existing pool of that name is pointed at the new
+        phrases (the old ones keep their ids).
+        """
+        if name in self.pools and not replace:
+            raise ValueError(f"duplicate phrase pool {name!r}")
+        start = len(self.phrases)
+        if start + len(texts) > MAX_PHRASES:
+            raise ValueError(f"phrase bank is limited to {MAX_PHRASES} phrases")
+        self.phrases.extend(Phrase(start + i, name, text) for i, text in enumerate(texts))
+        self.templates.extend(phrase.template for phrase in self.phrases[start:])
+        self.pools[name] = ids = tuple(range(start, len(self.phrases)))
+        return ids
+
+    def pool(self, name):
+        return self.pools[name]
+
+    def scripted(self, key):
+        """Id of a scripted line"""
+        return self.pools[f"scripted.{key}"][0]
+
+    def text(self, phrase_id, **values):
+        return self.phrases[phrase_id].fill(values)
+
+    def __getitem__(self, phrase_id):
+        return self.phrases[phrase_id]
+
+    def __len__(self):
+        return len(self.phrases)
+
+
+def compile_bank(scripted_lines, pools, verticals):
+    """Compile scripted lines, shared pools and per-vertical pools into one PhraseBank
+
+    Scripted lines become single-phrase pools named "scripted.<key>" and
+    vertical pools are named "<vertical>.<field>", e.g. "Retail.problems".
+    """
+    bank = PhraseBank()
+    for key, text in scripted_lines.items():
+        bank.add_pool(f"scripted.{key}", [text])
+    for name, texts in pools.items():
+        bank.add_pool(name, texts)
+    for vertical, data in verticals.items():
+        for field in VERTICAL_POOLS:
+            bank.add_pool(f"{vertical}.{field}", data[field])
+    return bank
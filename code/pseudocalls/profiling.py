@@ -0,0 +1,235 @@
+"""Opt-in instrumentation for generate_fake_calls.py: stage timers, cProfile and tracemalloc.
+
+    python generate_fake_calls.py --calls 20000 --stream --quiet --profile
+    python generate_fake_calls.py --calls 20000 --stream --quiet --cprofile --tracemalloc \\
+        --profile-report profile.json
+
+A Profiler wraps the generator's stage functions in timers only while it is
+installed, and puts the originals back afterwards, so a run without
+--profile executes exactly the same code as before. Stages:
+
+    participants, opening, problem, requirements, architecture, closing
+                    the segment functions of build_call()/build_sized_call()
+    assemble        CallRecord.from_lines
+    render          the output format's renderer
+    generate        everything between the main loop asking for the next call
+                    and getting it (includes the stages above in-process)
+    dedup, db, columnar, write
+                    near-duplicate checks, SQLite store, columnar export and
+                    transcript/metadata I/O
+
+With --workers > 1 the segment, assemble and render stages run in the
+worker processes and are not collected; generate then measures waiting on
+the pool. The report is JSON: per-stage seconds, counts and share of wall
+time, calls/sec, and optionally the top cProfile functions and tracemalloc
+allocation sites.
+"""
+import cProfile
+import functools
+import json
+import os
+import pstats
+import time
+import tracemalloc
+from collections import Counter
+
+DEFAULT_REPORT = "profile_report.json"
+# Rows of cProfile functions and tracemalloc sites kept in the report
+DEFAULT_TOP = 25
+# Frames tracemalloc keeps per allocation; 1 attributes it to the line that made it
+TRACEMALLOC_FRAMES = 1
+
+# Stages timed inside "generate" when calls are generated in-process
+NESTED_STAGES = ("participants", "opening", "problem", "requirements", "architecture", "closing",
+                 "assemble", "render")
+
+# Stage name -> generate_fake_calls function it times
+STAGE_FUNCTIONS = {
+    "participants": "pick_participants",
+    "opening": "generate_opening",
+    "problem": "generate_problem_segment",
+    "requirements": "generate_requirements_segment",
+    "architecture": "generate_architecture_segment",
+    "closing": "generate_closing",
+}
+
+
+class TimedWriter:
+    """File-like proxy that times write() into a Profiler stage"""
+
+    def __init__(self, target, profiler, stage):
+        self._target = target
+        self._write = profiler.timed(stage, target.write)
+
+    def write(self, *args):
+        return self._write(*args)
+
+    def __getattr__(self, name):
+        return getattr(self._target, name)
+
+    def __enter__(self):
+        self._target.__enter__()
+        return self
+
+    def __exit__(self, *exc):
+        return self._target.__exit__(*exc)
+
+
+class Profiler:
+    """Per-stage timers and counters, plus optional cProfile and tracemalloc capture"""
+
+    def __init__(self, cprofile=False, trace_malloc=False, top=DEFAULT_TOP):
+        self.seconds = Counter()
+        self.counts = Counter()
+        self.top = top
+        self.cprofile = cProfile.Profile() if cprofile else None
+        self.trace_malloc = trace_malloc
+        self._restore = []
+        self._started = None
+        self.wall_seconds = 0.0
+        self._snapshot = None
+        self._peak = 0
+
+    def timed(self, stage, func):
+        """func wrapped to add its run time and a call to stage"""
+        seconds, counts = self.seconds, self.counts
+        perf_counter = time.perf_counter
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                seconds[stage] += perf_counter() - start
+                counts[stage] += 1
+        return wrapper
+
+    def iterate(self, iterable, stage):
+        """Yield from iterable, timing each step into stage"""
+        perf_counter = time.perf_counter
+        iterator = iter(iterable)
+        while True:
+            start = perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                self.seconds[stage] += perf_counter() - start
+            self.counts[stage] += 1
+            yield item
+
+    def writer(self, target, stage="write"):
+        return TimedWriter(target, self, stage)
+
+    def _replace(self, namespace, key, value):
+        """Set namespace[key] (a dict) and remember the old value for uninstall()"""
+        self._restore.append((namespace, key, namespace[key]))
+        namespace[key] = value
+
+    def install(self, generator):
+        """Wrap the stage functions of the generate_fake_calls module object generator"""
+        namespace = vars(generator)
+        wrapped = {}
+        for stage, name in STAGE_FUNCTIONS.items():
+            original = namespace[name]
+            wrapped[original] = self.timed(stage, original)
+            self._replace(namespace, name, wrapped[original])
+        # build_call() looks its body segments up in ARCHETYPE_SEGMENTS
+        segments = generator.ARCHETYPE_SEGMENTS
+        for archetype, functions in list(segments.items()):
+            self._replace(segments, archetype, tuple(wrapped.get(f, f) for f in functions))
+        for fmt, (render, separator) in list(generator.FORMATS.items()):
+            self._replace(generator.FORMATS, fmt, (self.timed("render", render), separator))
+        record = generator.CallRecord
+        from_lines = vars(record)["from_lines"]
+        self._restore.append((record, "from_lines", from_lines))
+        record.from_lines = classmethod(self.timed("assemble", from_lines.__func__))
+
+    def uninstall(self):
+        """Put back everything install() replaced"""
+        while self._restore:
+            target, key, value = self._restore.pop()
+            if isinstance(target, dict):
+                target[key] = value
+            else:
+                setattr(target, key, value)
+
+    def start(self):
+        if self.trace_malloc:
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+        if self.cprofile is not None:
+            self.cprofile.enable()
+        self._started = time.perf_counter()
+
+    def stop(self):
+        self.wall_seconds = time.perf_counter() - self._started
+        if self.cprofile is not None:
+            self.cprofile.disable()
+        if self.trace_malloc:
+            self._snapshot = tracemalloc.take_snapshot()
+            self._peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+    def report(self, calls):
+        """The machine-readable report: a JSON-serializable dict"""
+        wall = self.wall_seconds
+        stages = {}
+        for stage, seconds in sorted(self.seconds.items(), key=lambda item: -item[1]):
+            count = self.counts[stage]
+            stages[stage] = {
+                "seconds": round(seconds, 4),
+                "count": count,
+                "mean_us": round(seconds / count * 1e6, 2) if count else 0.0,
+                "share": round(seconds / wall, 4) if wall else 0.0,
+            }
+            if stage in NESTED_STAGES:
+                stages[stage]["within"] = "generate"
+        report = {
+            "calls": calls,
+            "wall_seconds": round(wall, 3),
+            "calls_per_sec": round(calls / wall, 1) if wall else 0.0,
+            "stages": stages,
+        }
+        if self.cprofile is not None:
+            stats = pstats.Stats(self.cprofile)
+            rows = sorted(stats.stats.items(), key=lambda item: -item[1][2])[:self.top]
+            report["cprofile"] = [
+                {"function": f"{os.path.basename(filename)}:{line}({name})", "calls": ncalls,
+                 "tottime": round(tottime, 4), "cumtime": round(cumtime, 4)}
+                for (filename, line, name), (_, ncalls, tottime, cumtime, _) in rows
+            ]
+        if self._snapshot is not None:
+            snapshot = self._snapshot.filter_traces([tracemalloc.Filter(False, tracemalloc.__file__)])
+            report["tracemalloc"] = {
+                "peak_bytes": self._peak,
+                "top": [
+                    {"site": f"{os.path.basename(stat.traceback[0].filename)}:{stat.traceback[0].lineno}",
+                     "bytes": stat.size, "blocks": stat.count}
+                    for stat in snapshot.statistics("lineno")[:self.top]
+                ],
+            }
+        return report
+
+    def save(self, path, report, prof_path=None):
+        """Write the report as JSON, and the raw cProfile stats to prof_path for pstats/snakeviz"""
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        if prof_path and self.cprofile is not None:
+            self.cprofile.dump_stats(prof_path)
+
+
+def print_report(report):
+    """Human-readable summary of a report"""
+    print(f"✓ Profile: {report['calls']} calls in {report['wall_seconds']:.2f}s "
+          f"({report['calls_per_sec']:,.0f} calls/sec)")
+    print(f"  {'Stage':<14} {'seconds':>9} {'count':>10} {'mean us':>9} {'share':>7}")
+    for stage, row in report["stages"].items():
+        print(f"  {stage:<14} {row['seconds']:>9.3f} {row['count']:>10} {row['mean_us']:>9.1f} {row['share']:>7.1%}")
+    for row in report.get("cprofile", [])[:10]:
+        print(f"  cProfile  {row['tottime']:>8.3f}s  {row['function']}")
+    if "tracemalloc" in report:
+        print(f"  tracemalloc peak {report['tracemalloc']['peak_bytes'] / 1e6:.1f} MB")
+        for row in report["tracemalloc"]["top"][:5]:
+            print(f"  {row['bytes'] / 1e3:>10.1f} KB  {row['site']}")
@@ -0,0 +1,584 @@
+"""Inverted-index search over transcript corpora.
+
+Indexes files in the format generate_call() emits - generated corpora, their
+(optionally compressed) shards and data/*.txt - into an index directory:
+
+    calls.search/
+        manifest.json       indexed sources: size, mtime and their segments
+        seg-000000.seg      one or more segments per source
+
+A segment covers up to --segment-utterances utterances of one source. It
+holds the calls (call id, company, vertical, call type, byte range), the call,
+byte offset and speaker role of every utterance, and for every term the
+sorted utterance numbers it occurs in, delta- and varint-encoded. Token
+positions aren't stored: phrase matches are confirmed against the utterance
+text, which is an O(1) slice of the memory-mapped source.
+
+A query is an AND of terms and "quoted phrases" that must all occur in the
+same utterance, optionally restricted by vertical, call type and the role of
+the speaker. Candidates come from the postings of the rarest term; the first
+few thousand are checked against their text directly, so a query that only
+wants the first hits never decodes the long postings of common terms, and
+the rest are narrowed down by intersecting with the other terms' postings.
+
+Building again with the same sources only indexes what is new: unseen files
+(e.g. shards added to a manifest) and bytes appended to a file indexed
+earlier. A file that shrank or was rewritten is re-indexed from scratch.
+
+Usage:
+    python search_index.py build calls.search ../../data/*.txt fake_customer_calls_2.manifest.json
+    python search_index.py search calls.search '"HIPAA compliance"' --role "Data Engineer"
+    python search_index.py search calls.search '"OPC UA"' --vertical Manufacturing --type mixed
+"""
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import re
+import struct
+import sys
+import time
+from array import array
+from itertools import accumulate, islice
+
+from shard_writer import DECOMPRESSORS, read_manifest
+from transcript_reader import UTTERANCE_RE, build_index
+
+INDEX_VERSION = 1
+MANIFEST_NAME = "manifest.json"
+SEGMENT_MAGIC = b"PCSEGv1\n"
+SEGMENT_UTTERANCES = 1_000_000
+# Candidates checked against their text before the other terms' postings
+# are decoded to narrow the rest down
+VERIFY_THRESHOLD = 2000
+# Bytes before the indexed end of a file that are fingerprinted to tell an
+# append from a rewrite
+TAIL_BYTES = 4096
+
+# Fixed-width columns stored after a segment's header, in this order (the
+# 8-byte ones first, so every column stays aligned); the second field says
+# whether a column has an entry per call or per utterance
+COLUMNS = (
+    ("call_start", "Q", "calls"),
+    ("call_end", "Q", "calls"),
+    ("utt_offset", "Q", "utterances"),
+    ("call_id", "I", "calls"),
+    ("utt_call", "I", "utterances"),
+    ("call_company", "H", "calls"),
+    ("call_vertical", "H", "calls"),
+    ("call_type", "H", "calls"),
+    ("utt_role", "H", "utterances"),
+)
+# Header values stored as ids into a per-segment list
+VOCABULARIES = ("companies", "verticals", "call_types", "roles")
+
+TOKEN_RE = re.compile(r"\w+")
+QUERY_RE = re.compile(r'"([^"]*)"|(\S+)')
+
+
+def tokenize(text):
+    """Lowercased word tokens of a piece of text"""
+    return TOKEN_RE.findall(text.lower())
+
+
+def normalize_call_type(value):
+    """"Problem Discovery" and "problem_discovery" -> "problem_discovery\""""
+    return value.strip().lower().replace(" ", "_") if value else ""
+
+
+def parse_query(query):
+    """Split a query into clauses: tuples of tokens, one per term or "quoted phrase"
+
+    A bare word that tokenizes into several tokens ("opc-ua") is a phrase too.
+    """
+    clauses = []
+    for phrase, word in QUERY_RE.findall(query):
+        tokens = tuple(tokenize(phrase or word))
+        if tokens:
+            clauses.append(tokens)
+    return clauses
+
+
+def encode_postings(values):
+    """Varint-encode the gaps of a sorted list of ints (the first value is kept separately)"""
+    gaps = [b - a for a, b in zip(values, values[1:])]
+    if not gaps or max(gaps) < 0x80:
+        # Common terms have small gaps: one byte each, encoded in C
+        return bytes(gaps)
+    out = bytearray()
+    for gap in gaps:
+        while gap >= 0x80:
+            out.append(gap & 0x7F | 0x80)
+            gap >>= 7
+        out.append(gap)
+    return bytes(out)
+
+
+def decode_postings(first, blob):
+    """Inverse of encode_postings"""
+    if not blob or max(blob) < 0x80:
+        return list(accumulate(blob, initial=first))
+    values = [first]
+    value = first
+    gap = shift = 0
+    for byte in blob:
+        gap |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+        else:
+            value += gap
+            values.append(value)
+            gap = shift = 0
+    return values
+
+
+def expand_sources(paths):
+    """Corpus files for a list of paths; a shard manifest stands for its shards"""
+    sources = []
+    for path in paths:
+        if path.endswith(".manifest.json"):
+            base = os.path.dirname(path)
+            sources.extend(os.path.abspath(os.path.join(base, shard["file"]))
+                           for shard in read_manifest(path)["shards"])
+        else:
+            sources.append(os.path.abspath(path))
+    return sources
+
+
+def open_source(path):
+    """A corpus file as a bytes-like buffer: memory-mapped, or decompressed if it is a compressed shard"""
+    opener = DECOMPRESSORS.get(os.path.splitext(path)[1])
+    if opener is not None:
+        with opener(path, "rb") as f:
+            return f.read()
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return b""
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def _speaker_role(speaker):
+    """b"Sarah Chen (Data Engineer)" -> "Data Engineer\""""
+    start = speaker.rfind(b"(")
+    if start == -1:
+        return ""
+    return speaker[start + 1:].rstrip(b")").decode("utf-8")
+
+
+def _write_atomic(path, data):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def _pad8(n):
+    return -n % 8
+
+
+class SegmentBuilder:
+    """Accumulates one segment in memory"""
+
+    def __init__(self):
+        self.columns = {name: array(typecode) for name, typecode, _ in COLUMNS}
+        self.vocabularies = {name: {} for name in VOCABULARIES}
+        self.postings = {}
+
+    def __len__(self):
+        return len(self.columns["utt_offset"])
+
+    @property
+    def num_calls(self):
+        return len(self.columns["call_start"])
+
+    def _id(self, vocabulary, value):
+        ids = self.vocabularies[vocabulary]
+        return ids.setdefault(value or "", len(ids))
+
+    def add_call(self, header, start, end, raw):
+        """Index one call; raw is its bytes, which start at byte start of the source"""
+        columns = self.columns
+        call_no = self.num_calls
+        columns["call_start"].append(start)
+        columns["call_end"].append(end)
+        columns["call_id"].append(header.get("call_id") or 0)
+        columns["call_company"].append(self._id("companies", header.get("company")))
+        columns["call_vertical"].append(self._id("verticals", header.get("vertical")))
+        columns["call_type"].append(self._id("call_types", normalize_call_type(header.get("call_type"))))
+
+        postings = self.postings
+        utt_offset, utt_call, utt_role = columns["utt_offset"], columns["utt_call"], columns["utt_role"]
+        matches = list(UTTERANCE_RE.finditer(raw))
+        for i, match in enumerate(matches):
+            n = len(utt_offset)
+            utt_offset.append(start + match.start())
+            utt_call.append(call_no)
+            utt_role.append(self._id("roles", _speaker_role(match.group(3))))
+            text_end = matches[i + 1].start() if i + 1 < len(matches) else len(raw)
+            for term in set(tokenize(raw[match.end():text_end].decode("utf-8"))):
+                term_postings = postings.get(term)
+                if term_postings is None:
+                    postings[term] = term_postings = array("I")
+                term_postings.append(n)
+
+    def write(self, path, source):
+        """Write the segment file:
+
+            SEGMENT_MAGIC, <Q header length>, JSON header, padding to 8 bytes,
+            the COLUMNS, padding, postings of every term
+        """
+        terms = {}
+        blobs = []
+        offset = 0
+        for term in sorted(self.postings):
+            values = self.postings[term]
+            blob = encode_postings(values)
+            terms[term] = [offset, len(blob), len(values), values[0]]
+            blobs.append(blob)
+            offset += len(blob)
+        header = {
+            "version": INDEX_VERSION,
+            "source": source,
+            "calls": self.num_calls,
+            "utterances": len(self),
+            "terms": terms,
+        }
+        header.update((name, list(ids)) for name, ids in self.vocabularies.items())
+        header = json.dumps(header, ensure_ascii=False).encode("utf-8")
+        parts = [SEGMENT_MAGIC, struct.pack("<Q", len(header)), header,
+                 b"\0" * _pad8(len(SEGMENT_MAGIC) + 8 + len(header))]
+        columns = b"".join(self.columns[name].tobytes() for name, _, _ in COLUMNS)
+        parts += [columns, b"\0" * _pad8(len(columns))]
+        parts += blobs
+        _write_atomic(path, b"".join(parts))
+
+
+class Segment:
+    """A memory-mapped segment file; the columns are memoryviews into it"""
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self._buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._buf[:len(SEGMENT_MAGIC)] != SEGMENT_MAGIC:
+            raise ValueError(f"{path}: not a search index segment")
+        pos = len(SEGMENT_MAGIC)
+        (header_len,) = struct.unpack_from("<Q", self._buf, pos)
+        pos += 8
+        header = json.loads(self._buf[pos:pos + header_len])
+        if header.get("version") != INDEX_VERSION:
+            raise ValueError(f"{path}: unsupported segment version {header.get('version')}")
+        pos += header_len
+        pos += _pad8(pos)
+        self.source = header["source"]
+        self.terms = header["terms"]
+        for name in VOCABULARIES:
+            setattr(self, name, header[name])
+        self._views = []
+        for name, typecode, count in COLUMNS:
+            nbytes = array(typecode).itemsize * header[count]
+            view = memoryview(self._buf)[pos:pos + nbytes]
+            self._views += [view, view.cast(typecode)]
+            setattr(self, name, self._views[-1])
+            pos += nbytes
+        self._postings_start = pos + _pad8(pos)
+
+    def __len__(self):
+        return len(self.utt_offset)
+
+    def df(self, term):
+        """Number of utterances containing term"""
+        entry = self.terms.get(term)
+        return entry[2] if entry else 0
+
+    def postings(self, term):
+        """Sorted utterance numbers containing term"""
+        offset, length, _, first = self.terms[term]
+        start = self._postings_start + offset
+        return decode_postings(first, self._buf[start:start + length])
+
+    def utterance_range(self, n):
+        """Byte range of utterance n in the source"""
+        call_no = self.utt_call[n]
+        if n + 1 < len(self) and self.utt_call[n + 1] == call_no:
+            return self.utt_offset[n], self.utt_offset[n + 1]
+        return self.utt_offset[n], self.call_end[call_no]
+
+    def close(self):
+        # The views have to be released before the map they point into
+        for view in reversed(self._views):
+            view.release()
+        self._buf.close()
+
+
+def _matches(tokens, clauses):
+    """True if every clause occurs in tokens as a contiguous run"""
+    for clause in clauses:
+        if len(clause) == 1:
+            if clause[0] not in tokens:
+                return False
+            continue
+        width = len(clause)
+        if not any(tuple(tokens[i:i + width]) == clause
+                   for i, token in enumerate(tokens) if token == clause[0]):
+            return False
+    return True
+
+
+class SearchIndex:
+    """On-disk inverted index over one or more transcript corpora"""
+
+    def __init__(self, path):
+        self.path = path
+        self.manifest_path = os.path.join(path, MANIFEST_NAME)
+        try:
+            with open(self.manifest_path, encoding="utf-8") as f:
+                self.manifest = json.load(f)
+        except FileNotFoundError:
+            self.manifest = {"version": INDEX_VERSION, "next_segment": 0, "sources": {}}
+        if self.manifest.get("version") != INDEX_VERSION:
+            raise ValueError(f"{self.manifest_path}: unsupported index version {self.manifest.get('version')}")
+        self._segments = {}
+        self._sources = {}
+
+    def _save_manifest(self):
+        _write_atomic(self.manifest_path, json.dumps(self.manifest, indent=2).encode("utf-8"))
+
+    def _new_segment_name(self):
+        name = f"seg-{self.manifest['next_segment']:06d}.seg"
+        self.manifest["next_segment"] += 1
+        return name
+
+    def _drop_segments(self, names):
+        for name in names:
+            segment = self._segments.pop(name, None)
+            if segment is not None:
+                segment.close()
+            try:
+                os.remove(os.path.join(self.path, name))
+            except FileNotFoundError:
+                pass
+
+    def _start_offset(self, path, buf, stat, entry):
+        """Where indexing of a changed source starts: its old end if it only grew, else 0"""
+        if entry is None or path.endswith(tuple(DECOMPRESSORS)) or stat.st_size <= entry["size"]:
+            return 0
+        size = entry["size"]
+        if hashlib.sha1(buf[max(0, size - TAIL_BYTES):size]).hexdigest() != entry["tail_sha1"]:
+            return 0
+        return size
+
+    def update(self, paths, segment_utterances=SEGMENT_UTTERANCES):
+        """Index new sources and new data in known ones; returns {source: calls indexed}"""
+        os.makedirs(self.path, exist_ok=True)
+        indexed = {}
+        for path in expand_sources(paths):
+            stat = os.stat(path)
+            entry = self.manifest["sources"].get(path)
+            if entry and entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+                continue
+            buf = open_source(path)
+            start = self._start_offset(path, buf, stat, entry)
+            segments = list(entry["segments"]) if start else []
+            stale = entry["segments"] if entry and not start else []
+
+            # Only the new bytes are scanned (and copied) when appending
+            offsets, headers = build_index(buf[start:] if start else buf)
+            builder = SegmentBuilder()
+            for n, header in enumerate(headers):
+                call_start, call_end = start + offsets[n], start + offsets[n + 1]
+                builder.add_call(header, call_start, call_end, buf[call_start:call_end])
+                if len(builder) >= segment_utterances:
+                    name = self._new_segment_name()
+                    builder.write(os.path.join(self.path, name), path)
+                    segments.append(name)
+                    builder = SegmentBuilder()
+            if builder.num_calls:
+                name = self._new_segment_name()
+                builder.write(os.path.join(self.path, name), path)
+                segments.append(name)
+
+            # The manifest is what makes new segments visible (and old ones
+            # unused), so it is only written once they are all on disk
+            self.manifest["sources"][path] = {
+                "size": stat.st_size,
+                "mtime_ns": stat.st_mtime_ns,
+                "tail_sha1": hashlib.sha1(buf[max(0, len(buf) - TAIL_BYTES):]).hexdigest(),
+                "segments": segments,
+            }
+            self._save_manifest()
+            self._drop_segments(stale)
+            if isinstance(buf, mmap.mmap):
+                buf.close()
+            old_buf = self._sources.pop(path, None)
+            if isinstance(old_buf, mmap.mmap):
+                old_buf.close()
+            indexed[path] = len(headers)
+        return indexed
+
+    def segments(self):
+        """Open segments, in source then file order"""
+        for entry in self.manifest["sources"].values():
+            for name in entry["segments"]:
+                segment = self._segments.get(name)
+                if segment is None:
+                    segment = self._segments[name] = Segment(os.path.join(self.path, name))
+                yield segment
+
+    def _source(self, path):
+        buf = self._sources.get(path)
+        if buf is None:
+            buf = self._sources[path] = open_source(path)
+        return buf
+
+    def _segment_matches(self, segment, clauses, vertical_id, call_type_id, role_id):
+        """(utterance number, byte offset, header match, text) of each utterance in a segment matching the query
+
+        Candidates are the postings of the rarest term. The first
+        VERIFY_THRESHOLD are checked against their text one by one, which
+        finds the first hits without touching the other postings; the rest
+        are narrowed down by intersecting with the other terms' postings
+        before being checked.
+        """
+        terms = sorted({token for clause in clauses for token in clause}, key=segment.df)
+        buf = self._source(segment.source)
+        utt_call, utt_role = segment.utt_call, segment.utt_role
+        call_vertical, call_type = segment.call_vertical, segment.call_type
+        # A single-term query is answered by its postings alone
+        exact = len(clauses) == 1 and len(clauses[0]) == 1
+
+        candidates = (n for n in segment.postings(terms[0])
+                      if (role_id is None or utt_role[n] == role_id)
+                      and (vertical_id is None or call_vertical[utt_call[n]] == vertical_id)
+                      and (call_type_id is None or call_type[utt_call[n]] == call_type_id))
+        for n in islice(candidates, VERIFY_THRESHOLD):
+            yield from self._check(segment, buf, n, clauses, exact)
+        if not exact:
+            rest = list(candidates)
+            for term in terms[1:]:
+                if not rest:
+                    break
+                postings = set(segment.postings(term))
+                rest = [n for n in rest if n in postings]
+            candidates = rest
+        for n in candidates:
+            yield from self._check(segment, buf, n, clauses, exact)
+
+    def _check(self, segment, buf, n, clauses, exact):
+        start, end = segment.utterance_range(n)
+        raw = buf[start:end]
+        match = UTTERANCE_RE.match(raw)
+        text = raw[match.end():].decode("utf-8").strip()
+        if exact or _matches(tokenize(text), clauses):
+            yield n, start, match, text
+
+    def search(self, query, vertical=None, call_type=None, role=None, limit=20):
+        """Utterances matching the query, as hit dicts in index order"""
+        clauses = parse_query(query)
+        if not clauses:
+            return []
+        terms = {token for clause in clauses for token in clause}
+        call_type = normalize_call_type(call_type) if call_type else None
+        hits = []
+        for segment in self.segments():
+            if any(term not in segment.terms for term in terms):
+                continue
+            try:
+                vertical_id = segment.verticals.index(vertical) if vertical is not None else None
+                call_type_id = segment.call_types.index(call_type) if call_type is not None else None
+                role_id = segment.roles.index(role) if role is not None else None
+            except ValueError:
+                # A filter value that never occurs in this segment
+                continue
+            for n, start, match, text in self._segment_matches(segment, clauses, vertical_id, call_type_id, role_id):
+                call_no = segment.utt_call[n]
+                hits.append({
+                    "source": segment.source,
+                    "call_id": segment.call_id[call_no],
+                    "company": segment.companies[segment.call_company[call_no]],
+                    "vertical": segment.verticals[segment.call_vertical[call_no]],
+                    "call_type": segment.call_types[segment.call_type[call_no]],
+                    "offset": start,
+                    "time_sec": int(match.group(1)) * 60 + int(match.group(2)),
+                    "speaker": match.group(3).decode("utf-8"),
+                    "text": text,
+                })
+                if len(hits) >= limit:
+                    return hits
+        return hits
+
+    def stats(self):
+        segments = list(self.segments())
+        return {
+            "sources": len(self.manifest["sources"]),
+            "segments": len(segments),
+            "calls": sum(len(segment.call_start) for segment in segments),
+            "utterances": sum(len(segment) for segment in segments),
+            "bytes": sum(os.path.getsize(os.path.join(self.path, name))
+                         for entry in self.manifest["sources"].values() for name in entry["segments"]),
+        }
+
+    def close(self):
+        for segment in self._segments.values():
+            segment.close()
+        self._segments = {}
+        for buf in self._sources.values():
+            if isinstance(buf, mmap.mmap):
+                buf.close()
+        self._sources = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build and query an inverted index over transcript corpora")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    build = commands.add_parser("build", help="index new sources and data appended to indexed ones")
+    build.add_argument("index", help="index directory, created if missing")
+    build.add_argument("sources", nargs="+", help="corpus files, shards or shard manifests (.manifest.json)")
+    build.add_argument("--segment-utterances", type=int, default=SEGMENT_UTTERANCES,
+                       help=f"utterances per segment file (default: {SEGMENT_UTTERANCES})")
+
+    search = commands.add_parser("search", help="find utterances matching a query")
+    search.add_argument("index", help="index directory")
+    search.add_argument("query", help='terms and "quoted phrases", all in the same utterance')
+    search.add_argument("--vertical", default=None)
+    search.add_argument("--type", dest="call_type", default=None, help="call type, e.g. architecture_review")
+    search.add_argument("--role", default=None, help="role of the speaker, e.g. \"Data Engineer\"")
+    search.add_argument("--limit", type=int, default=20)
+    search.add_argument("--json", action="store_true", help="print hits as JSON lines")
+    args = parser.parse_args(argv)
+
+    with SearchIndex(args.index) as index:
+        if args.command == "build":
+            started = time.perf_counter()
+            indexed = index.update(args.sources, args.segment_utterances)
+            for path, calls in indexed.items():
+                print(f"  {os.path.basename(path)}: {calls} new call(s)")
+            stats = index.stats()
+            print(f"✓ {stats['calls']} calls, {stats['utterances']} utterances in {stats['segments']} segment(s), "
+                  f"{stats['bytes'] / 1e6:.1f} MB ({time.perf_counter() - started:.1f}s)")
+            return 0
+
+        started = time.perf_counter()
+        hits = index.search(args.query, args.vertical, args.call_type, args.role, args.limit)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        for hit in hits:
+            if args.json:
+                print(json.dumps(hit, ensure_ascii=False))
+                continue
+            minutes, seconds = divmod(hit["time_sec"], 60)
+            print(f"  {os.path.basename(hit['source'])} #{hit['call_id']} {hit['company']} ({hit['vertical']}) "
+                  f"[{minutes:02d}:{seconds:02d}] {hit['speaker']}: {hit['text']}")
+        print(f"✓ {len(hits)} hit(s) in {elapsed_ms:.1f} ms"
+              + (" (limit reached)" if len(hits) == args.limit else ""))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
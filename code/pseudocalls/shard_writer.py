@@ -0,0 +1,220 @@
+"""Sharded, optionally compressed corpus output.
+
+ShardWriter splits a transcript stream across numbered shard files, rolling
+to a new shard once the current one reaches a call count or an uncompressed
+size cap. Compression (gzip, lzma or bz2 from the stdlib) is applied as the
+data is written, and a JSON manifest records each shard's call-id range,
+sizes and SHA-256 checksum so ingestion workers can each claim a shard and
+verify it.
+
+    fake_customer_calls_2-00000.txt.gz
+    fake_customer_calls_2-00001.txt.gz
+    fake_customer_calls_2.manifest.json
+"""
+import bz2
+import gzip
+import hashlib
+import json
+import lzma
+import os
+
+MANIFEST_VERSION = 1
+
+COMPRESSORS = {
+    "gzip": (".gz", lambda f: gzip.GzipFile(fileobj=f, mode="wb", mtime=0)),
+    "lzma": (".xz", lambda f: lzma.LZMAFile(f, mode="wb")),
+    "bz2": (".bz2", lambda f: bz2.BZ2File(f, mode="wb")),
+}
+
+DECOMPRESSORS = {
+    ".gz": gzip.open,
+    ".xz": lzma.open,
+    ".bz2": bz2.open,
+}
+
+
+class _HashingFile:
+    """Write-only file wrapper that checksums and counts the bytes passing through"""
+
+    def __init__(self, f):
+        self._f = f
+        self.sha256 = hashlib.sha256()
+        self.size = 0
+
+    def write(self, data):
+        self.sha256.update(data)
+        self.size += len(data)
+        return self._f.write(data)
+
+    def flush(self):
+        self._f.flush()
+
+    def close(self):
+        self._f.flush()
+        os.fsync(self._f.fileno())
+        self._f.close()
+
+
+def manifest_path_for(output_file):
+    """fake_customer_calls_2.txt -> fake_customer_calls_2.manifest.json"""
+    stem, _ = os.path.splitext(output_file)
+    return stem + ".manifest.json"
+
+
+def write_manifest(path, manifest):
+    """Atomically replace the manifest file"""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def read_manifest(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def open_shard(path, encoding="utf-8"):
+    """Open a shard for reading text, decompressing based on its extension"""
+    opener = DECOMPRESSORS.get(os.path.splitext(path)[1])
+    if opener is None:
+        return open(path, "r", encoding=encoding)
+    return opener(path, "rt", encoding=encoding)
+
+
+class ShardWriter:
+    """Write calls across size- or count-capped, optionally compressed shards"""
+
+    def __init__(self, output_file, max_calls=None, max_bytes=None, compression=None, on_shard_closed=None):
+        if compression is not None and compression not in COMPRESSORS:
+            raise ValueError(f"unknown compression {compression!r}; expected one of {sorted(COMPRESSORS)}")
+        stem, ext = os.path.splitext(output_file)
+        self._stem = stem
+        self._ext = ext or ".txt"
+        self.max_calls = max_calls
+        self.max_bytes = max_bytes
+        self.compression = compression
+        # Called with the shard's manifest entry each time a shard is completed
+        self.on_shard_closed = on_shard_closed
+        self.manifest_path = manifest_path_for(output_file)
+        self.manifest = {
+            "version": MANIFEST_VERSION,
+            "compression": compression,
+            "max_calls": max_calls,
+            "max_bytes": max_bytes,
+            "shards": [],
+        }
+        self._raw = None
+        self._stream = None
+        self._shard = None
+
+    def _shard_path(self, number):
+        suffix = COMPRESSORS[self.compression][0] if self.compression else ""
+        return f"{self._stem}-{number:05d}{self._ext}{suffix}"
+
+    def _open_shard(self, call_id):
+        number = len(self.manifest["shards"])
+        path = self._shard_path(number)
+        self._raw = _HashingFile(open(path, "wb"))
+        self._stream = COMPRESSORS[self.compression][1](self._raw) if self.compression else self._raw
+        self._shard = {
+            "shard": number,
+            "file": os.path.basename(path),
+            "first_call_id": call_id,
+            "last_call_id": call_id,
+            "calls": 0,
+            "bytes": 0,
+        }
+
+    def _close_shard(self):
+        if self._shard is None:
+            return
+        if self._stream is not self._raw:
+            self._stream.close()
+        self._raw.close()
+        self._shard["stored_bytes"] = self._raw.size
+        self._shard["sha256"] = self._raw.sha256.hexdigest()
+        self.manifest["shards"].append(self._shard)
+        # Rewritten after every shard so a crash leaves a manifest of the
+        # shards that were completed
+        write_manifest(self.manifest_path, self.manifest)
+        closed, self._raw, self._stream, self._shard = self._shard, None, None, None
+        if self.on_shard_closed is not None:
+            self.on_shard_closed(closed)
+
+    def resume(self):
+        """Pick up the completed shards from an existing manifest
+
+        Returns the call_id to continue from. Any shard file past the end of
+        the manifest is a partial one from an interrupted run and is removed.
+        """
+        try:
+            shards = read_manifest(self.manifest_path)["shards"]
+        except (OSError, ValueError, KeyError):
+            shards = []
+        self.manifest["shards"] = shards
+        number = len(shards)
+        while os.path.exists(self._shard_path(number)):
+            os.remove(self._shard_path(number))
+            number += 1
+        return shards[-1]["last_call_id"] + 1 if shards else 1
+
+    def _is_full(self):
+        shard = self._shard
+        return ((self.max_calls and shard["calls"] >= self.max_calls)
+                or (self.max_bytes and shard["bytes"] >= self.max_bytes))
+
+    def write(self, text, call_id):
+        """Append one rendered call (including its separator) to the current shard"""
+        if self._shard is not None and self._is_full():
+            self._close_shard()
+        if self._shard is None:
+            self._open_shard(call_id)
+        data = text.encode("utf-8")
+        self._stream.write(data)
+        self._shard["last_call_id"] = call_id
+        self._shard["calls"] += 1
+        self._shard["bytes"] += len(data)
+
+    def close(self):
+        self._close_shard()
+        write_manifest(self.manifest_path, self.manifest)
+
+    def abort(self):
+        """Discard the shard in progress, leaving only completed shards in the manifest"""
+        if self._shard is not None:
+            path = self._shard_path(self._shard["shard"])
+            if self._stream is not self._raw:
+                self._stream.close()
+            self._raw.close()
+            os.remove(path)
+            self._raw = self._stream = self._shard = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        if exc_type is not None:
+            self.abort()
+        else:
+            self.close()
+
+
+def verify_manifest(manifest_path):
+    """Re-hash every shard listed in a manifest; returns the list of files that don't match"""
+    manifest = read_manifest(manifest_path)
+    base = os.path.dirname(manifest_path)
+    bad = []
+    for shard in manifest["shards"]:
+        sha256 = hashlib.sha256()
+        path = os.path.join(base, shard["file"])
+        try:
+            with open(path, "rb") as f:
+                for block in iter(lambda: f.read(1 << 20), b""):
+                    sha256.update(block)
+        except OSError:
+            bad.append(shard["file"])
+            continue
+        if sha256.hexdigest() != shard["sha256"]:
+            bad.append(shard["file"])
+    return bad
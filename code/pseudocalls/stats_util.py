@@ -0,0 +1,52 @@
+"""Percentile helpers shared by the benchmark, the live server and the load replayer."""
+import math
+
+
+def percentile(sorted_values, q):
+    """q-th percentile (0-100) of an already sorted list, nearest-rank"""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, round(q / 100 * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+
+class Histogram:
+    """Counts of values in fixed log-spaced buckets, for percentiles of an unbounded stream
+
+    add() is O(1) and memory is constant however many values are added;
+    percentile() scans the buckets, so it doesn't depend on the count
+    either. A percentile is reported as the upper bound of its bucket
+    (capped at the largest value seen), so it is at most growth - 1 high.
+    """
+
+    def __init__(self, low=0.01, high=1e7, growth=1.05):
+        self.low = low
+        self.growth = growth
+        self._log_growth = math.log(growth)
+        # Bucket 0 holds values <= low, the last one values above high
+        self._top = math.ceil(math.log(high / low) / self._log_growth) + 1
+        self.counts = [0] * (self._top + 1)
+        self.count = 0
+        self.max = 0.0
+
+    def add(self, value):
+        if value <= self.low:
+            bucket = 0
+        else:
+            bucket = min(self._top, int(math.log(value / self.low) / self._log_growth) + 1)
+        self.counts[bucket] += 1
+        self.count += 1
+        if value > self.max:
+            self.max = value
+
+    def percentile(self, q):
+        """q-th percentile (0-100), nearest-rank, to bucket resolution"""
+        if not self.count:
+            return 0.0
+        rank = max(1, min(self.count, round(q / 100 * self.count)))
+        seen = 0
+        for bucket, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank:
+                return min(self.max, self.low * self.growth ** bucket)
+        return self.max
@@ -0,0 +1,324 @@
+"""Multi-call traffic scheduler: overlapping calls as one time-ordered event log.
+
+Instead of calls that each start at [00:00], calls arrive over a span of
+days from an arrival process, and every call's utterances are placed at
+its start time plus their [MM:SS] offsets:
+
+    poisson     a constant rate of --rate calls per hour
+    business    --rate calls per hour at the weekday peak, shaped by
+                BUSINESS_HOURS_CURVE (quiet nights, lunch dip) and
+                WEEKEND_FACTOR
+    bursty      --rate calls per hour, with random bursts (--bursts-per-day,
+                each ~BURST_SECONDS long) at --burst-multiplier times the rate
+
+Calls take call_ids in arrival order, so they rotate through the verticals
+and archetypes like a generated corpus (call_plan), and each is seeded from
+(seed, call_id) alone: call N has the same dialogue as call N of a corpus
+generated with the same seed. Its header date is the day it starts.
+
+The log is JSON Lines in live_server.py's event format, with the wall-clock
+time and seconds since the start of the span on every event:
+
+    {"event": "start", "ts": "2026-01-05T09:14:03", "offset_sec": 33243, "call_id": 17, "company": ..., ...}
+    {"event": "utterance", "ts": ..., "offset_sec": ..., "call_id": 17, "seq": 0, "time_sec": 0, "speaker": ..., "text": ...}
+    {"event": "end", "ts": ..., "offset_sec": ..., "call_id": 17, "utterances": 42}
+
+Events are ordered by (time, call_id, seq). They come from a k-way heap
+merge of the active calls' utterance sequences, and a call is only
+generated once the merge reaches its start time and dropped after its end
+event, so memory is bounded by the number of concurrently active calls,
+not the number of calls in the log.
+
+Usage:
+    python traffic.py --arrivals business --rate 600 --days 7 --seed 42 --output week.jsonl.gz
+    python traffic.py --arrivals bursty --rate 120 --calls 5000 --start 2026-01-05T08:00 --output -
+"""
+import argparse
+import heapq
+import json
+import os
+import random
+import sys
+import time
+from bisect import bisect_right
+from datetime import datetime, timedelta
+
+import generate_fake_calls
+from content_packs import ContentPackError
+from generate_fake_calls import call_builder, call_plan, call_rng
+from shard_writer import DECOMPRESSORS
+
+ARRIVALS = ("poisson", "business", "bursty")
+DEFAULT_RATE = 60.0
+DEFAULT_DAYS = 1.0
+DEFAULT_OUTPUT = "traffic_events.jsonl"
+# Event lines joined into one write; per-line writes dominate with a compressed log
+EVENTS_PER_WRITE = 1024
+
+# Weekday call rate by hour of day, relative to the peak
+BUSINESS_HOURS_CURVE = (
+    0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.01, 0.05,     # 00-07
+    0.35, 0.8, 1.0, 0.95, 0.55, 0.7, 0.95, 0.9,   # 08-15
+    0.6, 0.25, 0.08, 0.02, 0.0, 0.0, 0.0, 0.0,    # 16-23
+)
+# Weekend rate relative to the same hour on a weekday
+WEEKEND_FACTOR = 0.05
+
+DEFAULT_BURSTS_PER_DAY = 4.0
+DEFAULT_BURST_MULTIPLIER = 8.0
+# Mean length of a burst; lengths are exponentially distributed
+BURST_SECONDS = 900
+
+
+class ArrivalProcess:
+    """Call start times over a span: a Poisson process with a time-varying rate
+
+    Non-constant rates are sampled by thinning: candidates are drawn at the
+    peak rate and kept with probability rate(t) / peak.
+    """
+
+    def __init__(self, kind, rate, start, seed, bursts_per_day=DEFAULT_BURSTS_PER_DAY,
+                 burst_multiplier=DEFAULT_BURST_MULTIPLIER):
+        if kind not in ARRIVALS:
+            raise ValueError(f"unknown arrival process {kind!r}; expected one of {ARRIVALS}")
+        if rate <= 0:
+            raise ValueError("arrival rate must be positive")
+        self.kind = kind
+        # Calls per second; the peak (business) or base (bursty) rate
+        self.rate = rate / 3600
+        self.start = start
+        self.seed = seed
+        self.bursts_per_day = bursts_per_day
+        self.burst_multiplier = max(1.0, burst_multiplier)
+        # Sorted burst start and end offsets, drawn by arrivals()
+        self._burst_starts = []
+        self._burst_ends = []
+
+    def __repr__(self):
+        return f"ArrivalProcess({self.kind!r}, {self.rate * 3600:g}/h, start={self.start.isoformat()})"
+
+    def peak(self):
+        """Highest rate the process reaches, in calls per second"""
+        return self.rate * self.burst_multiplier if self.kind == "bursty" else self.rate
+
+    def rate_at(self, offset):
+        """Calls per second offset seconds after the start"""
+        if self.kind == "business":
+            moment = self.start + timedelta(seconds=offset)
+            factor = BUSINESS_HOURS_CURVE[moment.hour]
+            return self.rate * factor * (WEEKEND_FACTOR if moment.weekday() >= 5 else 1.0)
+        if self.kind == "bursty":
+            i = bisect_right(self._burst_starts, offset) - 1
+            if i >= 0 and offset < self._burst_ends[i]:
+                return self.rate * self.burst_multiplier
+        return self.rate
+
+    def _draw_bursts(self, rng, span):
+        self._burst_starts, self._burst_ends = [], []
+        rate = self.bursts_per_day / 86400
+        t = rng.expovariate(rate) if rate > 0 else span
+        while t < span:
+            # Overlapping bursts merge into one
+            end = t + rng.expovariate(1 / BURST_SECONDS)
+            if self._burst_ends and t <= self._burst_ends[-1]:
+                self._burst_ends[-1] = max(self._burst_ends[-1], end)
+            else:
+                self._burst_starts.append(t)
+                self._burst_ends.append(end)
+            t += rng.expovariate(rate)
+
+    def arrivals(self, span):
+        """Yield call start offsets in seconds, ascending, up to span seconds"""
+        # Its own stream, so the schedule doesn't depend on how calls are generated
+        rng = random.Random(f"{self.seed}:arrivals")
+        if self.kind == "bursty":
+            self._draw_bursts(rng, span)
+        peak = self.peak()
+        constant = self.kind == "poisson"
+        t = 0.0
+        while True:
+            t += rng.expovariate(peak)
+            if t >= span:
+                return
+            if constant or rng.random() * peak < self.rate_at(t):
+                yield t
+
+
+class TrafficScheduler:
+    """Generate scheduled calls and merge their events into one time-ordered stream"""
+
+    def __init__(self, process, span, seed, max_calls=None, start_id=1, engine="random"):
+        self.process = process
+        self.span = span
+        self.seed = seed
+        self.max_calls = max_calls
+        self.start_id = start_id
+        self.build = call_builder(engine)
+        self.calls = 0
+        self.event_count = 0
+        self.active = 0
+        self.peak_active = 0
+
+    def schedule(self):
+        """Yield (start offset in whole seconds, call_id) in arrival order"""
+        call_id = self.start_id
+        for offset in self.process.arrivals(self.span):
+            if self.max_calls is not None and call_id - self.start_id >= self.max_calls:
+                return
+            yield int(offset), call_id
+            call_id += 1
+
+    def build_call(self, call_id, offset):
+        """The CallRecord for a call starting offset seconds into the span"""
+        vertical, archetype = call_plan(call_id)
+        call_date = (self.process.start + timedelta(seconds=offset)).strftime("%Y-%m-%d")
+        return self.build(call_id, vertical, archetype, rng=call_rng(self.seed, call_id), call_date=call_date)
+
+    def merged(self):
+        """Yield (offset, call_id, seq, call, call start) for every event, in time order
+
+        seq is -1 for a call's start event, the utterance index for its
+        utterances and len(call) for its end event.
+        """
+        heap = []
+        arrivals = self.schedule()
+        pending = next(arrivals, None)
+        while heap or pending is not None:
+            # Start every call due no later than the earliest queued event
+            while pending is not None and (not heap or pending[0] <= heap[0][0]):
+                start, call_id = pending
+                heapq.heappush(heap, (start, call_id, -1, self.build_call(call_id, start), start))
+                self.calls += 1
+                self.active = len(heap)
+                self.peak_active = max(self.peak_active, self.active)
+                pending = next(arrivals, None)
+
+            entry = heap[0]
+            yield entry
+            self.event_count += 1
+            _, call_id, seq, call, start = entry
+            seq += 1
+            if seq < len(call):
+                heapq.heapreplace(heap, (start + call.times[seq], call_id, seq, call, start))
+            elif seq == len(call):
+                heapq.heapreplace(heap, (start + call.duration_seconds, call_id, seq, call, start))
+            else:
+                heapq.heappop(heap)
+                self.active = len(heap)
+
+    def events(self):
+        """Yield the event dicts of the log, in time order"""
+        origin = self.process.start
+        for offset, call_id, seq, call, _ in self.merged():
+            stamp = {"ts": (origin + timedelta(seconds=offset)).isoformat(), "offset_sec": offset}
+            if seq < 0:
+                yield {"event": "start", **stamp, **call.metadata(), "date": call.call_date}
+            elif seq < len(call):
+                yield {"event": "utterance", **stamp, "call_id": call_id, "seq": seq,
+                       "time_sec": call.times[seq], "speaker": call.participants[call.speakers[seq]],
+                       "text": call.texts[seq]}
+            else:
+                yield {"event": "end", **stamp, "call_id": call_id, "utterances": len(call)}
+
+
+def open_log(path, mode="rt"):
+    """Open an event log, compressed by its .gz/.xz/.bz2 suffix; "-" is stdin/stdout"""
+    if path == "-":
+        return sys.stdout if "w" in mode else sys.stdin
+    opener = DECOMPRESSORS.get(os.path.splitext(path)[1], open)
+    return opener(path, mode, encoding="utf-8")
+
+
+def read_events(path):
+    """Replay a saved event log: yield its event dicts in order"""
+    with open_log(path) as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Schedule overlapping calls and write one time-ordered event log")
+    parser.add_argument("--arrivals", choices=ARRIVALS, default="poisson",
+                        help="arrival process for call start times (default: poisson)")
+    parser.add_argument("--rate", type=float, default=DEFAULT_RATE,
+                        help="calls per hour: the constant, weekday peak or between-burst rate "
+                             f"(default: {DEFAULT_RATE:g})")
+    parser.add_argument("--days", type=float, default=DEFAULT_DAYS,
+                        help=f"length of the span calls start in (default: {DEFAULT_DAYS:g})")
+    parser.add_argument("--calls", type=int, default=None,
+                        help="stop after this many calls (default: every call that arrives in the span)")
+    parser.add_argument("--start", default=None,
+                        help="start of the span, YYYY-MM-DD or YYYY-MM-DDTHH:MM (default: today, 00:00)")
+    parser.add_argument("--bursts-per-day", type=float, default=DEFAULT_BURSTS_PER_DAY,
+                        help=f"mean bursts per day with --arrivals bursty (default: {DEFAULT_BURSTS_PER_DAY:g})")
+    parser.add_argument("--burst-multiplier", type=float, default=DEFAULT_BURST_MULTIPLIER,
+                        help=f"rate multiplier during a burst (default: {DEFAULT_BURST_MULTIPLIER:g})")
+    parser.add_argument("--seed", type=int, default=None,
+                        help="master seed for arrivals and calls (default: random)")
+    parser.add_argument("--start-id", type=int, default=1, help="call_id of the first call (default: 1)")
+    parser.add_argument("--engine", choices=["random", "model"], default="random",
+                        help="per-call generator or a trained dialogue model (default: random)")
+    parser.add_argument("--model", default=None, metavar="PATH",
+                        help="dialogue model for --engine model, written by dialogue_model.py train")
+    parser.add_argument("--content-pack", action="append", default=[], metavar="PATH",
+                        help="JSON/TOML content pack, or a directory of them; repeatable, later packs win")
+    parser.add_argument("--verticals", default=None,
+                        help="comma-separated verticals to rotate through (default: all built-in and pack verticals)")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT,
+                        help=f"event log, compressed if it ends in .gz/.xz/.bz2; - for stdout (default: {DEFAULT_OUTPUT})")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    try:
+        start = datetime.fromisoformat(args.start) if args.start else datetime.combine(datetime.now().date(),
+                                                                                      datetime.min.time())
+    except ValueError:
+        raise SystemExit(f"Error: --start must be YYYY-MM-DD or YYYY-MM-DDTHH:MM, got {args.start!r}")
+    try:
+        generate_fake_calls.use_content(args.content_pack, args.verticals.split(",") if args.verticals else None)
+    except (ContentPackError, OSError) as e:
+        raise SystemExit(f"Error loading content packs: {e}")
+    if args.engine == "model":
+        if args.model is None:
+            raise SystemExit("Error: --engine model needs --model PATH")
+        try:
+            generate_fake_calls.use_dialogue_model(args.model)
+        except (ValueError, OSError) as e:
+            raise SystemExit(f"Error loading dialogue model: {e}")
+    seed = args.seed if args.seed is not None else random.randrange(2 ** 32)
+    try:
+        process = ArrivalProcess(args.arrivals, args.rate, start, seed, args.bursts_per_day, args.burst_multiplier)
+    except ValueError as e:
+        raise SystemExit(f"Error: {e}")
+    span = args.days * 86400
+    scheduler = TrafficScheduler(process, span, seed, max_calls=args.calls, start_id=args.start_id,
+                                 engine=args.engine)
+
+    # Progress goes to stderr when the log itself is on stdout
+    log = sys.stderr if args.output == "-" else sys.stdout
+    print(f"Scheduling {args.arrivals} arrivals at {args.rate:g} calls/hour over {args.days:g} days "
+          f"from {start.isoformat()} (seed: {seed})", file=log)
+    started = time.perf_counter()
+    encode = json.JSONEncoder(ensure_ascii=False).encode
+    with open_log(args.output, "wt") as out:
+        batch = []
+        for event in scheduler.events():
+            batch.append(encode(event))
+            if len(batch) == EVENTS_PER_WRITE:
+                batch.append("")
+                out.write("\n".join(batch))
+                batch = []
+        if batch:
+            batch.append("")
+            out.write("\n".join(batch))
+    print(f"✓ {scheduler.calls} calls, {scheduler.event_count} events in {time.perf_counter() - started:.1f}s "
+          f"(peak {scheduler.peak_active} concurrent calls)", file=log)
+    if args.output != "-":
+        print(f"✓ Event log saved to: {args.output}", file=log)
+
+
+if __name__ == "__main__":
+    main()
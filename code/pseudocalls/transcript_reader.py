@@ -0,0 +1,292 @@
+"""Random-access reader for transcript corpora.
+
+Works on the format generate_call() emits (and data/Contoso_customer_calls.txt):
+
+    ================================================================================
+    CALL #001 - Company (Vertical)
+    Date: 2026-02-11
+    ...
+    ================================================================================
+
+    [00:00] Speaker (Role):
+    text
+
+The corpus file is memory-mapped and a sidecar index (<file>.idx) records the
+byte offset of every call, where its header block ends and its call id, so
+call N is an O(1) slice and its header and utterances are only parsed when
+.header or .utterances is touched.
+
+Usage:
+    python transcript_reader.py ../../data/fake_customer_calls_2.txt --sample 5
+    python transcript_reader.py corpus.txt --call 42
+"""
+import argparse
+import json
+import mmap
+import os
+import random
+import re
+from array import array
+
+from call_record import BANNER
+
+INDEX_VERSION = 2
+# call_ids entry for a call whose CALL # line didn't parse
+NO_CALL_ID = -1
+
+HEADER_RE = re.compile(r"CALL #(\d+) - (.+) \(([^()]+)\)$")
+UTTERANCE_RE = re.compile(rb"^\[(\d+):(\d\d)\] ([^\r\n]+):\r?\n", re.MULTILINE)
+
+
+def parse_header(block):
+    """Parse the banner block of one call into a dict of header fields"""
+    header = {}
+    lines = block.splitlines()
+    # lines[0] is the opening banner; stop at the closing one
+    for line in lines[1:]:
+        if line == BANNER:
+            break
+        match = HEADER_RE.match(line)
+        if match:
+            header["call_id"] = int(match.group(1))
+            header["company"] = match.group(2)
+            header["vertical"] = match.group(3)
+        elif ": " in line:
+            key, value = line.split(": ", 1)
+            header[key.lower().replace(" ", "_")] = value
+    return header
+
+
+def parse_utterances(raw):
+    """Parse the utterances out of one call's raw bytes into (time_sec, speaker, text) tuples"""
+    matches = list(UTTERANCE_RE.finditer(raw))
+    utterances = []
+    for i, match in enumerate(matches):
+        end = matches[i + 1].start() if i + 1 < len(matches) else len(raw)
+        time_sec = int(match.group(1)) * 60 + int(match.group(2))
+        speaker = match.group(3).decode("utf-8")
+        text = raw[match.end():end].decode("utf-8").strip()
+        utterances.append((time_sec, speaker, text))
+    return utterances
+
+
+class TranscriptCall:
+    """A lazily parsed view of one call inside a memory-mapped corpus"""
+
+    __slots__ = ("_buf", "start", "end", "_header_end", "_header", "_utterances")
+
+    def __init__(self, buf, start, end, header_end):
+        self._buf = buf
+        self.start = start
+        self.end = end
+        self._header_end = header_end
+        self._header = None
+        self._utterances = None
+
+    @property
+    def header(self):
+        """Dict of header fields, parsed on first access"""
+        if self._header is None:
+            self._header = parse_header(self._buf[self.start:self._header_end].decode("utf-8"))
+        return self._header
+
+    @property
+    def raw(self):
+        """The call's bytes exactly as they appear in the corpus"""
+        return self._buf[self.start:self.end]
+
+    @property
+    def text(self):
+        return self.raw.decode("utf-8")
+
+    @property
+    def utterances(self):
+        """List of (time_sec, speaker, text) tuples, parsed on first access"""
+        if self._utterances is None:
+            self._utterances = parse_utterances(self.raw)
+        return self._utterances
+
+    def __repr__(self):
+        return f"TranscriptCall({self.header!r}, bytes={self.end - self.start})"
+
+
+def detect_newline(buf):
+    """Line ending used by a corpus: CRLF (like the files in data/) or LF"""
+    first = buf.find(b"\n")
+    if first > 0 and buf[first - 1:first] == b"\r":
+        return b"\r\n"
+    return b"\n"
+
+
+def iter_call_spans(buf):
+    """Scan a corpus buffer lazily, yielding (start, header_end, end, header) for each call
+
+    header_end is where the banner block stops and the utterances begin.
+    """
+    newline = detect_newline(buf)
+    marker = BANNER.encode("ascii") + newline + b"CALL #"
+    pos = buf.find(marker)
+    while pos != -1:
+        # The header block ends at the blank line after the second banner
+        header_end = buf.find(newline + newline, pos + len(marker))
+        if header_end == -1:
+            header_end = len(buf)
+        header = parse_header(buf[pos:header_end].decode("utf-8"))
+        next_pos = buf.find(marker, header_end)
+        yield pos, header_end, (len(buf) if next_pos == -1 else next_pos), header
+        pos = next_pos
+
+
+def build_index(buf):
+    """Scan a corpus buffer and return (offsets, headers)
+
+    offsets has one entry per call plus a final end-of-data offset.
+    """
+    offsets = array("Q")
+    headers = []
+    for start, _, _, header in iter_call_spans(buf):
+        offsets.append(start)
+        headers.append(header)
+    offsets.append(len(buf))
+    return offsets, headers
+
+
+def build_span_index(buf):
+    """Scan a corpus buffer and return (offsets, header_ends, call_ids) arrays
+
+    offsets has one entry per call plus a final end-of-data offset;
+    header_ends and call_ids have one entry per call.
+    """
+    offsets = array("Q")
+    header_ends = array("Q")
+    call_ids = array("q")
+    for start, header_end, _, header in iter_call_spans(buf):
+        offsets.append(start)
+        header_ends.append(header_end)
+        call_ids.append(header.get("call_id", NO_CALL_ID))
+    offsets.append(len(buf))
+    return offsets, header_ends, call_ids
+
+
+def write_index(index_path, source_stat, offsets, header_ends, call_ids):
+    """Atomically write the sidecar index"""
+    meta = {
+        "version": INDEX_VERSION,
+        "source_size": source_stat.st_size,
+        "source_mtime_ns": source_stat.st_mtime_ns,
+        "count": len(call_ids),
+    }
+    tmp_path = index_path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(json.dumps(meta).encode("utf-8") + b"\n")
+        offsets.tofile(f)
+        header_ends.tofile(f)
+        call_ids.tofile(f)
+    os.replace(tmp_path, index_path)
+
+
+def read_index(index_path, source_stat):
+    """Load (offsets, header_ends, call_ids) from a sidecar index, or None if it's missing or stale"""
+    try:
+        with open(index_path, "rb") as f:
+            meta = json.loads(f.readline())
+            if (meta.get("version") != INDEX_VERSION
+                    or meta["source_size"] != source_stat.st_size
+                    or meta["source_mtime_ns"] != source_stat.st_mtime_ns):
+                return None
+            offsets = array("Q")
+            offsets.fromfile(f, meta["count"] + 1)
+            header_ends = array("Q")
+            header_ends.fromfile(f, meta["count"])
+            call_ids = array("q")
+            call_ids.fromfile(f, meta["count"])
+    except (OSError, ValueError, EOFError, KeyError):
+        return None
+    return offsets, header_ends, call_ids
+
+
+class TranscriptCorpus:
+    """Memory-mapped transcript corpus with O(1) access to call N"""
+
+    def __init__(self, path, index_path=None, rebuild=False):
+        self.path = path
+        self.index_path = index_path or path + ".idx"
+        self._file = open(path, "rb")
+        stat = os.fstat(self._file.fileno())
+        # mmap can't map an empty file
+        self._buf = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if stat.st_size else b""
+        self._by_call_id = None
+
+        loaded = None if rebuild else read_index(self.index_path, stat)
+        if loaded is None:
+            loaded = build_span_index(self._buf)
+            try:
+                write_index(self.index_path, stat, *loaded)
+            except OSError:
+                # Read-only location: use the index from memory this time
+                pass
+        self.offsets, self.header_ends, self.call_ids = loaded
+
+    @property
+    def headers(self):
+        """Header dicts for every call, in file order; parses every header"""
+        return [call.header for call in self]
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, n):
+        if n < 0:
+            n += len(self)
+        if not 0 <= n < len(self):
+            raise IndexError(f"call index {n} out of range")
+        return TranscriptCall(self._buf, self.offsets[n], self.offsets[n + 1], self.header_ends[n])
+
+    def __iter__(self):
+        for n in range(len(self)):
+            yield self[n]
+
+    def by_call_id(self, call_id):
+        """Look a call up by the number in its CALL #NNN header"""
+        if self._by_call_id is None:
+            self._by_call_id = {call_id: n for n, call_id in enumerate(self.call_ids) if call_id != NO_CALL_ID}
+        return self[self._by_call_id[call_id]]
+
+    def sample(self, k, rng=random):
+        """k distinct calls chosen uniformly at random"""
+        return [self[n] for n in rng.sample(range(len(self)), k)]
+
+    def close(self):
+        if isinstance(self._buf, mmap.mmap):
+            self._buf.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Index and randomly access a transcript corpus")
+    parser.add_argument("path", help="transcript corpus file")
+    parser.add_argument("--rebuild", action="store_true", help="rebuild the sidecar index even if it is current")
+    parser.add_argument("--call", type=int, default=None, help="print the call with this CALL # number")
+    parser.add_argument("--sample", type=int, default=0, help="print the headers of K random calls")
+    args = parser.parse_args(argv)
+
+    with TranscriptCorpus(args.path, rebuild=args.rebuild) as corpus:
+        print(f"{len(corpus)} calls indexed in {corpus.index_path}")
+
+        if args.call is not None:
+            print(corpus.by_call_id(args.call).text)
+
+        for call in corpus.sample(min(args.sample, len(corpus))):
+            header = call.header
+            print(f"  #{header.get('call_id')} {header.get('company')} ({header.get('vertical')}) - "
+                  f"{len(call.utterances)} utterances")
+
+
+if __name__ == "__main__":
+    main()